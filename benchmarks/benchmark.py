@@ -0,0 +1,314 @@
+#! /usr/bin/env python3
+# Copyright (C) 2026 Sebastian Pipping <sebastian@pipping.org>
+# Licensed under GNU Affero General Public License version 3.0 or later
+
+"""
+Benchmarks of parsing, composing and command line invocations of xiangqi-setup,
+with machine-readable results that can be compared across commits, e.g.:
+
+    # python3 benchmarks/benchmark.py --output before.json
+    # git checkout ...
+    # python3 benchmarks/benchmark.py --output after.json --compare before.json
+"""
+
+import argparse
+import contextlib
+import datetime
+import fnmatch
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import timeit
+
+from xiangqi_setup.api import render_svg
+from xiangqi_setup.file_formats.annofen import iterate_annofen_tokens
+from xiangqi_setup.file_formats.fen import iterate_fen_tokens
+from xiangqi_setup.file_formats.wxf import ALL_MOVES, iterate_wxf_tokens
+from xiangqi_setup.file_formats.xay import iterate_xay_tokens
+from xiangqi_setup.theme_registry import load_theme_registry
+from xiangqi_setup.themes import ANNOTATION_THEMES, BOARD_THEMES, PIECE_THEMES
+from xiangqi_setup.version import VERSION_STR
+
+_RESULTS_FORMAT = "xiangqi-setup benchmark results"
+_RESULTS_FORMAT_VERSION = 1
+
+_DEFAULT_REPEAT = 5
+_DEFAULT_MIN_SECONDS_PER_REPEAT = 0.2
+_DEFAULT_THRESHOLD = 1.2
+
+_INITIAL_FEN = "rnbakabnr/9/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/9/RNBAKABNR w - - 0 1"
+_TWO_KINGS_FEN = "4k4/9/9/9/9/9/9/9/9/4K4 w - - 0 1"
+
+_SMALL_ANNOFEN = "v1 4k4/9/9/9/9/9/9/9/9/4K4"
+# Every intersection with a piece or blank plus two annotations
+_LARGE_ANNOFEN = "v1 " + "/".join(
+    [
+        "[r<bm><a+1+0>][h<bg><a+0-1>][e<pm><a-1+0>][a<bb><a+0+1>][k<bm><a+1+1>]"
+        "[a<bg><a-1-1>][e<pm><a+2+1>][h<bb><a-2+1>][r<bm><a+1-2>]"
+    ]
+    * 5
+    + [
+        "[R<bm><a+1+0>][H<bg><a+0-1>][E<pm><a-1+0>][A<bb><a+0+1>][K<bm><a+1+1>]"
+        "[A<bg><a-1-1>][E<pm><a+2+1>][H<bb><a-2+1>][R<bm><a+1-2>]"
+    ]
+    * 5
+)
+
+_SMALL_XAY = """\
+version: '1'
+setup: [
+  [[], [], [], [], [k]],
+  [], [], [], [], [], [], [], [],
+  [[], [], [], [], [K]],
+]
+"""
+_LARGE_XAY = (
+    "version: '1'\nsetup: [\n"
+    + "".join("  [" + ", ".join(["[r, bm, a+1+0, a-1+0]"] * 9) + "],\n" for _ in range(10))
+    + "]\n"
+)
+
+_WXF_TEMPLATE = """\
+FORMAT  WXF
+FEN     rnbakabnr/9/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/9/RNBAKABNR r
+START{{
+{moves}
+}}END
+"""
+_SMALL_WXF = _WXF_TEMPLATE.format(moves=" 1. H2+3 h2+3")
+# Horses moving out and back in, for a game of 800 plies
+_LARGE_WXF = _WXF_TEMPLATE.format(moves="\n".join(["H2+3 h2+3 H3-2 h3-2"] * 200))
+
+# annoFEN used for composing with annotation themes
+_ANNOTATED_ANNOFEN = (
+    "v1 r[<bm><a+1-2>]bakabnr/9/1c[<pm>n]4c1/p1p1p1p1p/9/9/P1P1P1P1P"
+    "/1C2[<pm>C]2[<bm><a-3+0>]1/9/RNBAKABNR"
+)
+
+
+class _Benchmark:
+    def __init__(self, name: str, function, setup=None, loops: int | None = None):
+        self.name = name
+        self.function = function  # called without arguments, timed
+        self.setup = setup  # called without arguments before every repeat, not timed
+        self.loops = loops  # calls per repeat, None to calibrate
+
+
+def _parse_wxf(content: str, devnull) -> list:
+    # NOTE: The WXF parser reports every move applied to stdout
+    with contextlib.redirect_stdout(devnull):
+        return list(iterate_wxf_tokens(content, ALL_MOVES, True))
+
+
+def _iterate_parser_benchmarks(devnull):
+    for size, fen in (("small", _TWO_KINGS_FEN), ("large", _INITIAL_FEN)):
+        yield _Benchmark(f"parse/fen/{size}", lambda fen=fen: list(iterate_fen_tokens(fen)))
+    for size, content in (("small", _SMALL_ANNOFEN), ("large", _LARGE_ANNOFEN)):
+        yield _Benchmark(
+            f"parse/annofen/{size}", lambda content=content: list(iterate_annofen_tokens(content))
+        )
+    for size, content in (("small", _SMALL_XAY), ("large", _LARGE_XAY)):
+        yield _Benchmark(
+            f"parse/xay/{size}", lambda content=content: list(iterate_xay_tokens(content))
+        )
+    for size, content in (("small", _SMALL_WXF), ("large", _LARGE_WXF)):
+        yield _Benchmark(
+            f"parse/wxf/{size}",
+            lambda content=content: _parse_wxf(content, devnull),
+        )
+
+
+def _iterate_compose_benchmarks():
+    initial_atoms = list(iterate_fen_tokens(_INITIAL_FEN))
+    annotated_atoms = list(iterate_annofen_tokens(_ANNOTATED_ANNOFEN))
+
+    registry = load_theme_registry()
+    for kind, theme_keyword, atoms in (
+        (BOARD_THEMES, "board", initial_atoms),
+        (PIECE_THEMES, "pieces", initial_atoms),
+        (ANNOTATION_THEMES, "annotations", annotated_atoms),
+    ):
+        for theme_name in registry.get_theme_names(kind):
+            yield _Benchmark(
+                f"compose/{kind}/{theme_name}",
+                lambda atoms=atoms, kwargs={theme_keyword: theme_name}: render_svg(
+                    atoms, **kwargs
+                ),
+            )
+
+
+def _iterate_cli_benchmarks(temp_dir: str):
+    input_filename = os.path.join(temp_dir, "input.annofen")
+    with open(input_filename, "w") as f:
+        f.write(_ANNOTATED_ANNOFEN)
+    output_filename = os.path.join(temp_dir, "output.svg")
+    command = [sys.executable, "-m", "xiangqi_setup", input_filename, output_filename]
+
+    def run(cache_home_dir):
+        subprocess.run(
+            command,
+            check=True,
+            stdout=subprocess.DEVNULL,
+            env=dict(os.environ, XDG_CACHE_HOME=cache_home_dir),
+        )
+
+    # NOTE: Cold means without on-disk caches (e.g. of the theme registry)
+    #       that a previous run would have left behind.
+    cold_cache_home_dirs = []
+
+    def prepare_cold_run():
+        cold_cache_home_dirs.append(tempfile.mkdtemp(dir=temp_dir))
+
+    warm_cache_home_dir = os.path.join(temp_dir, "warm-cache")
+    # NOTE: One call per repeat only, since only the first call after setup is cold
+    yield _Benchmark(
+        "cli/cold", lambda: run(cold_cache_home_dirs[-1]), setup=prepare_cold_run, loops=1
+    )
+    yield _Benchmark(
+        "cli/warm",
+        lambda: run(warm_cache_home_dir),
+        setup=lambda: run(warm_cache_home_dir),
+        loops=1,
+    )
+
+
+def _measure(benchmark: _Benchmark, repeat: int, min_seconds_per_repeat: float, fixed_loops):
+    timer = timeit.Timer(benchmark.function)
+    seconds_per_call = []
+    loops = fixed_loops or benchmark.loops
+    for _ in range(repeat):
+        if benchmark.setup is not None:
+            benchmark.setup()
+        if loops is None:
+            loops = 1
+            while timer.timeit(loops) < min_seconds_per_repeat:
+                loops *= 2
+            if benchmark.setup is not None:
+                benchmark.setup()
+        seconds_per_call.append(timer.timeit(loops) / loops)
+    return {
+        "median": statistics.median(seconds_per_call),
+        "min": min(seconds_per_call),
+        "max": max(seconds_per_call),
+        "loops": loops,
+        "repeat": repeat,
+    }
+
+
+def _get_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _compare(results: dict, baseline_results: dict, threshold: float) -> int:
+    # NOTE: Minimums are compared since they are least affected by noise of other processes
+    regression_count = 0
+    print(f"{'benchmark':<60} {'baseline':>11} {'current':>11} {'ratio':>7}")
+    for name, result in results.items():
+        try:
+            baseline_seconds = baseline_results[name]["min"]
+        except KeyError:
+            continue  # i.e. a benchmark that did not exist back then
+        ratio = result["min"] / baseline_seconds
+        regressed = ratio > threshold
+        regression_count += regressed
+        print(
+            f"{name:<60} {baseline_seconds * 1000:9.3f}ms {result['min'] * 1000:9.3f}ms"
+            f" {ratio:6.2f}x" + ("  REGRESSION" if regressed else "")
+        )
+    return regression_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark xiangqi-setup")
+    parser.add_argument(
+        "--filter",
+        dest="patterns",
+        metavar="PATTERN",
+        action="append",
+        help='only run benchmarks matching this glob pattern, e.g. "parse/*" (repeatable)',
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=_DEFAULT_REPEAT,
+        help="number of measurements per benchmark (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--quick",
+        action="store_true",
+        help="measure a single call per benchmark only, e.g. to check that all benchmarks run",
+    )
+    parser.add_argument("--output", metavar="FILE", help="write results as JSON to this file")
+    parser.add_argument(
+        "--compare",
+        metavar="FILE",
+        help="compare to the results in this JSON file and exit non-zero on regressions",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=_DEFAULT_THRESHOLD,
+        help=(
+            "ratio of current to baseline minimum above which a benchmark"
+            " counts as regressed (default: %(default)s)"
+        ),
+    )
+    options = parser.parse_args()
+
+    repeat, fixed_loops = (1, 1) if options.quick else (options.repeat, None)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as temp_dir, open(os.devnull, "w") as devnull:
+        for benchmark in (
+            *_iterate_parser_benchmarks(devnull),
+            *_iterate_compose_benchmarks(),
+            *_iterate_cli_benchmarks(temp_dir),
+        ):
+            if options.patterns and not any(
+                fnmatch.fnmatchcase(benchmark.name, pattern) for pattern in options.patterns
+            ):
+                continue
+            result = _measure(benchmark, repeat, _DEFAULT_MIN_SECONDS_PER_REPEAT, fixed_loops)
+            results[benchmark.name] = result
+            print(f"{benchmark.name:<60} {result['median'] * 1000:9.3f}ms", file=sys.stderr)
+
+    document = {
+        "format": _RESULTS_FORMAT,
+        "version": _RESULTS_FORMAT_VERSION,
+        "commit": _get_commit(),
+        "xiangqi_setup_version": VERSION_STR,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "date": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "unit": "seconds",
+        "results": results,
+    }
+    if options.output:
+        with open(options.output, "w") as f:
+            json.dump(document, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+    if options.compare:
+        with open(options.compare) as f:
+            baseline_document = json.load(f)
+        if baseline_document.get("format") != _RESULTS_FORMAT:
+            sys.exit(f"ERROR: {options.compare!r} does not contain benchmark results")
+        if _compare(results, baseline_document["results"], options.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
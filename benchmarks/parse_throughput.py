@@ -0,0 +1,120 @@
+#! /usr/bin/env python3
+# Copyright (C) 2026 Sebastian Pipping <sebastian@pipping.org>
+# Licensed under GNU Affero General Public License version 3.0 or later
+
+"""
+Throughput of the FEN and annoFEN parsers in positions per second
+on a synthetic corpus of one position per line, as for bulk puzzle
+ingestion with ``--stream``, e.g.:
+
+    # python3 benchmarks/parse_throughput.py --lines 1000000
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+
+from xiangqi_setup.annotations import ANNOTATION_NAME_OF_ATOM_CODE
+from xiangqi_setup.file_formats.annofen import iterate_annofen_tokens
+from xiangqi_setup.file_formats.fen import iterate_fen_tokens
+
+_DEFAULT_LINE_COUNT = 1_000_000
+_DISTINCT_POSITION_COUNT = 1000
+
+_PIECE_LETTERS = "RHEAKCP"
+_PIECE_COUNT_RANGE = (2, 32)
+
+
+def _create_rows(rng: random.Random, with_annotations: bool) -> list[str]:
+    board = [[None] * 9 for _ in range(10)]
+    for _ in range(rng.randint(*_PIECE_COUNT_RANGE)):
+        letter = rng.choice(_PIECE_LETTERS)
+        board[rng.randrange(10)][rng.randrange(9)] = rng.choice((letter, letter.lower()))
+
+    atom_codes = sorted(ANNOTATION_NAME_OF_ATOM_CODE)
+    rows = []
+    for row in board:
+        chunks = []
+        empty_count = 0
+        for letter in row:
+            if with_annotations and rng.random() < 0.1:
+                stacked = (letter or "") + "".join(
+                    f"<{rng.choice(atom_codes)}>" for _ in range(rng.randint(1, 2))
+                )
+                letter = f"[{stacked}]"
+            if letter is None:
+                empty_count += 1
+                continue
+            if empty_count:
+                chunks.append(str(empty_count))
+                empty_count = 0
+            chunks.append(letter)
+        if empty_count:
+            chunks.append(str(empty_count))
+        rows.append("".join(chunks))
+    return rows
+
+
+def _create_corpus(line_count: int, with_annotations: bool) -> list[str]:
+    rng = random.Random(0)
+    if with_annotations:
+        distinct_lines = [
+            "v1 " + "/".join(_create_rows(rng, True)) for _ in range(_DISTINCT_POSITION_COUNT)
+        ]
+    else:
+        distinct_lines = [
+            "/".join(_create_rows(rng, False)) + " w - - 0 1"
+            for _ in range(_DISTINCT_POSITION_COUNT)
+        ]
+    return [distinct_lines[i % len(distinct_lines)] for i in range(line_count)]
+
+
+def _measure(parse, lines: list[str]) -> dict:
+    atom_count = 0
+    started = time.perf_counter()
+    for line in lines:
+        for _ in parse(line):
+            atom_count += 1
+    seconds = time.perf_counter() - started
+    return {
+        "positions": len(lines),
+        "atoms": atom_count,
+        "seconds": seconds,
+        "positions_per_second": len(lines) / seconds,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure FEN and annoFEN parser throughput")
+    parser.add_argument(
+        "--lines",
+        type=int,
+        default=_DEFAULT_LINE_COUNT,
+        help="number of positions per format (default: %(default)s)",
+    )
+    parser.add_argument("--output", metavar="FILE", help="write results as JSON to this file")
+    options = parser.parse_args()
+
+    results = {}
+    for name, parse, with_annotations in (
+        ("fen", iterate_fen_tokens, False),
+        ("annofen", iterate_annofen_tokens, True),
+    ):
+        lines = _create_corpus(options.lines, with_annotations)
+        results[name] = result = _measure(parse, lines)
+        print(
+            f"{name:<8} {result['positions']:>10,} positions"
+            f" {result['seconds']:8.2f}s {result['positions_per_second']:>12,.0f} positions/s",
+            file=sys.stderr,
+        )
+
+    if options.output:
+        with open(options.output, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -13,7 +13,13 @@ _tests_require = [
     "pytest",
 ]
 
+_raster_require = [
+    "numpy",
+    "pyvips",
+]
+
 _extras_require = {
+    "raster": _raster_require,
     "tests": _tests_require,
 }
 
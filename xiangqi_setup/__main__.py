@@ -2,75 +2,157 @@
 # Licensed under GNU Affero General Public License version 3.0 or later
 
 import argparse
-import inspect
+import functools
+import json
 import os
 import sys
 import textwrap
-from importlib import resources
-from os import walk
-
-from .compose import cm_to_pixel, compose_svg
-from .file_formats.annofen import is_annofen_content, iterate_annofen_tokens
-from .file_formats.fen import iterate_fen_tokens
-from .file_formats.wxf import ALL_MOVES, iterate_wxf_tokens
-from .file_formats.xay import is_xay_content, iterate_xay_tokens
-from .license import get_license_choices_of_theme, inform_license
+
+from .api import (
+    DEDUPE_MODES,
+    DEFAULT_ANNOTATION_SCALE,
+    DEFAULT_ANNOTATION_THEME,
+    DEFAULT_BOARD_THEME,
+    DEFAULT_OPTIMIZE_PRECISION,
+    DEFAULT_PIECE_SCALE,
+    DEFAULT_PIECE_THEME,
+    DEFAULT_RESOLUTION_DPI,
+    DEFAULT_WIDTH_CM,
+    INDEX_PLACEHOLDER,
+    PIECE_SCALE_MAX,
+    PIECE_SCALE_MIN,
+    PLY_PLACEHOLDER,
+    check_scaling,
+)
+from .file_formats import FILE_FORMAT_NAMES, get_file_format
+from .file_formats.wxf import ALL_MOVES
+from .license import inform_license
+from .theme_bundle import THEME_BUNDLE_BASENAME
+from .theme_registry import load_theme_registry
+from .themes import (
+    ANNOTATION_THEMES,
+    BOARD_THEMES,
+    PIECE_THEMES,
+    get_theme_dir,
+)
+from .timings import start_recording_timings, stop_recording_timings, timed
+from .units import cm_to_pixel
 from .version import VERSION_STR
 
-_DEFAULT_WIDTH_CM = 7.0
-_DEFAULT_RESOLUTION_DPI = 90.0
-_DEFAULT_WIDTH_PIXEL = cm_to_pixel(_DEFAULT_WIDTH_CM, _DEFAULT_RESOLUTION_DPI)
+# NOTE: Modules needed for rendering (and their dependencies, e.g. svgutils and lxml)
+#       are imported by the functions that need them so that --help and --version
+#       do not have to wait for them.
 
-_PIECE_SCALE_MIN = 0.0
-_PIECE_SCALE_MAX = 1.2
+_DEFAULT_WIDTH_PIXEL = cm_to_pixel(DEFAULT_WIDTH_CM, DEFAULT_RESOLUTION_DPI)
 
 
-def _get_self_dir():
-    return os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+def check(options):
+    with timed("import_modules"):
+        from .batch import renders_multiple_plies
+        from .raster import check_raster_support, is_raster_filename
+
+    check_scaling(options)
+
+    if is_raster_filename(getattr(options, "output_file", None) or ""):
+        with timed("import_modules"):  # i.e. of NumPy and pyvips
+            check_raster_support()
+
+    output_file = getattr(options, "output_file", None) or ""
+
+    if getattr(options, "stream", False):
+        if getattr(options, "archive", False):
+            raise ValueError("Options --stream and --archive cannot be combined.")
+        if renders_multiple_plies(options) or options.moves_to_play != "0":
+            raise ValueError("Option --stream cannot be combined with --moves or --every.")
+        if options.input_format not in (None, "annofen", "fen"):
+            raise ValueError('Option --stream only supports formats "annofen" and "fen".')
+        if not _has_placeholder(output_file, "index"):
+            raise ValueError(
+                f"Option --stream needs placeholder {INDEX_PLACEHOLDER}"
+                " (or e.g. {index:07d}) in the output filename."
+            )
+    elif getattr(options, "archive", False):
+        if options.input_format not in (None, "wxf"):
+            raise ValueError('Option --archive only supports format "wxf".')
+        other_fields = {"ply": 0} if renders_multiple_plies(options) else {}
+        if not _has_placeholder(output_file, "index", **other_fields):
+            raise ValueError(
+                f"Option --archive needs placeholder {INDEX_PLACEHOLDER}"
+                " (or e.g. {index:05d}) in the output filename."
+            )
 
+    if (
+        getattr(options, "store", None) is not None
+        and getattr(options, "dedupe", None) is not None
+    ):
+        raise ValueError("Options --store and --dedupe cannot be combined.")
+
+    if getattr(options, "dedupe", None) is not None and not (
+        options.stream or options.archive or renders_multiple_plies(options)
+    ):
+        raise ValueError(
+            "Option --dedupe needs --stream, --archive, --every"
+            " or several move counts for --moves."
+        )
 
-def _get_themes_home_dir():
-    self_dir = _get_self_dir()
-    if os.path.exists(os.path.join(self_dir, "..", ".git")):
-        return os.path.join(self_dir, "themes")
-    else:
-        return str(resources.files("xiangqi_setup") / "themes")
+    if renders_multiple_plies(options):
+        if options.every_nth_ply is not None and options.moves_to_play != "0":
+            raise ValueError("Options --moves and --every cannot be combined.")
+        other_fields = {"index": 0} if getattr(options, "archive", False) else {}
+        if not _has_placeholder(output_file, "ply", **other_fields):
+            raise ValueError(
+                f"Rendering more than one position needs placeholder {PLY_PLACEHOLDER}"
+                " (or e.g. {ply:03d}) in the output filename."
+            )
 
 
-def check(options):
-    if _PIECE_SCALE_MIN < options.piece_scale <= _PIECE_SCALE_MAX:
-        pass
+def _has_placeholder(filename_template: str, name: str, **other_fields) -> bool:
+    try:
+        return filename_template.format(**other_fields, **{name: 0}) != filename_template.format(
+            **other_fields, **{name: 1}
+        )
+    except (IndexError, KeyError, ValueError):
+        return False
+
+
+def run(options) -> int:
+    from .batch import render, render_archive, render_stream
+
+    if options.stream:
+        failure_count = render_stream(options)
+    elif options.archive:
+        failure_count = render_archive(options)
     else:
-        print(
-            "ERROR: Piece scale must be larger than %.1f and greater or equal %.1f ."
-            % (_PIECE_SCALE_MIN, _PIECE_SCALE_MAX),
-            file=sys.stderr,
+        render(options)
+        failure_count = 0
+
+    with timed("license_notice"):
+        inform_license(
+            options.board_theme_dir, options.piece_theme_dir, options.annotation_theme_dir
         )
-        sys.exit(1)
 
-    if options.width_centimeter is not None:
-        options.width_pixel = cm_to_pixel(options.width_centimeter, options.resolution_dpi)
-    delattr(options, "width_centimeter")
-    if options.width_pixel is None:
-        options.width_pixel = cm_to_pixel(_DEFAULT_WIDTH_CM, options.resolution_dpi)
-
-
-def run(options):
-    with open(options.input_file) as f:
-        content = f.read()
-        if is_annofen_content(content):
-            atoms_to_put = list(iterate_annofen_tokens(content))
-        elif is_xay_content(content):
-            atoms_to_put = list(iterate_xay_tokens(content))
-        elif "WXF" in content:
-            atoms_to_put = list(
-                iterate_wxf_tokens(content, options.moves_to_play, options.annotate_last_move)
-            )
+    return failure_count
+
+
+def _report_timings(timings, options):
+    if options.timings:
+        print(timings.format(), file=sys.stderr)
+
+    if options.timings_json_file is not None:
+        document = timings.to_json()
+        if options.timings_json_file == "-":
+            json.dump(document, sys.stdout, indent=2)
+            print()
         else:
-            atoms_to_put = list(iterate_fen_tokens(content))
+            with open(options.timings_json_file, "w") as f:
+                json.dump(document, f, indent=2)
+                f.write("\n")
 
-    compose_svg(atoms_to_put, options)
-    inform_license(options.board_theme_dir, options.piece_theme_dir, options.annotation_theme_dir)
+
+def _turn_theme_names_into_paths(options):
+    options.board_theme_dir = get_theme_dir(BOARD_THEMES, options.board_theme_dir)
+    options.piece_theme_dir = get_theme_dir(PIECE_THEMES, options.piece_theme_dir)
+    options.annotation_theme_dir = get_theme_dir(ANNOTATION_THEMES, options.annotation_theme_dir)
 
 
 def _theme_name(text):
@@ -82,82 +164,147 @@ def _theme_name(text):
 _theme_name.__name__ = "theme name"  # used by arparse error message
 
 
-def _discover_themes_in(directory):
-    for _root, dirs, _files in walk(directory, topdown=True):
-        return [d for d in dirs if d != "__pycache__"]
-
-
 def _format_right_help_column(text):
     return "\n".join(textwrap.wrap(text, width=55))
 
 
 def _type_moves_to_play(text):
-    if text != ALL_MOVES:
-        int(text)  # i.e. raise Value Error
+    for move_count in text.split(","):
+        if move_count != ALL_MOVES:
+            int(move_count)  # i.e. raise Value Error
     return text
 
 
 _type_moves_to_play.__name__ = "move count"
 
 
-def main():
-    themes_home_dir = _get_themes_home_dir()
-    board_themes_home_dir = os.path.join(themes_home_dir, "board")
-    piece_themes_home_dir = os.path.join(themes_home_dir, "pieces")
-    annotation_themes_home_dir = os.path.join(themes_home_dir, "annotations")
+def _type_positive_int(text):
+    value = int(text)
+    if value < 1:
+        raise ValueError("Must be positive")
+    return value
+
+
+_type_positive_int.__name__ = "positive integer"
+
+
+def _type_non_negative_int(text):
+    value = int(text)
+    if value < 0:
+        raise ValueError("Must not be negative")
+    return value
+
+
+_type_non_negative_int.__name__ = "non-negative integer"
 
+
+def _type_file_format(text):
+    return get_file_format(text).name  # i.e. raise ValueError for unsupported formats
+
+
+_type_file_format.__name__ = "input format"
+
+
+_FLAG_OF_TEXT = {
+    "true": True,
+    "false": False,
+    "1": True,
+    "0": False,
+}
+
+
+def _type_flag(value):
+    if isinstance(value, str) and value.lower() in _FLAG_OF_TEXT:
+        return _FLAG_OF_TEXT[value.lower()]
+    if not isinstance(value, bool):
+        raise ValueError(f"Expected true or false, got {value!r}")
+    return value
+
+
+# Maps keys of batch manifest jobs and server request parameters
+# to pairs of (option destination, type)
+_OPTION_OF_KEY = {
+    "board": ("board_theme_dir", _theme_name),
+    "pieces": ("piece_theme_dir", _theme_name),
+    "annotations": ("annotation_theme_dir", _theme_name),
+    "width-px": ("width_pixel", float),
+    "width-cm": ("width_centimeter", float),
+    "dpi": ("resolution_dpi", float),
+    "scale-pieces": ("piece_scale", float),
+    "scale-annotations": ("annotation_scale", float),
+    "format": ("input_format", _type_file_format),
+    "moves": ("moves_to_play", lambda value: _type_moves_to_play(str(value))),
+    "every": ("every_nth_ply", _type_positive_int),
+    "annotate-last-move": ("annotate_last_move", _type_flag),
+    "defs": ("use_defs", _type_flag),
+    "optimize": ("optimize", _type_flag),
+    "precision": ("optimize_precision", _type_positive_int),
+    "debug": ("debug", _type_flag),
+}
+
+
+def _create_options(base_options, overrides: dict):
+    options = argparse.Namespace(**vars(base_options))
+
+    for key, value in overrides.items():
+        try:
+            dest, type_ = _OPTION_OF_KEY[key]
+        except KeyError:
+            raise ValueError(f"Unsupported option {key!r}")
+        setattr(options, dest, type_(value))
+
+        # Mimic the mutual exclusion of --width-px and --width-cm
+        if key == "width-px":
+            options.width_centimeter = None
+        elif key == "width-cm":
+            options.width_pixel = None
+
+    _turn_theme_names_into_paths(options)
+    check(options)
+    return options
+
+
+def _create_batch_item_options(base_options, item):
+    item_base_options = argparse.Namespace(**vars(base_options))
+    item_base_options.input_file = item.input_file
+    item_base_options.output_file = item.output_file
+    return _create_options(item_base_options, item.overrides)
+
+
+def _create_epilog(argv):
     epilog_chunks = []
 
     # Are we in --help mode (or can we save wasting time collecting all that data)
-    if "--help" in sys.argv[1:] or "-h" in sys.argv[1:]:
-        board_theme_choices = []
-        piece_theme_choices = []
-        annotation_theme_choices = []
-        for directory, target_list in (
-            (board_themes_home_dir, board_theme_choices),
-            (piece_themes_home_dir, piece_theme_choices),
-            (annotation_themes_home_dir, annotation_theme_choices),
-        ):
-            target_list += _discover_themes_in(directory)
+    if "--help" in argv or "-h" in argv:
+        registry = load_theme_registry()
 
-        for category, category_home_dir, source_list, blank_line_after in (
-            ("board themes", board_themes_home_dir, board_theme_choices, True),
-            ("piece themes", piece_themes_home_dir, piece_theme_choices, True),
-            ("annotation themes", annotation_themes_home_dir, annotation_theme_choices, False),
+        for category, kind, blank_line_after in (
+            ("board themes", BOARD_THEMES, True),
+            ("piece themes", PIECE_THEMES, True),
+            ("annotation themes", ANNOTATION_THEMES, False),
         ):
+            themes = [theme for theme in registry.themes if theme.kind == kind]
             epilog_chunks.append(
-                "%s (%d available, in alphabetic order):" % (category, len(source_list))
+                "%s (%d available, in alphabetic order):" % (category, len(themes))
             )
-            for name in sorted(source_list, key=lambda x: x.lower()):
-                license_choices = get_license_choices_of_theme(
-                    os.path.join(category_home_dir, name)
-                )
+            for theme in themes:
                 epilog_chunks.append(
-                    "  {:<42} (license: {})".format(name, " / ".join(license_choices))
+                    "  {:<42} (license: {})".format(theme.name, " / ".join(theme.license_ids))
                 )
             if blank_line_after:
                 epilog_chunks.append("")
 
-    usage = textwrap.dedent("""\
-        xiangqi-setup [OPTIONS] INPUT_FILE OUTPUT_FILE
-               xiangqi-setup --help
-               xiangqi-setup --version
-    """)
+    return "\n".join(epilog_chunks)
 
-    parser = argparse.ArgumentParser(
-        description="Generate razor-sharp Xiangqi (Chinese chess) setup graphics",
-        usage=usage,
-        epilog="\n".join(epilog_chunks),
-        formatter_class=argparse.RawTextHelpFormatter,
-    )
 
+def _add_rendering_arguments(parser):
     theme_options = parser.add_argument_group("theme selection")
     theme_options.add_argument(
         "--board",
         dest="board_theme_dir",
         metavar="THEME",
         type=_theme_name,
-        default="clean_alpha",
+        default=DEFAULT_BOARD_THEME,
         help=_format_right_help_column(
             'name of board theme to use (default: "%(default)s")'
             "; please check the list of available themes below"
@@ -168,7 +315,7 @@ def main():
         dest="piece_theme_dir",
         metavar="THEME",
         type=_theme_name,
-        default="retro_simple",
+        default=DEFAULT_PIECE_THEME,
         help=_format_right_help_column(
             'name of piece theme to use (default: "%(default)s")'
             "; please check the list of available themes below"
@@ -179,7 +326,7 @@ def main():
         dest="annotation_theme_dir",
         metavar="THEME",
         type=_theme_name,
-        default="colors_alpha",
+        default=DEFAULT_ANNOTATION_THEME,
         help=_format_right_help_column(
             'name of annotation theme to use (default: "%(default)s")'
             "; please check the list of available themes below"
@@ -196,8 +343,8 @@ def main():
         help=(
             "width of the output in pixels"
             f" (default: ~{_DEFAULT_WIDTH_PIXEL:.2f},"
-            f" i.e. {_DEFAULT_WIDTH_CM}cm"
-            f" at {_DEFAULT_RESOLUTION_DPI}dpi)"
+            f" i.e. {DEFAULT_WIDTH_CM}cm"
+            f" at {DEFAULT_RESOLUTION_DPI}dpi)"
         ),
     )
     width_options.add_argument(
@@ -205,14 +352,14 @@ def main():
         dest="width_centimeter",
         metavar="CENTIMETER",
         type=float,
-        help=(f"width of the output in centimeters (default: {_DEFAULT_WIDTH_CM})"),
+        help=(f"width of the output in centimeters (default: {DEFAULT_WIDTH_CM})"),
     )
     scaling_options.add_argument(
         "--dpi",
         dest="resolution_dpi",
         metavar="FLOAT",
         type=float,
-        default=_DEFAULT_RESOLUTION_DPI,
+        default=DEFAULT_RESOLUTION_DPI,
         help=("resolution of the output in dots per inch (default: %(default)s)"),
     )
     scaling_options.add_argument(
@@ -220,16 +367,28 @@ def main():
         dest="piece_scale",
         metavar="FACTOR",
         type=float,
-        default=0.9,
-        help=f"factor to scale pieces by ({_PIECE_SCALE_MIN:.1f} to {_PIECE_SCALE_MAX:.1f}, default: %(default)s)",
+        default=DEFAULT_PIECE_SCALE,
+        help=f"factor to scale pieces by ({PIECE_SCALE_MIN:.1f} to {PIECE_SCALE_MAX:.1f}, default: %(default)s)",
     )
     scaling_options.add_argument(
         "--scale-annotations",
         dest="annotation_scale",
         metavar="FACTOR",
         type=float,
-        default=0.9,
-        help=f"factor to scale annotations by ({_PIECE_SCALE_MIN:.1f} to {_PIECE_SCALE_MAX:.1f}, default: %(default)s)",
+        default=DEFAULT_ANNOTATION_SCALE,
+        help=f"factor to scale annotations by ({PIECE_SCALE_MIN:.1f} to {PIECE_SCALE_MAX:.1f}, default: %(default)s)",
+    )
+
+    input_options = parser.add_argument_group("input")
+    input_options.add_argument(
+        "--format",
+        dest="input_format",
+        metavar="NAME",
+        type=_type_file_format,
+        help=_format_right_help_column(
+            f"format of INPUT_FILE, one of {', '.join(sorted(FILE_FORMAT_NAMES))}"
+            " (default: detected from the content)"
+        ),
     )
 
     wxf_options = parser.add_argument_group("WXF format arguments")
@@ -247,6 +406,20 @@ def main():
             f' "{ALL_MOVES}" would play all moves,'
             ' "-1" all moves but the last, "-2" all but the last two'
             ' (default: "%(default)s")'
+            '; a comma-separated list like "10,20,30" renders one image per'
+            f" move count to OUTPUT_FILE with {PLY_PLACEHOLDER} replaced by the move count"
+        ),
+    )
+    wxf_options.add_argument(
+        "--every",
+        dest="every_nth_ply",
+        metavar="COUNT",
+        type=_type_positive_int,
+        help=_format_right_help_column(
+            "render one image after every COUNT moves"
+            ' (e.g. "2" for after every move of Black when Red started)'
+            f" to OUTPUT_FILE with {PLY_PLACEHOLDER} replaced by the move count"
+            "; the game is replayed only once for all images"
         ),
     )
     wxf_options.add_argument(
@@ -260,30 +433,549 @@ def main():
         ),
     )
 
+    output_options = parser.add_argument_group("output")
+    output_options.add_argument(
+        "--defs",
+        dest="use_defs",
+        default=False,
+        action="store_true",
+        help=_format_right_help_column(
+            "write each distinct piece and annotation graphic to <defs> once"
+            " and reference it by <use> for every placement"
+            " (for smaller output files)"
+        ),
+    )
+    output_options.add_argument(
+        "--optimize",
+        dest="optimize",
+        default=False,
+        action="store_true",
+        help=_format_right_help_column(
+            "minify SVG output: remove comments, editor metadata, unused ids"
+            " and redundant groups and round numbers to --precision digits"
+        ),
+    )
+    output_options.add_argument(
+        "--precision",
+        dest="optimize_precision",
+        metavar="DIGITS",
+        type=_type_positive_int,
+        default=DEFAULT_OPTIMIZE_PRECISION,
+        help=_format_right_help_column(
+            "number of significant digits to round coordinates, lengths"
+            " and transforms to with --optimize (default: %(default)s)"
+        ),
+    )
+
     parser.add_argument(
         "--debug", action="store_true", help="enable debugging (e.g. mark corners of the board)"
     )
 
+
+def _serve_main(argv):
+    from .memo import DEFAULT_MEMO_MAX_BYTES, RenderMemo
+    from .server import serve
+
+    parser = argparse.ArgumentParser(
+        prog="xiangqi-setup serve",
+        description=textwrap.dedent("""\
+            Render WXF/FEN/annoFEN/XAY content POSTed to /render to SVG over HTTP.
+
+            Request parameters (e.g. /render?pieces=euro_xiangqi_js&width-px=400)
+            override the options below; latency statistics are served at /stats.
+        """),
+        epilog=_create_epilog(argv),
+        formatter_class=argparse.RawTextHelpFormatter,
+    )
+
+    _add_rendering_arguments(parser)
+
+    server_options = parser.add_argument_group("server")
+    server_options.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help='address to listen on (default: "%(default)s")',
+    )
+    server_options.add_argument(
+        "--port",
+        type=int,
+        default=8080,
+        help="port to listen on (default: %(default)s)",
+    )
+    server_options.add_argument(
+        "--memo-mb",
+        dest="memo_megabytes",
+        metavar="MEGABYTES",
+        type=_type_non_negative_int,
+        default=DEFAULT_MEMO_MAX_BYTES // 1024**2,
+        help=_format_right_help_column(
+            "memory budget for re-using the output of identical requests"
+            ", 0 to disable (default: %(default)s)"
+        ),
+    )
+
+    options = parser.parse_args(argv)
+    host, port = options.host, options.port
+    memo = RenderMemo(options.memo_megabytes * 1024**2) if options.memo_megabytes else None
+    del options.host
+    del options.port
+    del options.memo_megabytes
+
+    try:
+        serve(host, port, functools.partial(_create_options, options), memo)
+    except (OSError, ValueError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+def _compile_theme_main(argv):
+    from .compose import compile_theme_bundle
+
+    parser = argparse.ArgumentParser(
+        prog="xiangqi-setup compile-theme",
+        description=textwrap.dedent(f"""\
+            Pack themes into a single file {THEME_BUNDLE_BASENAME} each
+            for faster loading; please re-run after editing a theme.
+        """),
+        formatter_class=argparse.RawTextHelpFormatter,
+    )
     parser.add_argument(
-        "input_file", metavar="INPUT_FILE", help="location of WXF/FEN/annoFEN/XAY file to render"
+        "kind",
+        metavar="KIND",
+        choices=(BOARD_THEMES, PIECE_THEMES, ANNOTATION_THEMES),
+        help=f'kind of theme, one of "{BOARD_THEMES}", "{PIECE_THEMES}" and "{ANNOTATION_THEMES}"',
     )
     parser.add_argument(
-        "output_file", metavar="OUTPUT_FILE", help="location of SVG output file to write"
+        "theme_names",
+        metavar="THEME",
+        nargs="*",
+        type=_theme_name,
+        help="name of theme to compile (default: all themes of that kind)",
     )
 
-    parser.add_argument("--version", action="version", version="%(prog)s " + VERSION_STR)
+    options = parser.parse_args(argv)
+
+    theme_names = options.theme_names or load_theme_registry().get_theme_names(options.kind)
+
+    try:
+        for theme_name in theme_names:
+            theme_dir = get_theme_dir(options.kind, theme_name)
+            if not os.path.isdir(theme_dir):
+                raise ValueError(f"No {options.kind} theme {theme_name!r} found")
+            print(f"Compiled {compile_theme_bundle(theme_dir)}")
+    except (OSError, ValueError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+
 
-    options = parser.parse_args()
+def _optimize_theme_main(argv):
+    from .raster import check_raster_support
+    from .theme_optimizer import DEFAULT_TOLERANCE_PIXELS, optimize_theme
 
-    # Turn theme names into paths
-    options.board_theme_dir = os.path.join(board_themes_home_dir, options.board_theme_dir)
-    options.piece_theme_dir = os.path.join(piece_themes_home_dir, options.piece_theme_dir)
-    options.annotation_theme_dir = os.path.join(
-        annotation_themes_home_dir, options.annotation_theme_dir
+    parser = argparse.ArgumentParser(
+        prog="xiangqi-setup optimize-theme",
+        description=textwrap.dedent("""\
+            Rewrite the SVG files of themes in place to a minimized form
+            (without editor data, with simplified paths and styles)
+            where they still rasterize to the same pixels.
+        """),
+        formatter_class=argparse.RawTextHelpFormatter,
+    )
+    parser.add_argument(
+        "kind",
+        metavar="KIND",
+        choices=(BOARD_THEMES, PIECE_THEMES, ANNOTATION_THEMES),
+        help=f'kind of theme, one of "{BOARD_THEMES}", "{PIECE_THEMES}" and "{ANNOTATION_THEMES}"',
+    )
+    parser.add_argument(
+        "theme_names",
+        metavar="THEME",
+        nargs="*",
+        type=_theme_name,
+        help="name of theme to optimize (default: all themes of that kind)",
+    )
+    parser.add_argument(
+        "--precision",
+        metavar="DIGITS",
+        type=_type_positive_int,
+        default=DEFAULT_OPTIMIZE_PRECISION,
+        help="number of significant digits to round numbers to (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--tolerance",
+        dest="tolerance_pixels",
+        metavar="PIXELS",
+        type=_type_non_negative_int,
+        default=DEFAULT_TOLERANCE_PIXELS,
+        help=_format_right_help_column(
+            "number of pixels that may differ for a file to be rewritten (default: %(default)s)"
+        ),
+    )
+    parser.add_argument(
+        "--dry-run",
+        default=False,
+        action="store_true",
+        help="only report savings, do not rewrite any files",
     )
 
-    check(options)
-    run(options)
+    options = parser.parse_args(argv)
+
+    theme_names = options.theme_names or load_theme_registry().get_theme_names(options.kind)
+
+    byte_count_before = byte_count_after = 0
+    try:
+        check_raster_support()
+        for theme_name in theme_names:
+            theme_dir = get_theme_dir(options.kind, theme_name)
+            if not os.path.isdir(theme_dir):
+                raise ValueError(f"No {options.kind} theme {theme_name!r} found")
+            for report in optimize_theme(
+                theme_dir, options.precision, options.tolerance_pixels, options.dry_run
+            ):
+                byte_count_before += report.byte_count_before
+                if report.accepted:
+                    byte_count_after += report.byte_count_after
+                    print(
+                        f"{report.filename}: {report.byte_count_before:,}"
+                        f" -> {report.byte_count_after:,} bytes"
+                        f" ({report.byte_count_after / report.byte_count_before - 1:+.1%}),"
+                        f" {report.element_count_before:,}"
+                        f" -> {report.element_count_after:,} elements"
+                    )
+                elif report.differing_pixel_count > options.tolerance_pixels:
+                    byte_count_after += report.byte_count_before
+                    print(
+                        f"{report.filename}: kept as is,"
+                        f" {report.differing_pixel_count:,} pixels would differ"
+                    )
+                else:
+                    byte_count_after += report.byte_count_before
+                    print(f"{report.filename}: kept as is, already minimal")
+    except (OSError, ValueError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if byte_count_before:
+        print(
+            f"Total: {byte_count_before:,} -> {byte_count_after:,} bytes"
+            f" ({byte_count_after / byte_count_before - 1:+.1%})"
+            + (" (dry run, nothing written)" if options.dry_run else "")
+        )
+
+
+def _export_path(directory: str, name: str) -> str:
+    relative_path = os.path.normpath(name).lstrip(os.sep)
+    if relative_path == os.pardir or relative_path.startswith(os.pardir + os.sep):
+        raise ValueError(f"Entry name {name!r} points outside of the export directory")
+    return os.path.join(directory, relative_path)
+
+
+def _catalog_main(argv):
+    from .catalog import ENTRY_FIELDS, Catalog
+
+    parser = argparse.ArgumentParser(
+        prog="xiangqi-setup catalog",
+        description=textwrap.dedent("""\
+            Query and export catalogs of diagrams rendered with --store CATALOG.
+
+            Diagrams are keyed by a digest of the position followed by
+            a digest of the rendering options (see function catalog_key
+            of module xiangqi_setup.catalog).
+        """),
+        formatter_class=argparse.RawTextHelpFormatter,
+    )
+    subparsers = parser.add_subparsers(dest="command", metavar="COMMAND", required=True)
+
+    list_parser = subparsers.add_parser(
+        "list",
+        help="list entries (name, key, source, game, line, ply and FEN) tab-separated",
+    )
+    list_parser.add_argument("catalog", metavar="CATALOG", help="location of the catalog")
+    list_parser.add_argument("--source", metavar="FILE", help="only entries rendered from FILE")
+    list_parser.add_argument(
+        "--game", metavar="INDEX", type=int, help="only entries of zero-based game INDEX"
+    )
+    list_parser.add_argument("--ply", metavar="PLY", type=int, help="only entries after PLY moves")
+    list_parser.add_argument(
+        "--fen", metavar="FEN", help="only entries with FEN piece placement FEN"
+    )
+
+    lookup_parser = subparsers.add_parser("lookup", help="write the diagram of a key")
+    lookup_parser.add_argument("catalog", metavar="CATALOG", help="location of the catalog")
+    lookup_parser.add_argument("key", metavar="KEY", help="key of the diagram")
+    lookup_parser.add_argument(
+        "output_file",
+        metavar="OUTPUT_FILE",
+        nargs="?",
+        default="-",
+        help='location to write the diagram to (default: "-" for stdout)',
+    )
+
+    export_parser = subparsers.add_parser(
+        "export", help="write the diagram of every entry to a file of the entry name"
+    )
+    export_parser.add_argument("catalog", metavar="CATALOG", help="location of the catalog")
+    export_parser.add_argument(
+        "directory", metavar="DIRECTORY", help="directory that entry names are relative to"
+    )
+
+    options = parser.parse_args(argv)
+
+    try:
+        if not os.path.exists(options.catalog):
+            raise ValueError(f"No catalog {options.catalog!r} found")
+
+        with Catalog(options.catalog) as catalog:
+            if options.command == "list":
+                criteria = {
+                    field: getattr(options, field)
+                    for field in ("source", "game", "ply", "fen")
+                    if getattr(options, field) is not None
+                }
+                for entry in catalog.iterate_entries(**criteria):
+                    print(
+                        "\t".join(
+                            "" if entry[field] is None else str(entry[field])
+                            for field in ENTRY_FIELDS
+                        )
+                    )
+            elif options.command == "lookup":
+                diagram = catalog.lookup(options.key)
+                if diagram is None:
+                    raise ValueError(f"No diagram with key {options.key!r} found")
+                _media_type, content = diagram
+                if options.output_file == "-":
+                    sys.stdout.buffer.write(content)
+                else:
+                    with open(options.output_file, "wb") as f:
+                        f.write(content)
+            else:
+                assert options.command == "export"
+                export_count = 0
+                for entry in catalog.iterate_entries():
+                    filename = _export_path(options.directory, entry["name"])
+                    _media_type, content = catalog.lookup(entry["key"])
+                    os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+                    with open(filename, "wb") as f:
+                        f.write(content)
+                    export_count += 1
+                print(f"Exported {export_count} diagram(s) to {options.directory!r}.")
+    except (OSError, ValueError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+def main():
+    if sys.argv[1:2] == ["serve"]:
+        _serve_main(sys.argv[2:])
+        return
+
+    if sys.argv[1:2] == ["compile-theme"]:
+        _compile_theme_main(sys.argv[2:])
+        return
+
+    if sys.argv[1:2] == ["optimize-theme"]:
+        _optimize_theme_main(sys.argv[2:])
+        return
+
+    if sys.argv[1:2] == ["catalog"]:
+        _catalog_main(sys.argv[2:])
+        return
+
+    usage = textwrap.dedent("""\
+        xiangqi-setup [OPTIONS] INPUT_FILE OUTPUT_FILE
+               xiangqi-setup [OPTIONS] --batch MANIFEST
+               xiangqi-setup serve [OPTIONS]
+               xiangqi-setup compile-theme KIND [THEME ...]
+               xiangqi-setup optimize-theme [OPTIONS] KIND [THEME ...]
+               xiangqi-setup catalog {list,lookup,export} CATALOG [...]
+               xiangqi-setup --help
+               xiangqi-setup --version
+    """)
+
+    parser = argparse.ArgumentParser(
+        description="Generate razor-sharp Xiangqi (Chinese chess) setup graphics",
+        usage=usage,
+        epilog=_create_epilog(sys.argv[1:]),
+        formatter_class=argparse.RawTextHelpFormatter,
+    )
+
+    _add_rendering_arguments(parser)
+
+    batch_options = parser.add_argument_group("batch processing")
+    batch_options.add_argument(
+        "--batch",
+        dest="batch_manifest",
+        metavar="MANIFEST",
+        help=_format_right_help_column(
+            "render all jobs of the given YAML manifest in a single process"
+            " rather than a single INPUT_FILE to OUTPUT_FILE"
+            "; the other options act as defaults for all jobs"
+        ),
+    )
+    batch_options.add_argument(
+        "--stream",
+        default=False,
+        action="store_true",
+        help=_format_right_help_column(
+            "render every line of INPUT_FILE (with one FEN or annoFEN position per line)"
+            f" to OUTPUT_FILE with {INDEX_PLACEHOLDER} replaced by the zero-based"
+            " number of the position; INPUT_FILE is read line by line"
+            " and lines that fail are reported and skipped"
+        ),
+    )
+    batch_options.add_argument(
+        "--archive",
+        default=False,
+        action="store_true",
+        help=_format_right_help_column(
+            "render every game of INPUT_FILE (with many WXF games concatenated)"
+            f" to OUTPUT_FILE with {INDEX_PLACEHOLDER} replaced by the zero-based"
+            " number of the game; options --moves and --every apply to every game"
+            "; games that fail are reported and skipped"
+        ),
+    )
+    batch_options.add_argument(
+        "--dedupe",
+        metavar="MODE",
+        choices=DEDUPE_MODES,
+        help=_format_right_help_column(
+            "with --stream, --archive, --every or several move counts for --moves"
+            ': render every distinct position only once and hard-link (MODE "link")'
+            ' or copy (MODE "copy") its output file for duplicates'
+            "; reports how much rendering was saved"
+        ),
+    )
+    batch_options.add_argument(
+        "--store",
+        metavar="CATALOG",
+        help=_format_right_help_column(
+            "write rendered diagrams to SQLite database CATALOG"
+            " rather than to files, with OUTPUT_FILE as the name of each entry"
+            "; diagrams are keyed by position and options and rendered only once"
+            ' (see "xiangqi-setup catalog --help")'
+        ),
+    )
+    batch_options.add_argument(
+        "--jobs",
+        dest="process_count",
+        metavar="COUNT",
+        type=_type_positive_int,
+        help=_format_right_help_column(
+            "number of processes to render batch jobs with (default: number of CPU cores)"
+        ),
+    )
+    batch_options.add_argument(
+        "--chunk-size",
+        dest="chunk_size",
+        metavar="COUNT",
+        type=_type_positive_int,
+        help=_format_right_help_column(
+            "number of batch jobs to hand to a process at a time"
+            " (default: picked based on job and process count)"
+        ),
+    )
+
+    timing_options = parser.add_argument_group("performance analysis")
+    timing_options.add_argument(
+        "--timings",
+        default=False,
+        action="store_true",
+        help=_format_right_help_column(
+            "report wall and CPU time spent per phase of rendering"
+            " and counts of atoms, SVG files parsed, bytes read"
+            " and written and output elements to stderr"
+        ),
+    )
+    timing_options.add_argument(
+        "--timings-json",
+        dest="timings_json_file",
+        metavar="FILE",
+        help=_format_right_help_column(
+            'write the same report as --timings as JSON to FILE ("-" for stdout)'
+        ),
+    )
+
+    parser.add_argument(
+        "input_file",
+        metavar="INPUT_FILE",
+        nargs="?",
+        help="location of WXF/FEN/annoFEN/XAY file to render",
+    )
+    parser.add_argument(
+        "output_file",
+        metavar="OUTPUT_FILE",
+        nargs="?",
+        help="location of SVG (or PNG/WebP) output file to write",
+    )
+
+    parser.add_argument("--version", action="version", version="%(prog)s " + VERSION_STR)
+
+    options = parser.parse_intermixed_args()
+
+    if options.batch_manifest is not None:
+        if options.input_file is not None:
+            parser.error("arguments INPUT_FILE and OUTPUT_FILE cannot be combined with --batch")
+        if options.timings or options.timings_json_file is not None:
+            parser.error("arguments --timings and --timings-json cannot be combined with --batch")
+        if options.stream or options.archive:
+            parser.error("arguments --stream and --archive cannot be combined with --batch")
+        if options.dedupe is not None:
+            parser.error("argument --dedupe cannot be combined with --batch")
+        if options.store is not None:
+            parser.error("argument --store cannot be combined with --batch")
+
+        import yaml
+
+        from .batch import read_batch_manifest, run_batch
+
+        try:
+            items = read_batch_manifest(options.batch_manifest)
+        except (OSError, ValueError, yaml.YAMLError) as e:
+            print(f"ERROR: {e}", file=sys.stderr)
+            sys.exit(1)
+
+        if options.process_count is None:
+            options.process_count = os.cpu_count() or 1
+
+        sys.exit(
+            run_batch(
+                items,
+                functools.partial(_create_batch_item_options, options),
+                options.process_count,
+                options.chunk_size,
+            )
+        )
+
+    if options.process_count is not None or options.chunk_size is not None:
+        parser.error("arguments --jobs and --chunk-size require --batch")
+
+    if options.output_file is None:
+        parser.error("the following arguments are required: INPUT_FILE, OUTPUT_FILE")
+
+    if options.timings or options.timings_json_file is not None:
+        timings = start_recording_timings()
+    else:
+        timings = None
+
+    _turn_theme_names_into_paths(options)
+
+    try:
+        check(options)
+    except ValueError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    failure_count = run(options)
+
+    if timings is not None:
+        stop_recording_timings()
+        _report_timings(timings, options)
+
+    if failure_count:
+        unit = "game(s)" if options.archive else "position(s)"
+        print(f"ERROR: {failure_count} {unit} failed to render.", file=sys.stderr)
+        sys.exit(1)
 
 
 if __name__ == "__main__":
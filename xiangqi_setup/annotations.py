@@ -65,10 +65,69 @@ ANNOTATION_NAME_OF_ATOM_CODE = {
 
 
 class PutAnnotation:
-    def __init__(self, annotation_name: str, x: float, y: float):
-        self.annotation_name = annotation_name
-        self.x = x
-        self.y = y
+    """
+    Immutable and hashable annotation atom.  Annotations on the board are
+    interned, i.e. all equal annotations on the same field are the very same
+    instance.
+    """
+
+    __slots__ = ("annotation_name", "x", "y")
+
+    def __new__(cls, annotation_name: str, x: float, y: float):
+        return _INTERNED_PUT_ANNOTATION_OF_KEY.get((annotation_name, x, y)) or cls._create(
+            annotation_name, x, y
+        )
+
+    @classmethod
+    def _create(cls, annotation_name: str, x: float, y: float):
+        self = object.__new__(cls)
+        object.__setattr__(self, "annotation_name", annotation_name)
+        object.__setattr__(self, "x", x)
+        object.__setattr__(self, "y", y)
+
+        # NOTE: Interning is limited to known annotations on whole fields
+        #       so that memory stays bounded
+        if (
+            type(x) is int
+            and type(y) is int
+            and 0 <= x < 9
+            and 0 <= y < 10
+            and annotation_name in _ANNOTATION_NAMES
+        ):
+            _INTERNED_PUT_ANNOTATION_OF_KEY[(annotation_name, x, y)] = self
+
+        return self
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __reduce__(self):
+        return (PutAnnotation, (self.annotation_name, self.x, self.y))
+
+    def __repr__(self):
+        return (
+            f"PutAnnotation(annotation_name={self.annotation_name!r}, x={self.x!r}, y={self.y!r})"
+        )
+
+    def __eq__(self, other):
+        return other is self or (
+            isinstance(other, PutAnnotation)
+            and other.annotation_name == self.annotation_name
+            and other.x == self.x
+            and other.y == self.y
+        )
+
+    def __hash__(self):
+        return hash((self.annotation_name, self.x, self.y))
+
+
+_ANNOTATION_NAMES = frozenset(ANNOTATION_NAME_OF_ATOM_CODE.values())
+
+# Maps tuples (annotation name, x, y) to interned PutAnnotation instances
+_INTERNED_PUT_ANNOTATION_OF_KEY = {}
 
 
 class InvalidAnnotationCode(ValueError):
@@ -0,0 +1,146 @@
+# Copyright (C) 2026 Sebastian Pipping <sebastian@pipping.org>
+# Licensed under GNU Affero General Public License version 3.0 or later
+
+"""
+Library interface for rendering Xiangqi setups to SVG in memory,
+without temporary files or subprocesses, e.g.:
+
+    >>> from xiangqi_setup.api import render_svg
+    >>> svg_bytes = render_svg("v1 rnbakabnr/9/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/9/RNBAKABNR")
+
+Please mind that the licenses of the themes used apply to the rendered images.
+"""
+
+import argparse
+from typing import TYPE_CHECKING
+
+from .themes import ANNOTATION_THEMES, BOARD_THEMES, PIECE_THEMES, get_theme_dir
+from .units import cm_to_pixel
+
+if TYPE_CHECKING:
+    from .memo import RenderMemo
+    from .theme_registry import ThemeInfo
+
+DEFAULT_BOARD_THEME = "clean_alpha"
+DEFAULT_PIECE_THEME = "retro_simple"
+DEFAULT_ANNOTATION_THEME = "colors_alpha"
+
+DEFAULT_WIDTH_CM = 7.0
+DEFAULT_RESOLUTION_DPI = 90.0
+
+DEFAULT_PIECE_SCALE = 0.9
+DEFAULT_ANNOTATION_SCALE = 0.9
+PIECE_SCALE_MIN = 0.0
+PIECE_SCALE_MAX = 1.2
+
+DEFAULT_OPTIMIZE_PRECISION = 10
+
+PLY_PLACEHOLDER = "{ply}"
+INDEX_PLACEHOLDER = "{index}"
+
+DEDUPE_LINK = "link"
+DEDUPE_COPY = "copy"
+DEDUPE_MODES = (DEDUPE_LINK, DEDUPE_COPY)
+
+
+def check_scaling(options):
+    if PIECE_SCALE_MIN < options.piece_scale <= PIECE_SCALE_MAX:
+        pass
+    else:
+        raise ValueError(
+            "Piece scale must be larger than %.1f and greater or equal %.1f ."
+            % (PIECE_SCALE_MIN, PIECE_SCALE_MAX)
+        )
+
+    if options.width_centimeter is not None:
+        options.width_pixel = cm_to_pixel(options.width_centimeter, options.resolution_dpi)
+    delattr(options, "width_centimeter")
+    if options.width_pixel is None:
+        options.width_pixel = cm_to_pixel(DEFAULT_WIDTH_CM, options.resolution_dpi)
+
+
+def render_svg(
+    position,
+    *,
+    board: str = DEFAULT_BOARD_THEME,
+    pieces: str = DEFAULT_PIECE_THEME,
+    annotations: str = DEFAULT_ANNOTATION_THEME,
+    width_px: float | None = None,
+    width_cm: float | None = None,
+    dpi: float = DEFAULT_RESOLUTION_DPI,
+    piece_scale: float = DEFAULT_PIECE_SCALE,
+    annotation_scale: float = DEFAULT_ANNOTATION_SCALE,
+    moves: str = "0",
+    annotate_last_move: bool = False,
+    input_format: str | None = None,
+    use_defs: bool = False,
+    optimize: bool = False,
+    precision: int = DEFAULT_OPTIMIZE_PRECISION,
+    debug: bool = False,
+    output=None,
+    memo: "RenderMemo | None" = None,
+) -> bytes:
+    """
+    Renders a position to SVG and returns the SVG document as bytes.
+
+    The position is either the content of a WXF, FEN, annoFEN or XAY file
+    as a string or an iterable of atoms (PutPiece and PutAnnotation instances).
+    Themes are given by name (see ``xiangqi-setup --help`` for a list),
+    the remaining keyword arguments match the command line options
+    of the same name; width_px and width_cm are mutually exclusive
+    and moves and annotate_last_move only apply to WXF content.
+    The format of the content is detected unless given as input_format
+    ("annofen", "fen", "wxf" or "xay").
+
+    If output is given, the SVG document is also written to that
+    binary file-like object.  If memo is given, identical renders
+    are served from (and added to) that RenderMemo instance.
+    """
+    # NOTE: These are imported only when needed, for faster startup
+    from .file_formats import iterate_tokens_of_content
+    from .memo import compose_svg_bytes
+
+    if width_px is not None and width_cm is not None:
+        raise ValueError("Arguments width_px and width_cm are mutually exclusive.")
+
+    options = argparse.Namespace(
+        board_theme_dir=get_theme_dir(BOARD_THEMES, board),
+        piece_theme_dir=get_theme_dir(PIECE_THEMES, pieces),
+        annotation_theme_dir=get_theme_dir(ANNOTATION_THEMES, annotations),
+        width_pixel=width_px,
+        width_centimeter=width_cm,
+        resolution_dpi=dpi,
+        piece_scale=piece_scale,
+        annotation_scale=annotation_scale,
+        use_defs=use_defs,
+        optimize=optimize,
+        optimize_precision=precision,
+        debug=debug,
+    )
+    check_scaling(options)
+
+    if isinstance(position, str):
+        atoms_to_put = list(
+            iterate_tokens_of_content(position, moves, annotate_last_move, input_format)
+        )
+    else:
+        atoms_to_put = list(position)
+
+    svg_bytes = compose_svg_bytes(atoms_to_put, options, memo)
+    if output is not None:
+        output.write(svg_bytes)
+    return svg_bytes
+
+
+def list_themes(kind: str | None = None) -> "list[ThemeInfo]":
+    """
+    Returns details on all themes that come with xiangqi-setup
+    (name, kind, license ids, authors, files and board geometry),
+    optionally only those of the given kind ("board", "pieces" or "annotations").
+    """
+    from .theme_registry import THEME_KINDS, load_theme_registry
+
+    if kind is not None and kind not in THEME_KINDS:
+        raise ValueError(f"Unknown theme kind {kind!r}, expected one of {THEME_KINDS!r}.")
+
+    return [theme for theme in load_theme_registry().themes if kind is None or theme.kind == kind]
@@ -0,0 +1,441 @@
+# Copyright (C) 2026 Sebastian Pipping <sebastian@pipping.org>
+# Licensed under GNU Affero General Public License version 3.0 or later
+
+import argparse
+import io
+import multiprocessing
+import os
+import shutil
+import sys
+from contextlib import redirect_stderr, redirect_stdout
+
+import yaml
+
+from .api import DEDUPE_LINK
+from .catalog import MEDIA_TYPE_OF_EXTENSION, Catalog, catalog_key, format_fen_or_none
+from .compose import compose_svg, compose_svg_document, preload_themes
+from .file_formats import (
+    detect_file_format,
+    iterate_position_lines,
+    iterate_tokens_of_line,
+    read_atoms_from_file,
+    read_input_file,
+)
+from .file_formats.wxf import iterate_wxf_hashed_positions
+from .file_formats.wxf_archive import iterate_wxf_archive_games
+from .license import inform_license
+from .positions import canonical_position
+from .raster import compose_raster, compose_raster_file, is_raster_filename
+from .timings import count, timed
+from .zobrist import zobrist_hash
+
+_MANIFEST_FORMAT_VERSION = "1"
+
+
+class BatchItem:
+    def __init__(self, input_file: str, output_file: str, overrides: dict):
+        self.input_file = input_file
+        self.output_file = output_file
+        self.overrides = overrides
+
+
+def read_batch_manifest(filename: str) -> list[BatchItem]:
+    with open(filename) as f:
+        document = yaml.safe_load(f)
+
+    if not isinstance(document, dict) or not isinstance(document.get("jobs"), list):
+        raise ValueError(f"Malformed batch manifest {filename!r}")
+
+    manifest_format_version = document.get("version")
+    if manifest_format_version != _MANIFEST_FORMAT_VERSION:
+        raise ValueError(f"Unsupported batch manifest format version {manifest_format_version!r}")
+
+    # Relative paths are relative to the manifest, not to the working directory
+    base_dir = os.path.dirname(filename)
+
+    items = []
+    for i, job in enumerate(document["jobs"]):
+        if (
+            not isinstance(job, dict)
+            or not isinstance(job.get("input"), str)
+            or not isinstance(job.get("output"), str)
+        ):
+            raise ValueError(f"Malformed job #{i + 1} in batch manifest {filename!r}")
+        overrides = dict(job)
+        input_file = os.path.join(base_dir, overrides.pop("input"))
+        output_file = os.path.join(base_dir, overrides.pop("output"))
+        items.append(BatchItem(input_file, output_file, overrides))
+
+    return items
+
+
+def _compose_file(atoms_to_put, options):
+    if is_raster_filename(options.output_file):
+        compose_raster_file(atoms_to_put, options)
+    else:
+        compose_svg(atoms_to_put, options)
+
+
+def _link_or_copy(source: str, destination: str, mode: str):
+    if os.path.lexists(destination):
+        os.remove(destination)
+    if mode == DEDUPE_LINK:
+        try:
+            os.link(source, destination)
+            return
+        except OSError:  # e.g. across file systems or on file systems without hard links
+            pass
+    shutil.copyfile(source, destination)
+
+
+class _Deduplicator:
+    """
+    Remembers the output file of every distinct position rendered so far
+    so that the output files of duplicates can be hard-linked (or copied)
+    rather than rendered again.  Positions are looked up by Zobrist hash
+    and then compared atom by atom, since the hash alone cannot tell apart
+    e.g. positions with the same atom put twice;  options other than
+    the output file must not differ between positions.
+    """
+
+    def __init__(self, mode: str):
+        self._mode = mode
+        # Maps keys to lists of pairs (atoms, output file) of distinct positions
+        self._originals_of_key = {}
+        self._distinct_count = 0
+        self.duplicate_count = 0
+
+    @staticmethod
+    def _key_of(position_hash: int, output_file: str) -> tuple:
+        # NOTE: The file extension picks the output format, e.g. SVG or PNG
+        return position_hash, os.path.splitext(output_file)[1].lower()
+
+    def _find_original_file(self, atoms_to_put, position_hash: int, output_file: str):
+        originals = self._originals_of_key.get(self._key_of(position_hash, output_file))
+        if not originals:
+            return None
+        position = canonical_position(atoms_to_put)
+        for original_atoms, original_file in originals:
+            if canonical_position(original_atoms) == position:
+                return original_file
+        return None
+
+    def reuse(self, atoms_to_put, position_hash: int, output_file: str) -> bool:
+        original_file = self._find_original_file(atoms_to_put, position_hash, output_file)
+        if original_file is None or os.path.abspath(original_file) == os.path.abspath(output_file):
+            return False
+
+        with timed("write_output"):
+            _link_or_copy(original_file, output_file, self._mode)
+        count("duplicate_positions")
+        self.duplicate_count += 1
+        return True
+
+    def prepare(self, output_file: str):
+        # NOTE: Rendering must not write through a hard link left by an earlier run
+        if self._mode == DEDUPE_LINK and os.path.lexists(output_file):
+            os.remove(output_file)
+
+    def remember(self, atoms_to_put, position_hash: int, output_file: str):
+        if self._find_original_file(atoms_to_put, position_hash, output_file) is not None:
+            return
+        key = self._key_of(position_hash, output_file)
+        self._originals_of_key.setdefault(key, []).append((tuple(atoms_to_put), output_file))
+        self._distinct_count += 1
+
+    def report(self):
+        distinct_count = self._distinct_count
+        position_count = distinct_count + self.duplicate_count
+        if not position_count:
+            return
+        verb = "hard-linked" if self._mode == DEDUPE_LINK else "copied"
+        print(
+            f"Rendered {distinct_count} distinct of {position_count} position(s)"
+            f", {self.duplicate_count} duplicate(s) {verb} rather than rendered"
+            f" ({100 * self.duplicate_count / position_count:.0f}% of rendering saved)."
+        )
+
+
+def _compose_bytes(atoms_to_put, options) -> bytes:
+    if is_raster_filename(options.output_file):
+        image_format = os.path.splitext(options.output_file)[1].lower()
+        return compose_raster(atoms_to_put, options, image_format)
+    return compose_svg_document(atoms_to_put, options)
+
+
+class _PositionWriter:
+    """
+    Writes rendered positions to their output files (with option --dedupe
+    hard-linking or copying the output files of duplicates) or, with option
+    --store, to a catalog where duplicates are not rendered again either.
+    """
+
+    def __init__(self, options):
+        mode = getattr(options, "dedupe", None)
+        self._deduplicator = None if mode is None else _Deduplicator(mode)
+        store = getattr(options, "store", None)
+        self._catalog = None if store is None else Catalog(store)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write(self, atoms_to_put, position_hash: int, options, **metadata):
+        if self._catalog is not None:
+            self._store(atoms_to_put, options, **metadata)
+            return
+
+        if self._deduplicator is None:
+            _compose_file(atoms_to_put, options)
+            return
+
+        if self._deduplicator.reuse(atoms_to_put, position_hash, options.output_file):
+            return
+
+        self._deduplicator.prepare(options.output_file)
+        _compose_file(atoms_to_put, options)
+        self._deduplicator.remember(atoms_to_put, position_hash, options.output_file)
+
+    def _store(self, atoms_to_put, options, **metadata):
+        with timed("write_output"):
+            key = catalog_key(atoms_to_put, options)
+            is_duplicate = self._catalog.contains(key)
+
+        if is_duplicate:
+            content = None
+            count("duplicate_positions")
+        else:
+            content = _compose_bytes(atoms_to_put, options)
+
+        with timed("write_output"):
+            extension = os.path.splitext(options.output_file)[1].lower()
+            self._catalog.add(
+                options.output_file,
+                key,
+                MEDIA_TYPE_OF_EXTENSION.get(extension, MEDIA_TYPE_OF_EXTENSION[".svg"]),
+                content,
+                source=options.input_file,
+                fen=format_fen_or_none(atoms_to_put),
+                **metadata,
+            )
+
+    def close(self):
+        if self._deduplicator is not None:
+            self._deduplicator.report()
+
+        if self._catalog is not None:
+            self._catalog.close()
+            print(
+                f"Stored {self._catalog.added_entry_count} position(s)"
+                f" with {self._catalog.added_diagram_count} newly rendered diagram(s)"
+                f" in catalog {self._catalog.filename!r}."
+            )
+
+
+def renders_multiple_plies(options) -> bool:
+    return options.every_nth_ply is not None or "," in options.moves_to_play
+
+
+def _render_plies(options):
+    content = read_input_file(options.input_file)
+
+    if options.input_format is None:
+        is_wxf = detect_file_format(content).name == "wxf"
+    else:
+        is_wxf = options.input_format == "wxf"
+    if not is_wxf:
+        raise ValueError("Rendering more than one position is only supported for WXF input")
+
+    with _PositionWriter(options) as writer:
+        _render_positions(
+            iterate_wxf_hashed_positions(
+                content, options.moves_to_play, options.annotate_last_move, options.every_nth_ply
+            ),
+            options,
+            writer,
+        )
+
+
+def _render_positions(hashed_positions, options, writer, game: int | None = None):
+    for ply, position_hash, atoms_to_put in hashed_positions:
+        count("atoms", len(atoms_to_put))
+
+        ply_options = argparse.Namespace(**vars(options))
+        if game is None:
+            ply_options.output_file = options.output_file.format(ply=ply)
+        else:
+            ply_options.output_file = options.output_file.format(ply=ply, index=game)
+        writer.write(atoms_to_put, position_hash, ply_options, game=game, ply=ply)
+
+
+def render_stream(options) -> int:
+    """
+    Renders every position of an input file with one FEN or annoFEN position
+    per line to the output filename with placeholder {index} replaced by the
+    zero-based number of the position.  Positions that fail are reported
+    and skipped;  returns the number of positions that failed.
+    """
+    # NOTE: The input is read line by line and nothing is kept per position
+    #       so that memory use does not grow with the number of positions.
+    failure_count = 0
+    with _PositionWriter(options) as writer, open(options.input_file) as f:
+        for index, line_number, line in iterate_position_lines(f):
+            try:
+                with timed("parse_input"):
+                    atoms_to_put = list(iterate_tokens_of_line(line, options.input_format))
+                count("atoms", len(atoms_to_put))
+
+                position_options = argparse.Namespace(**vars(options))
+                position_options.output_file = options.output_file.format(index=index)
+                writer.write(
+                    atoms_to_put, zobrist_hash(atoms_to_put), position_options, line=line_number
+                )
+            except Exception as e:
+                print(f"ERROR: {options.input_file}:{line_number}: {e}", file=sys.stderr)
+                failure_count += 1
+    return failure_count
+
+
+def render_archive(options) -> int:
+    """
+    Renders every game of a WXF archive (i.e. a file of concatenated WXF games)
+    to the output filename with placeholder {index} replaced by the zero-based
+    number of the game (and {ply} by the move count, for more than one position
+    per game).  Games that fail are reported and skipped;  returns the number
+    of games that failed.
+    """
+    failure_count = 0
+    with _PositionWriter(options) as writer:
+        for game in iterate_wxf_archive_games(options.input_file):
+            try:
+                _render_positions(
+                    game.iterate_hashed_positions(
+                        options.moves_to_play, options.annotate_last_move, options.every_nth_ply
+                    ),
+                    options,
+                    writer,
+                    game=game.index,
+                )
+            except Exception as e:
+                print(
+                    f"ERROR: {options.input_file}: game #{game.index}"
+                    f" (at byte offset {game.offset}): {e}",
+                    file=sys.stderr,
+                )
+                failure_count += 1
+    return failure_count
+
+
+def render(options):
+    if renders_multiple_plies(options):
+        _render_plies(options)
+        return
+
+    atoms_to_put = read_atoms_from_file(
+        options.input_file, options.moves_to_play, options.annotate_last_move, options.input_format
+    )
+    if getattr(options, "store", None) is None:
+        _compose_file(atoms_to_put, options)
+        return
+
+    with _PositionWriter(options) as writer:
+        writer.write(atoms_to_put, zobrist_hash(atoms_to_put), options)
+
+
+def _theme_dirs_of(options) -> tuple[str, str, str]:
+    return options.board_theme_dir, options.piece_theme_dir, options.annotation_theme_dir
+
+
+def _preload_all_themes(theme_dirs_list):
+    for theme_dirs in theme_dirs_list:
+        try:
+            preload_themes(*theme_dirs)
+        except Exception:
+            pass  # i.e. leave error reporting to the jobs using these themes
+
+
+def _render_capturing_output(options) -> tuple[str, str, str | None]:
+    # NOTE: Output is captured so that the output of jobs
+    #       rendered in parallel does not get interleaved.
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+    error = None
+    with redirect_stdout(stdout), redirect_stderr(stderr):
+        try:
+            render(options)
+        except Exception as e:
+            error = str(e)
+    return stdout.getvalue(), stderr.getvalue(), error
+
+
+def _default_chunk_size(job_count: int, process_count: int) -> int:
+    # Same heuristic as multiprocessing.Pool.map
+    chunk_size, remainder = divmod(job_count, process_count * 4)
+    return chunk_size + 1 if remainder else max(chunk_size, 1)
+
+
+def _iterate_results(options_list, process_count: int, chunk_size: int | None):
+    if process_count == 1:
+        yield from map(_render_capturing_output, options_list)
+        return
+
+    theme_dirs_list = sorted(set(_theme_dirs_of(options) for options in options_list))
+    if chunk_size is None:
+        chunk_size = _default_chunk_size(len(options_list), process_count)
+
+    with multiprocessing.Pool(
+        processes=process_count, initializer=_preload_all_themes, initargs=(theme_dirs_list,)
+    ) as pool:
+        # NOTE: Pool.imap (unlike Pool.imap_unordered) keeps results in order
+        yield from pool.imap(_render_capturing_output, options_list, chunksize=chunk_size)
+
+
+def run_batch(
+    items: list[BatchItem], create_item_options, process_count: int, chunk_size: int | None
+) -> int:
+    options_of_item_index = {}
+    error_of_item_index = {}
+    for i, item in enumerate(items):
+        try:
+            options_of_item_index[i] = create_item_options(item)
+        except Exception as e:
+            error_of_item_index[i] = str(e)
+
+    theme_dirs_used = []
+    failure_count = 0
+    results = _iterate_results(list(options_of_item_index.values()), process_count, chunk_size)
+
+    for i, item in enumerate(items):
+        if i in error_of_item_index:
+            stdout, stderr, error = "", "", error_of_item_index[i]
+        else:
+            stdout, stderr, error = next(results)
+
+        print(f"[{i + 1}/{len(items)}] {item.input_file} -> {item.output_file}")
+        print(stdout, end="")
+        print(stderr, end="", file=sys.stderr)
+
+        if error is not None:
+            print(f"ERROR: Failed to render {item.input_file!r}: {error}", file=sys.stderr)
+            failure_count += 1
+            continue
+
+        theme_dirs = _theme_dirs_of(options_of_item_index[i])
+        if theme_dirs not in theme_dirs_used:
+            theme_dirs_used.append(theme_dirs)
+
+    print()
+    print(
+        f"Rendered {len(items) - failure_count} of {len(items)} diagram(s)"
+        f", {failure_count} failed."
+    )
+    print()
+
+    for i, theme_dirs in enumerate(theme_dirs_used):
+        if i > 0:
+            print()
+        inform_license(*theme_dirs)
+
+    return 1 if failure_count else 0
@@ -0,0 +1,239 @@
+# Copyright (C) 2026 Sebastian Pipping <sebastian@pipping.org>
+# Licensed under GNU Affero General Public License version 3.0 or later
+
+"""
+Catalogs of rendered diagrams in a single SQLite database file, as an
+alternative to writing one file per diagram.  Every diagram is stored once
+per key, i.e. per position and rendering options, so that services can
+fetch a pre-rendered diagram with a single indexed read, e.g.:
+
+    >>> from xiangqi_setup.catalog import Catalog
+    >>> with Catalog("catalog.sqlite") as catalog:
+    ...     media_type, content = catalog.lookup(key)
+
+Every named entry (i.e. output filename) refers to a diagram by key
+and carries metadata: the source file, game number, line number, ply
+and FEN of the position.
+"""
+
+import hashlib
+import os
+import sqlite3
+
+from .file_formats.fen import format_fen_field_state
+from .positions import canonical_position
+from .timings import count, timed
+
+# NOTE: Version 2 changed how keys are derived
+_SCHEMA_VERSION = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS diagrams (
+    key TEXT PRIMARY KEY,
+    media_type TEXT NOT NULL,
+    content BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entries (
+    name TEXT PRIMARY KEY,
+    key TEXT NOT NULL REFERENCES diagrams (key),
+    source TEXT,
+    game INTEGER,
+    line INTEGER,
+    ply INTEGER,
+    fen TEXT
+);
+CREATE INDEX IF NOT EXISTS entries_by_key ON entries (key);
+CREATE INDEX IF NOT EXISTS entries_by_fen ON entries (fen);
+CREATE INDEX IF NOT EXISTS entries_by_source ON entries (source, game, ply);
+"""
+
+ENTRY_FIELDS = ("name", "key", "source", "game", "line", "ply", "fen")
+
+# Pending rows are written in a single transaction once there are this many
+# or once the pending diagrams take this many bytes
+_DEFAULT_BATCH_SIZE = 1000
+_MAX_PENDING_BYTES = 16 * 1024**2
+
+MEDIA_TYPE_OF_EXTENSION = {
+    ".png": "image/png",
+    ".svg": "image/svg+xml",
+    ".webp": "image/webp",
+}
+
+# Options that affect the rendered output, in canonical order;
+# themes are identified by name rather than by location
+_KEY_OPTION_NAMES = (
+    "width_pixel",
+    "resolution_dpi",
+    "piece_scale",
+    "annotation_scale",
+    "use_defs",
+    "optimize",
+    "optimize_precision",
+    "debug",
+)
+
+_POSITION_DIGEST_CHARS = 32
+_OPTIONS_DIGEST_CHARS = 16
+
+
+def catalog_key(atoms_to_put, options) -> str:
+    """
+    Returns the key of the diagram of the given atoms rendered with the given
+    options (including the format of options.output_file), i.e. a digest of
+    the canonical position followed by a digest of the options, in hex.
+    """
+    # NOTE: Zobrist hashes are no substitute here since the keys
+    #       of an atom put twice on the same spot cancel out
+    position = canonical_position(atoms_to_put)
+    position_digest = hashlib.sha256(repr(position).encode()).hexdigest()[:_POSITION_DIGEST_CHARS]
+    values = (
+        os.path.basename(os.path.normpath(options.board_theme_dir)),
+        os.path.basename(os.path.normpath(options.piece_theme_dir)),
+        os.path.basename(os.path.normpath(options.annotation_theme_dir)),
+        os.path.splitext(options.output_file)[1].lower(),
+        *(getattr(options, name) for name in _KEY_OPTION_NAMES),
+    )
+    options_digest = hashlib.sha256(repr(values).encode()).hexdigest()[:_OPTIONS_DIGEST_CHARS]
+    return f"{position_digest}-{options_digest}"
+
+
+def format_fen_or_none(atoms_to_put) -> str | None:
+    try:
+        return format_fen_field_state(atoms_to_put)
+    except ValueError:  # e.g. for stacked pieces
+        return None
+
+
+class Catalog:
+    """
+    SQLite catalog of rendered diagrams;  entries added are written
+    in bulk, i.e. batch_size at a time (or fewer for large diagrams)
+    in a single transaction each, and when the catalog is flushed or closed.
+    """
+
+    def __init__(self, filename: str, batch_size: int = _DEFAULT_BATCH_SIZE):
+        self.filename = filename
+        self._batch_size = batch_size
+        self._pending_diagrams = {}  # maps keys to pairs of (media type, content)
+        self._pending_entries = []
+        self._pending_byte_count = 0
+        self.added_diagram_count = 0
+        self.added_entry_count = 0
+
+        self._connection = sqlite3.connect(filename)
+        try:
+            self._connection.execute("PRAGMA journal_mode = WAL")
+            self._connection.execute("PRAGMA synchronous = NORMAL")
+            (schema_version,) = self._connection.execute("PRAGMA user_version").fetchone()
+            if schema_version not in (0, _SCHEMA_VERSION):  # i.e. new or current
+                raise ValueError(
+                    f"Unsupported catalog schema version {schema_version} in {filename!r}"
+                )
+            with self._connection:
+                self._connection.executescript(_SCHEMA)
+                self._connection.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+        except (sqlite3.DatabaseError, ValueError) as e:
+            self._connection.close()
+            raise ValueError(f"Cannot open catalog {filename!r}: {e}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def contains(self, key: str) -> bool:
+        if key in self._pending_diagrams:
+            return True
+        cursor = self._connection.execute("SELECT 1 FROM diagrams WHERE key = ?", (key,))
+        return cursor.fetchone() is not None
+
+    def lookup(self, key: str) -> tuple[str, bytes] | None:
+        """
+        Returns a pair of (media type, content) of the diagram with the given key
+        """
+        pending = self._pending_diagrams.get(key)
+        if pending is not None:
+            return pending
+        return self._connection.execute(
+            "SELECT media_type, content FROM diagrams WHERE key = ?", (key,)
+        ).fetchone()
+
+    def add(
+        self,
+        name: str,
+        key: str,
+        media_type: str,
+        content: bytes | None,
+        source: str | None = None,
+        game: int | None = None,
+        line: int | None = None,
+        ply: int | None = None,
+        fen: str | None = None,
+    ):
+        """
+        Adds an entry referring to the diagram of the given key,
+        with content None for a diagram that the catalog already contains.
+        An earlier entry of the same name is replaced.
+        """
+        if content is not None and key not in self._pending_diagrams:
+            self._pending_diagrams[key] = (media_type, content)
+            self._pending_byte_count += len(content)
+        self._pending_entries.append((name, key, source, game, line, ply, fen))
+
+        if (
+            len(self._pending_entries) >= self._batch_size
+            or self._pending_byte_count >= _MAX_PENDING_BYTES
+        ):
+            self.flush()
+
+    def flush(self):
+        if not self._pending_entries and not self._pending_diagrams:
+            return
+
+        with timed("write_output"), self._connection:
+            cursor = self._connection.executemany(
+                "INSERT OR IGNORE INTO diagrams (key, media_type, content) VALUES (?, ?, ?)",
+                (
+                    (key, media_type, content)
+                    for key, (media_type, content) in self._pending_diagrams.items()
+                ),
+            )
+            self.added_diagram_count += cursor.rowcount
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO entries (name, key, source, game, line, ply, fen)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                self._pending_entries,
+            )
+            self.added_entry_count += len(self._pending_entries)
+
+        count("output_bytes", self._pending_byte_count)
+        self._pending_diagrams.clear()
+        self._pending_entries.clear()
+        self._pending_byte_count = 0
+
+    def iterate_entries(self, **criteria):
+        """
+        Yields a dict per entry (with keys as in ENTRY_FIELDS) in order of name,
+        optionally only those with fields of the given values, e.g. fen="..."
+        """
+        for field in criteria:
+            if field not in ENTRY_FIELDS:
+                raise ValueError(f"Unknown catalog entry field {field!r}")
+        self.flush()
+        where = " AND ".join(f"{field} = ?" for field in criteria)
+        cursor = self._connection.execute(
+            f"SELECT {', '.join(ENTRY_FIELDS)} FROM entries"
+            + (f" WHERE {where}" if where else "")
+            + " ORDER BY name",
+            tuple(criteria.values()),
+        )
+        for row in cursor:
+            yield dict(zip(ENTRY_FIELDS, row))
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self._connection.close()
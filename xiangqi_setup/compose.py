@@ -1,16 +1,27 @@
 # Copyright (C) 2014 Sebastian Pipping <sebastian@pipping.org>
 # Licensed under GNU Affero General Public License version 3.0 or later
 
-import configparser
 import errno
+import functools
+import json
 import os
 from collections import defaultdict
+from copy import deepcopy
 
 import yaml
 
 try:
+    from lxml import etree
     from svgutils.compose import Unit
-    from svgutils.transform import SVGFigure, fromfile
+    from svgutils.transform import (
+        SVG,
+        XLINK,
+        FigureElement,
+        GroupElement,
+        SVGFigure,
+        fromfile,
+        fromstring,
+    )
 except ImportError:
     import sys
 
@@ -23,21 +34,32 @@ except ImportError:
     sys.exit(1)
 
 from .annotations import PutAnnotation
+from .optimize import optimize_svg, serialize_svg
 from .parties import BLACK, RED
 from .pieces import ADVISOR, CANNON, CHARIOT, ELEPHANT, HORSE, KING, PAWN, PutPiece
+from .theme_bundle import load_theme_bundle, normalize_svg, write_theme_bundle
+from .theme_registry import BOARD_INI_BASENAME, read_board_config
+from .timings import count, count_bytes_read, is_recording_timings, timed
+from .units import cm_to_pixel
 
 _BOARD_SVG_BASENAME = "board.svg"
-_BOARD_INI_BASENAME = "board.ini"
-_BOARD_CONFIG_SECTION = "Board"
+
+_ANNOTATION_CONFIG_BASENAME = "config.yml"
+
+_LICENSE_JSON_BASENAME = "LICENSE.json"
 
 _DIAMOND_FILE_NAME = os.path.join("..", "diamond.svg")
 
+_DEFS_ID_PREFIX = "xiangqi-setup-"
+
 _MAX_X = 8
 _MAX_Y = 9
 
 _Z_INDEX_PIECE_LEVEL = 0
 _Z_INDEX_DEBUG_DIAMOND = 1000  # i.e. way above piece level and assumed sane annotation levels
 
+_MAX_CACHED_BOARD_GEOMETRIES = 64
+
 _FILENAME_OF_PARTY_PIECE = {
     RED: {
         CHARIOT: "red_chariot.svg",
@@ -80,7 +102,7 @@ def _length_string_to_pixel(text: str, resolution_dpi: float) -> float:
     return raw_value
 
 
-def _pixel_viewbox_of_figure(figure: SVGFigure, resolution_dpi: float) -> tuple[float, float]:
+def _view_box_strings_of_figure(figure: SVGFigure) -> tuple[str, str, str, str]:
     # NOTE: Attribute "viewbox" (with lowercase "b") is ignored by Inkscape 1.0.1
     #       in practice so I'm following Inkscape here and ignore the lowercase
     #       edition, too.
@@ -92,53 +114,332 @@ def _pixel_viewbox_of_figure(figure: SVGFigure, resolution_dpi: float) -> tuple[
     else:
         left_str, top_str, width_str, height_str = view_box.split()
 
-    return (
-        _length_string_to_pixel(left_str, resolution_dpi),
-        _length_string_to_pixel(top_str, resolution_dpi),
-        _length_string_to_pixel(width_str, resolution_dpi),
-        _length_string_to_pixel(height_str, resolution_dpi),
-    )
+    return left_str, top_str, width_str, height_str
 
 
-def _cm_to_inch(cm):
-    return cm * 0.393700787
+class SvgTemplate:
+    """
+    A parsed SVG file that can be placed any number of times
+    without parsing (or measuring) the file again.
+    """
 
+    def __init__(self, figure: SVGFigure, view_box_strings: tuple[str, str, str, str] = None):
+        self._figure = figure
+        if view_box_strings is None:
+            view_box_strings = _view_box_strings_of_figure(figure)
+        self._view_box_strings = view_box_strings
+        self._pixel_viewbox_of_resolution_dpi = {}
 
-def cm_to_pixel(cm, resolution_dpi):
-    return _cm_to_inch(cm) * resolution_dpi
+    def pixel_viewbox(self, resolution_dpi: float) -> tuple[float, float, float, float]:
+        try:
+            return self._pixel_viewbox_of_resolution_dpi[resolution_dpi]
+        except KeyError:
+            pixel_viewbox = tuple(
+                _length_string_to_pixel(text, resolution_dpi) for text in self._view_box_strings
+            )
+            self._pixel_viewbox_of_resolution_dpi[resolution_dpi] = pixel_viewbox
+            return pixel_viewbox
+
+    def instantiate(self) -> GroupElement:
+        # NOTE: This mirrors SVGFigure.getroot() but copies the children
+        #       rather than moving them, so that the template stays intact.
+        figure_root = self._figure.root
+        if "class" in figure_root.attrib:
+            attrib = {"class": figure_root.attrib["class"]}
+        else:
+            attrib = None
+        return GroupElement([deepcopy(child) for child in figure_root], attrib=attrib)
 
 
-def compose_svg(atoms_to_put, options):
-    board_svg_filename = os.path.join(options.board_theme_dir, _BOARD_SVG_BASENAME)
-    board_ini_filename = os.path.join(options.board_theme_dir, _BOARD_INI_BASENAME)
+# Maps pairs of (loader, filename) to pairs of (modification time, loaded content)
+_file_cache: dict[tuple, tuple[int, object]] = {}
+
+
+def _load_cached(filename: str, loader):
+    mtime_ns = os.stat(filename).st_mtime_ns
+    key = (loader, filename)
+    try:
+        cached_mtime_ns, content = _file_cache[key]
+    except KeyError:
+        pass
+    else:
+        if cached_mtime_ns == mtime_ns:
+            return content
+
+    content = loader(filename)
+    _file_cache[key] = (mtime_ns, content)
+    return content
+
+
+def _read_svg_template(filename: str) -> SvgTemplate:
+    with timed("parse_svg"):
+        template = SvgTemplate(fromfile(filename))
+    count("svg_files_parsed")
+    count_bytes_read(filename)
+    return template
+
+
+# Maps pairs of (theme directory, SVG basename) to pairs of (bundle, template)
+_bundled_template_cache: dict[tuple[str, str], tuple[dict, SvgTemplate]] = {}
+
+
+def load_svg_template(filename: str) -> SvgTemplate:
+    """
+    Returns the template of the given SVG file of a theme, from the theme bundle
+    if the theme has been compiled;  templates are parsed once and then cached.
+    """
+    theme_dir, basename = os.path.split(filename)
+    bundle = load_theme_bundle(theme_dir, basename)
+    if bundle is None or basename not in bundle["svg"]:
+        return _load_cached(filename, _read_svg_template)
+
+    # Bundled SVGs are parsed on first use only
+    key = (theme_dir, basename)
+    try:
+        cached_bundle, template = _bundled_template_cache[key]
+    except KeyError:
+        pass
+    else:
+        if cached_bundle is bundle:
+            return template
+
+    bundled_svg = bundle["svg"][basename]
+    with timed("parse_svg"):
+        template = SvgTemplate(fromstring(bundled_svg["content"]), tuple(bundled_svg["view_box"]))
+    count("svg_files_parsed")
+    _bundled_template_cache[key] = (bundle, template)
+    return template
+
+
+def _load_board_config(board_theme_dir: str) -> tuple[float, float, float, float, float]:
+    bundle = load_theme_bundle(board_theme_dir, BOARD_INI_BASENAME)
+    if bundle is not None:
+        return tuple(bundle["board"])
+
+    board_ini_filename = os.path.join(board_theme_dir, BOARD_INI_BASENAME)
 
     # Check for existance ourselves since configparser would throw NoSectionError
     # at us for a missing file.
     if not os.path.exists(board_ini_filename):
         raise OSError(errno.ENOENT, "No such file or directory: '%s'" % board_ini_filename)
 
-    config = configparser.RawConfigParser(defaults={"river": 0.0})
-    config.read(board_ini_filename)
+    return _load_cached(board_ini_filename, _read_board_config)
+
+
+def _read_board_config(filename: str) -> tuple[float, float, float, float, float]:
+    with timed("load_theme_config"):
+        board_config = read_board_config(filename)
+    count_bytes_read(filename)
+    return board_config
 
-    output_board_offset_left_pixel = config.getfloat(_BOARD_CONFIG_SECTION, "left")
-    output_board_offset_top_pixel = config.getfloat(_BOARD_CONFIG_SECTION, "top")
-    output_board_width_pixel = config.getfloat(_BOARD_CONFIG_SECTION, "width")
-    output_board_height_pixel = config.getfloat(_BOARD_CONFIG_SECTION, "height")
-    output_board_river_height_pixel = config.getfloat(_BOARD_CONFIG_SECTION, "river")
+
+def _read_annotation_theme_config(filename: str) -> dict:
+    with timed("load_theme_config"), open(filename) as f:
+        config = yaml.safe_load(f)
+    count_bytes_read(filename)
+    return config
+
+
+def _load_annotation_theme_config(annotation_theme_dir: str) -> dict:
+    bundle = load_theme_bundle(annotation_theme_dir, _ANNOTATION_CONFIG_BASENAME)
+    if bundle is not None:
+        return bundle["annotations"]
+
+    return _load_cached(
+        os.path.join(annotation_theme_dir, _ANNOTATION_CONFIG_BASENAME),
+        _read_annotation_theme_config,
+    )
+
+
+def preload_themes(board_theme_dir, piece_theme_dir, annotation_theme_dir):
+    """
+    Fill the caches with all files of the given themes
+    so that later calls to compose_svg do not need to read them
+    """
+    load_svg_template(os.path.join(board_theme_dir, _BOARD_SVG_BASENAME))
+    _load_board_config(board_theme_dir)
+
+    for basename_of_piece in _FILENAME_OF_PARTY_PIECE.values():
+        for basename in basename_of_piece.values():
+            load_svg_template(os.path.join(piece_theme_dir, basename))
+
+    annotation_theme_config = _load_annotation_theme_config(annotation_theme_dir)
+    for annotation_name in annotation_theme_config["z_index"]:
+        load_svg_template(os.path.join(annotation_theme_dir, f"{annotation_name}.svg"))
+
+
+class Placement:
+    """
+    A graphic (by filename) scaled and moved to where it goes in the output
+    """
+
+    def __init__(self, filename: str, x_pixel: float, y_pixel: float, scale: float):
+        self.filename = filename
+        self.x_pixel = x_pixel
+        self.y_pixel = y_pixel
+        self.scale = scale
+
+
+class _BoardGeometry:
+    """
+    Where things go on a board of a given size:  the center of all 9x10
+    intersections and, filled on first use, the final placement of every
+    graphic at every intersection, so that placing an atom is a table lookup
+    """
+
+    def __init__(
+        self,
+        board_config: tuple[float, float, float, float, float],
+        board_viewbox: tuple[float, float, float, float],
+        width_pixel: float,
+        resolution_dpi: float,
+    ):
+        (
+            output_board_offset_left_pixel,
+            output_board_offset_top_pixel,
+            output_board_width_pixel,
+            output_board_height_pixel,
+            output_board_river_height_pixel,
+        ) = board_config
+
+        # Scale board to output
+        board_width_pixel, board_height_pixel = board_viewbox[2:]
+        height_factor = board_height_pixel / float(board_width_pixel)
+        self.board_scale = width_pixel / board_width_pixel
+        self.width_pixel = width_pixel
+        self.height_pixel = width_pixel * height_factor
+        self.resolution_dpi = resolution_dpi
+
+        self._offset_left_pixel = output_board_offset_left_pixel * self.board_scale
+        self._offset_top_pixel = output_board_offset_top_pixel * self.board_scale
+        self._width_pixel = output_board_width_pixel * self.board_scale
+        self._height_pixel = output_board_height_pixel * self.board_scale
+        self._river_height_pixel = output_board_river_height_pixel * self.board_scale
+
+        self._center_of_point = [
+            [
+                self._center_of(float(x) / _MAX_X, float(_MAX_Y - y) / _MAX_Y)
+                for y in range(_MAX_Y + 1)
+            ]
+            for x in range(_MAX_X + 1)
+        ]
+
+        # Maps pairs of (graphic template, element scale) to pairs of
+        # (scale and size in the output, placements at all intersections)
+        self._placements_of_graphic: dict[tuple[SvgTemplate, float], list] = {}
+
+    def _center_of(self, x_rel: float, y_rel: float) -> tuple[float, float]:
+        center_x_pixel = self._offset_left_pixel + self._width_pixel * x_rel
+        center_y_pixel = (
+            self._offset_top_pixel
+            + (self._height_pixel - self._river_height_pixel) * y_rel
+            + (self._river_height_pixel if (y_rel >= 0.5) else 0.0)
+        )
+        return center_x_pixel, center_y_pixel
+
+    def _compute_size(
+        self, template: SvgTemplate, element_scale: float
+    ) -> tuple[float, float, float]:
+        original_piece_width_pixel, original_piece_height_pixel = template.pixel_viewbox(
+            self.resolution_dpi
+        )[2:]
+
+        maximum_future_piece_width_pixel = self._width_pixel / _MAX_X * element_scale
+        maximum_future_piece_height_pixel = self._height_pixel / _MAX_Y * element_scale
+
+        scale = min(
+            maximum_future_piece_width_pixel / original_piece_width_pixel,
+            maximum_future_piece_height_pixel / original_piece_height_pixel,
+        )
+
+        future_piece_width_pixel = original_piece_width_pixel * scale
+        future_piece_height_pixel = original_piece_height_pixel * scale
+        return scale, future_piece_width_pixel, future_piece_height_pixel
+
+    @staticmethod
+    def _place_centered(filename: str, size: tuple[float, float, float], center) -> Placement:
+        scale, future_piece_width_pixel, future_piece_height_pixel = size
+        center_x_pixel, center_y_pixel = center
+        x_pixel = center_x_pixel - future_piece_width_pixel / 2.0
+        y_pixel = center_y_pixel - future_piece_height_pixel / 2.0
+        return Placement(filename, x_pixel, y_pixel, scale)
+
+    def place(self, filename: str, element_scale: float, x, y) -> Placement:
+        template = load_svg_template(filename)
+        key = (template, element_scale)
+        try:
+            size, placements = self._placements_of_graphic[key]
+        except KeyError:
+            size = self._compute_size(template, element_scale)
+            placements = [
+                [self._place_centered(filename, size, center) for center in centers_of_column]
+                for centers_of_column in self._center_of_point
+            ]
+            self._placements_of_graphic[key] = (size, placements)
+
+        if isinstance(x, int) and isinstance(y, int) and 0 <= x <= _MAX_X and 0 <= y <= _MAX_Y:
+            return placements[x][y]
+
+        # Anything off the grid of intersections is computed on demand
+        center = self._center_of(float(x) / _MAX_X, float(_MAX_Y - y) / _MAX_Y)
+        return self._place_centered(filename, size, center)
+
+
+@functools.lru_cache(maxsize=_MAX_CACHED_BOARD_GEOMETRIES)
+def _get_board_geometry(
+    board_config: tuple[float, float, float, float, float],
+    board_template: SvgTemplate,
+    width_pixel: float,
+    resolution_dpi: float,
+) -> _BoardGeometry:
+    return _BoardGeometry(
+        board_config, board_template.pixel_viewbox(resolution_dpi), width_pixel, resolution_dpi
+    )
+
+
+class Layout:
+    """
+    Where the board and every piece, annotation and diamond go in the output,
+    independent of the output format
+    """
+
+    def __init__(
+        self,
+        board_filename: str,
+        board_scale: float,
+        width_pixel: float,
+        height_pixel: float,
+        placements: list[Placement],
+    ):
+        self.board_filename = board_filename
+        self.board_scale = board_scale
+        self.width_pixel = width_pixel
+        self.height_pixel = height_pixel
+        self.placements = placements  # in drawing order
+
+
+def compute_layout(atoms_to_put, options) -> Layout:
+    """
+    Returns where the board and every atom go for the given options,
+    for output formats to draw in order
+    """
+    board_svg_filename = os.path.join(options.board_theme_dir, _BOARD_SVG_BASENAME)
+    geometry = _get_board_geometry(
+        _load_board_config(options.board_theme_dir),
+        load_svg_template(board_svg_filename),
+        options.width_pixel,
+        options.resolution_dpi,
+    )
 
     # Regular pieces are at level 0; level 1 and above is drawn on top of (i.e. after)
     # the pieces while -1 and below is drawn below (i.e. before) the pieces.
     jobs_at_z_index = defaultdict(list)
 
-    annotation_theme_config_filename = os.path.join(options.annotation_theme_dir, "config.yml")
-    with open(annotation_theme_config_filename) as f:
-        annotation_theme_config = yaml.safe_load(f)
+    annotation_theme_config = _load_annotation_theme_config(options.annotation_theme_dir)
 
     for put_atom in atoms_to_put:
         if isinstance(put_atom, PutAnnotation):
             put_annotation: PutAnnotation = put_atom
-            x_rel = float(put_annotation.x) / _MAX_X
-            y_rel = float(_MAX_Y - put_annotation.y) / _MAX_Y
             filename = os.path.join(
                 options.annotation_theme_dir, f"{put_annotation.annotation_name}.svg"
             )
@@ -148,92 +449,158 @@ def compose_svg(atoms_to_put, options):
                 else 1.0
             )
             atom_z_index = int(annotation_theme_config["z_index"][put_annotation.annotation_name])
-            jobs_at_z_index[atom_z_index].append((x_rel, y_rel, filename, annotation_scale))
+            jobs_at_z_index[atom_z_index].append(
+                (put_annotation.x, put_annotation.y, filename, annotation_scale)
+            )
         else:
             assert isinstance(put_atom, PutPiece)
             put_piece: PutPiece = put_atom
-            x_rel = float(put_piece.x) / _MAX_X
-            y_rel = float(_MAX_Y - put_piece.y) / _MAX_Y
             basename = _FILENAME_OF_PARTY_PIECE[put_piece.party][put_piece.piece]
             filename = os.path.join(options.piece_theme_dir, basename)
             jobs_at_z_index[_Z_INDEX_PIECE_LEVEL].append(
-                (x_rel, y_rel, filename, options.piece_scale)
+                (put_piece.x, put_piece.y, filename, options.piece_scale)
             )
 
     if options.debug:
-        for x_rel in (0.0, 1.0):
-            for y_rel in (0.0, 1.0):
+        for x in (0, _MAX_X):
+            for y in (_MAX_Y, 0):
                 jobs_at_z_index[_Z_INDEX_DEBUG_DIAMOND].append(
                     (
-                        x_rel,
-                        y_rel,
+                        x,
+                        y,
                         os.path.join(options.piece_theme_dir, _DIAMOND_FILE_NAME),
                         options.piece_scale,
                     )
                 )
 
-    # Read board
-    board_fig = fromfile(board_svg_filename)
-    board_root = board_fig.getroot()
+    placements = [
+        geometry.place(filename, element_scale, x, y)
+        for _z_index, jobs in sorted(jobs_at_z_index.items())
+        for x, y, filename, element_scale in jobs
+    ]
+
+    return Layout(
+        board_svg_filename,
+        geometry.board_scale,
+        geometry.width_pixel,
+        geometry.height_pixel,
+        placements,
+    )
+
+
+def compile_theme_bundle(theme_dir: str) -> str:
+    """
+    Writes a bundle of the given theme directory for faster loading
+    and returns its filename
+    """
+    bundle = {"svg": {}, "sources": {}}
+
+    def read_source(basename, reader):
+        filename = os.path.join(theme_dir, basename)
+        content = reader(filename)
+        bundle["sources"][basename] = os.stat(filename).st_mtime_ns
+        return content
+
+    def read_json(filename):
+        with open(filename) as f:
+            return json.load(f)
+
+    def read_binary(filename):
+        with open(filename, "rb") as f:
+            return f.read()
+
+    bundle["license"] = read_source(_LICENSE_JSON_BASENAME, read_json)
 
-    # Scale board to output
-    board_width_pixel, board_height_pixel = _pixel_viewbox_of_figure(
-        board_fig, options.resolution_dpi
-    )[2:]
-    height_factor = board_height_pixel / float(board_width_pixel)
-    board_scale = options.width_pixel / board_width_pixel
-    board_root.moveto(0, 0, scale_x=board_scale, scale_y=board_scale)
+    if os.path.exists(os.path.join(theme_dir, BOARD_INI_BASENAME)):
+        bundle["board"] = list(read_source(BOARD_INI_BASENAME, read_board_config))
 
-    output_board_offset_left_pixel *= board_scale
-    output_board_offset_top_pixel *= board_scale
-    output_board_width_pixel *= board_scale
-    output_board_height_pixel *= board_scale
-    output_board_river_height_pixel *= board_scale
+    if os.path.exists(os.path.join(theme_dir, _ANNOTATION_CONFIG_BASENAME)):
+        bundle["annotations"] = read_source(
+            _ANNOTATION_CONFIG_BASENAME, _read_annotation_theme_config
+        )
+
+    for basename in sorted(os.listdir(theme_dir)):
+        if not basename.endswith(".svg"):
+            continue
+        svg_content = normalize_svg(read_source(basename, read_binary))
+        bundle["svg"][basename] = {
+            "view_box": list(_view_box_strings_of_figure(fromstring(svg_content))),
+            "content": svg_content,
+        }
+
+    return write_theme_bundle(theme_dir, bundle)
+
+
+def compose_svg_figure(atoms_to_put, options) -> SVGFigure:
+    with timed("layout"):
+        layout = compute_layout(atoms_to_put, options)
+
+    board_root = load_svg_template(layout.board_filename).instantiate()
+    board_root.moveto(0, 0, scale_x=layout.board_scale, scale_y=layout.board_scale)
 
     # Initialize output figure
-    output_fig = SVGFigure(
-        Unit(f"{options.width_pixel}px"), Unit(f"{options.width_pixel * height_factor}px")
-    )
+    output_fig = SVGFigure(Unit(f"{layout.width_pixel}px"), Unit(f"{layout.height_pixel}px"))
+    if options.use_defs:
+        # NOTE: Plain groups are used rather than <symbol> elements because
+        #       symbols would establish a clipping viewport of their own.
+        defs_element = etree.SubElement(output_fig.root, SVG + "defs")
+        defs_id_of_filename = {}
+
     output_fig.append(
         [
             board_root,
         ]
     )
 
-    for _z_index, jobs in sorted(jobs_at_z_index.items()):
-        for x_rel, y_rel, filename, element_scale in jobs:
-            piece_fig = fromfile(filename)
-            piece_root = piece_fig.getroot()
-            original_piece_width_pixel, original_piece_height_pixel = _pixel_viewbox_of_figure(
-                piece_fig, options.resolution_dpi
-            )[2:]
-
-            # Scale and put piece onto board
-            center_x_pixel = output_board_offset_left_pixel + output_board_width_pixel * x_rel
-            center_y_pixel = (
-                output_board_offset_top_pixel
-                + (output_board_height_pixel - output_board_river_height_pixel) * y_rel
-                + (output_board_river_height_pixel if (y_rel >= 0.5) else 0.0)
-            )
+    for placement in layout.placements:
+        piece_template = load_svg_template(placement.filename)
+        if options.use_defs:
+            try:
+                defs_id = defs_id_of_filename[placement.filename]
+            except KeyError:
+                defs_id = (
+                    _DEFS_ID_PREFIX + os.path.splitext(os.path.basename(placement.filename))[0]
+                )
+                definition = piece_template.instantiate()
+                definition.root.set("id", defs_id)
+                defs_element.append(definition.root)
+                defs_id_of_filename[placement.filename] = defs_id
+            piece_root = FigureElement(etree.Element(SVG + "use", {XLINK + "href": f"#{defs_id}"}))
+        else:
+            piece_root = piece_template.instantiate()
 
-            maximum_future_piece_width_pixel = output_board_width_pixel / _MAX_X * element_scale
-            maximum_future_piece_height_pixel = output_board_height_pixel / _MAX_Y * element_scale
+        piece_root.moveto(
+            placement.x_pixel, placement.y_pixel, scale_x=placement.scale, scale_y=placement.scale
+        )
+        output_fig.append(
+            [
+                piece_root,
+            ]
+        )
 
-            scale = min(
-                maximum_future_piece_width_pixel / original_piece_width_pixel,
-                maximum_future_piece_height_pixel / original_piece_height_pixel,
-            )
+    return output_fig
 
-            future_piece_width_pixel = original_piece_width_pixel * scale
-            future_piece_height_pixel = original_piece_height_pixel * scale
 
-            x_pixel = center_x_pixel - future_piece_width_pixel / 2.0
-            y_pixel = center_y_pixel - future_piece_height_pixel / 2.0
-            piece_root.moveto(x_pixel, y_pixel, scale_x=scale, scale_y=scale)
-            output_fig.append(
-                [
-                    piece_root,
-                ]
-            )
+def compose_svg_document(atoms_to_put, options) -> bytes:
+    with timed("compose"):
+        figure = compose_svg_figure(atoms_to_put, options)
+
+    if options.optimize:
+        with timed("optimize"):
+            optimize_svg(figure.root, options.optimize_precision)
+        with timed("serialize"):
+            svg_bytes = serialize_svg(figure.root)
+    else:
+        with timed("serialize"):
+            svg_bytes = figure.to_str()
+
+    if is_recording_timings():
+        count("output_elements", sum(1 for _ in figure.root.iter(etree.Element)))
+    return svg_bytes
 
-    output_fig.save(options.output_file)
+
+def compose_svg(atoms_to_put, options):
+    svg_bytes = compose_svg_document(atoms_to_put, options)
+    with timed("write_output"), open(options.output_file, "wb") as f:
+        f.write(svg_bytes)
+    count("output_bytes", len(svg_bytes))
@@ -0,0 +1,144 @@
+# Copyright (C) 2026 Sebastian Pipping <sebastian@pipping.org>
+# Licensed under GNU Affero General Public License version 3.0 or later
+
+from ..timings import count, count_bytes_read, timed
+from .annofen import is_annofen_content, iterate_annofen_tokens
+from .fen import iterate_fen_tokens
+from .wxf import is_wxf_content, iterate_wxf_tokens
+from .xay import is_xay_content, iterate_xay_document_tokens, parse_xay_document
+
+
+class FileFormat:
+    """
+    An input file format:  a cheap check whether content (probably) is in that
+    format, a parser from content to a document and the atoms of such a document
+    """
+
+    def __init__(self, name: str, is_content, parse, iterate_document_tokens):
+        self.name = name
+        self.is_content = is_content
+        self.parse = parse
+        self.iterate_document_tokens = iterate_document_tokens
+
+    def iterate_tokens(self, content: str, moves_to_play: str, annotate_last_move: bool):
+        document = self.parse(content)
+        return self.iterate_document_tokens(document, moves_to_play, annotate_last_move)
+
+    def __repr__(self):
+        return f"FileFormat(name={self.name!r})"
+
+
+def _parse_as_is(content: str) -> str:
+    return content
+
+
+def _is_fen_content(content: str) -> bool:
+    return True  # i.e. FEN is what is left when all other formats have been ruled out
+
+
+def _iterate_annofen_document_tokens(document: str, moves_to_play, annotate_last_move):
+    return iterate_annofen_tokens(document)
+
+
+def _iterate_xay_document_tokens(document: dict, moves_to_play, annotate_last_move):
+    return iterate_xay_document_tokens(document)
+
+
+def _iterate_fen_document_tokens(document: str, moves_to_play, annotate_last_move):
+    return iterate_fen_tokens(document)
+
+
+# In order of detection
+FILE_FORMATS = (
+    FileFormat("annofen", is_annofen_content, _parse_as_is, _iterate_annofen_document_tokens),
+    FileFormat("xay", is_xay_content, parse_xay_document, _iterate_xay_document_tokens),
+    FileFormat("wxf", is_wxf_content, _parse_as_is, iterate_wxf_tokens),
+    FileFormat("fen", _is_fen_content, _parse_as_is, _iterate_fen_document_tokens),
+)
+
+FILE_FORMAT_NAMES = tuple(file_format.name for file_format in FILE_FORMATS)
+
+_FILE_FORMAT_OF_NAME = {file_format.name: file_format for file_format in FILE_FORMATS}
+
+
+def get_file_format(name: str) -> FileFormat:
+    try:
+        return _FILE_FORMAT_OF_NAME[name]
+    except KeyError:
+        raise ValueError(
+            f"Unsupported input format {name!r}, expected one of {', '.join(FILE_FORMAT_NAMES)}"
+        )
+
+
+# e.g. as written by some Windows editors in front of UTF-8 content
+_BYTE_ORDER_MARK = "\ufeff"
+
+
+def detect_file_format(content: str) -> FileFormat:
+    content = content.removeprefix(_BYTE_ORDER_MARK)
+    with timed("detect_format"):
+        for file_format in FILE_FORMATS:
+            if file_format.is_content(content):
+                return file_format
+
+
+def iterate_tokens_of_content(
+    content: str, moves_to_play: str, annotate_last_move: bool, format_name: str | None = None
+):
+    """
+    Yields the atoms of the given content, in the given format
+    or in the format detected from the content if None
+    """
+    content = content.removeprefix(_BYTE_ORDER_MARK)
+    if format_name is None:
+        file_format = detect_file_format(content)
+    else:
+        file_format = get_file_format(format_name)
+
+    yield from file_format.iterate_tokens(content, moves_to_play, annotate_last_move)
+
+
+def iterate_position_lines(lines):
+    """
+    Yields triples of (index, line number, line) for content with one FEN
+    or annoFEN position per line, e.g. a file object for reading lazily;
+    blank lines and comments are skipped and do not count as positions.
+    """
+    index = 0
+    for line_number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        yield index, line_number, line
+        index += 1
+
+
+def iterate_tokens_of_line(line: str, format_name: str | None = None):
+    if format_name is None:
+        format_name = "annofen" if line.startswith("v1 ") else "fen"
+
+    if format_name == "annofen":
+        yield from iterate_annofen_tokens(line)
+    elif format_name == "fen":
+        yield from iterate_fen_tokens(line)
+    else:
+        raise ValueError(f"Input format {format_name!r} does not support one position per line")
+
+
+def read_input_file(filename: str) -> str:
+    with timed("read_input"), open(filename) as f:
+        content = f.read()
+    count_bytes_read(filename)
+    return content
+
+
+def read_atoms_from_file(
+    filename: str, moves_to_play: str, annotate_last_move: bool, format_name: str | None = None
+) -> list:
+    content = read_input_file(filename)
+    with timed("parse_input"):
+        atoms = list(
+            iterate_tokens_of_content(content, moves_to_play, annotate_last_move, format_name)
+        )
+    count("atoms", len(atoms))
+    return atoms
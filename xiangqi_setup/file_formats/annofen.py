@@ -1,109 +1,132 @@
 # Copyright (C) 2021 Sebastian Pipping <sebastian@pipping.org>
 # Licensed under GNU Affero General Public License version 3.0 or later
 
-import re
-
 from ..annotations import ANNOTATION_NAME_OF_ATOM_CODE, InvalidAnnotationCode, PutAnnotation
-from ..parties import BLACK, RED
 from ..pieces import PutPiece
-from .fen import PIECE_OF_UPPER_LETTER
-
-_piece_letters = list(PIECE_OF_UPPER_LETTER.keys()) + [
-    letter.lower() for letter in PIECE_OF_UPPER_LETTER.keys()
-]
-_single_piece_pattern = "[" + "".join(_piece_letters) + "]"
-_single_annotation_pattern = "<(?:[^>]+)>"
-_single_annotation_plus_capture_pattern = _single_annotation_pattern.replace(
-    "(?:", "(?P<atom_code>"
-)
-_atom_pattern = f"(?:{_single_piece_pattern}|{_single_annotation_pattern})"
-_stacked_atoms_pattern = "\\[(?P<atoms>(?:" + _atom_pattern + ")+)\\]"
-
-_annofen_tokens_pattern = (
-    "(?:"
-    + "|".join(
-        f"(?P<{name}>{pattern})"
-        for name, pattern in (
-            ("end_of_row", "/"),
-            ("empty_fields", "[0-9]"),
-            ("single_piece", _single_piece_pattern),
-            ("single_annotation", _single_annotation_plus_capture_pattern),
-            ("stacked_atoms", _stacked_atoms_pattern),
-            ("malformed", "."),
-        )
-    )
-    + ")"
-)
-_atoms_tokens_pattern = (
-    "(?:"
-    + "|".join(
-        f"(?P<{name}>{pattern})"
-        for name, pattern in (
-            ("single_piece", _single_piece_pattern),
-            ("single_annotation", _single_annotation_plus_capture_pattern),
-            ("malformed", "."),
-        )
-    )
-    + ")"
-)
+from .fen import PARTY_PIECE_OF_LETTER
+
+# NOTE: Unlike with plain FEN, only ASCII digits denote empty fields
+_EMPTY_FIELD_COUNT_OF_CHAR = {str(count): count for count in range(10)}
 
 
 def is_annofen_content(content: str) -> bool:
-    return any(line.startswith("v1 ") for line in content.split("\n"))
+    # NOTE: Same as checking every line for prefix "v1 " but without splitting into lines
+    return content.startswith("v1 ") or "\nv1 " in content
+
+
+def _create_annotation(x: int, y: int, atom_code: str) -> PutAnnotation:
+    try:
+        annotation_name = ANNOTATION_NAME_OF_ATOM_CODE[atom_code]
+    except KeyError:
+        raise InvalidAnnotationCode(atom_code)
+    return PutAnnotation(annotation_name=annotation_name, x=x, y=y)
+
+
+def _find_end_of_atom_code(fen_part: str, start: int) -> int:
+    """
+    Returns the index of the ">" closing the atom code that starts
+    with "<" at the given index, or -1 for a malformed atom code
+    """
+    end = fen_part.find(">", start + 1)
+    if end == start + 1:  # i.e. an empty atom code
+        return -1
+    return end
+
+
+def _scan_stacked_atoms(fen_part: str, start: int) -> tuple[list, int]:
+    """
+    Returns the atoms stacked in "[...]" starting at the given index as a list
+    of piece letters and "<...>" atom codes together with the index of the
+    closing "]", or an empty list and -1 for malformed stacked atoms
+    """
+    atoms = []
+    i = start + 1
+    length = len(fen_part)
+    while i < length:
+        char = fen_part[i]
+        if char in PARTY_PIECE_OF_LETTER:
+            atoms.append(char)
+            i += 1
+        elif char == "<":
+            end = _find_end_of_atom_code(fen_part, i)
+            if end == -1:
+                break
+            atoms.append(fen_part[i : end + 1])
+            i = end + 1
+        elif char == "]" and atoms:
+            return atoms, i
+        else:
+            break
+    return [], -1
+
+
+def _iterate_fen_part_tokens(fen_part: str, line_number: int, column_offset: int):
+    # NOTE: This is a hand-written single-pass scanner (rather than matching
+    #       large alternations of regular expressions) for bulk input
+    #       with millions of positions.
+    x = 0
+    y = 9
+    i = 0
+    length = len(fen_part)
+    while i < length:
+        char = fen_part[i]
+
+        if char == "/":
+            x = 0
+            y -= 1
+            i += 1
+            continue
+
+        empty_field_count = _EMPTY_FIELD_COUNT_OF_CHAR.get(char)
+        if empty_field_count is not None:
+            x += empty_field_count
+            i += 1
+            continue
 
+        party_piece = PARTY_PIECE_OF_LETTER.get(char)
+        if party_piece is not None:
+            yield PutPiece(party_piece[0], party_piece[1], x, y)
+        elif char == "<" and (end := _find_end_of_atom_code(fen_part, i)) != -1:
+            yield _create_annotation(x, y, fen_part[i + 1 : end])
+            i = end
+        elif char == "[" and (stacked := _scan_stacked_atoms(fen_part, i))[1] != -1:
+            atoms, end = stacked
+            for atom in atoms:
+                party_piece = PARTY_PIECE_OF_LETTER.get(atom)
+                if party_piece is not None:
+                    yield PutPiece(party_piece[0], party_piece[1], x, y)
+                else:
+                    yield _create_annotation(x, y, atom[1:-1])
+            i = end
+        else:
+            raise ValueError(
+                f"Malformed annoFEN token {char!r}"
+                f" at line {line_number}, column {column_offset + i + 1}"
+            )
+
+        x += 1
+        i += 1
 
-def iterate_annofen_tokens(content: str):
-    def _create_piece(x: int, y: int, letter: str) -> PutPiece:
-        party = BLACK if letter.islower() else RED
-        piece = PIECE_OF_UPPER_LETTER[letter.upper()]
-        return PutPiece(party, piece, x, y)
-
-    def _create_annotation(x: int, y: int, atom_code: str) -> PutAnnotation:
-        try:
-            annotation_name = ANNOTATION_NAME_OF_ATOM_CODE[atom_code]
-        except KeyError:
-            raise InvalidAnnotationCode(atom_code)
-        return PutAnnotation(annotation_name=annotation_name, x=x, y=y)
 
+def iterate_annofen_tokens(content: str):
     seen_fen_before = False
-    for i, line in enumerate(content.split("\n")):
-        line = line.strip()
+    for i, raw_line in enumerate(content.split("\n")):
+        line = raw_line.strip()
 
         if line.startswith("#") or not line:
             continue
 
+        line_number = i + 1
+
         if not line.startswith("v1 "):
-            raise ValueError(f"Malformed annoFEN: {line!r}")
+            raise ValueError(f"Malformed annoFEN at line {line_number}: {line!r}")
 
         if seen_fen_before:
-            raise ValueError(f"Garbage after annoFEN document: {line!r}")
+            raise ValueError(f"Garbage after annoFEN document at line {line_number}: {line!r}")
 
-        x = 0
-        y = 9
         fen_part = line.split()[1]
+        column_offset = (len(raw_line) - len(raw_line.lstrip())) + line.index(fen_part, 3)
 
-        for match in re.finditer(_annofen_tokens_pattern, fen_part):
-            if match.group("stacked_atoms") is not None:
-                without_square_braces = match.group("atoms")
-                for inner_match in re.finditer(_atoms_tokens_pattern, without_square_braces):
-                    if inner_match.group("single_piece") is not None:
-                        yield _create_piece(x, y, inner_match.group("single_piece"))
-                    else:
-                        yield _create_annotation(x, y, inner_match.group("atom_code"))
-            elif match.group("end_of_row") is not None:
-                x = 0
-                y -= 1
-                continue
-            elif match.group("empty_fields") is not None:
-                x += int(match.group("empty_fields"))
-                continue
-            elif match.group("single_piece") is not None:
-                yield _create_piece(x, y, match.group("single_piece"))
-            elif match.group("single_annotation") is not None:
-                yield _create_annotation(x, y, match.group("atom_code"))
-            elif match.group("malformed") is not None:
-                character = match.group("malformed")
-                raise ValueError(f"Malformed annoFEN token: {character!r}")
-            x += 1
+        yield from _iterate_fen_part_tokens(fen_part, line_number, column_offset)
 
         seen_fen_before = True
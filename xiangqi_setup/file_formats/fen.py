@@ -2,7 +2,18 @@
 # Licensed under GNU Affero General Public License version 3.0 or later
 
 from ..parties import BLACK, RED
-from ..pieces import ADVISOR, CANNON, CHARIOT, ELEPHANT, HORSE, KING, PAWN, PutPiece
+from ..pieces import (
+    ADVISOR,
+    CANNON,
+    CHARIOT,
+    ELEPHANT,
+    HORSE,
+    KING,
+    PAWN,
+    PutPiece,
+    pack_position,
+    unpack_position,
+)
 
 PIECE_OF_UPPER_LETTER = {
     # Official letters from http://wxf.ca/xq/computer/fen.pdf
@@ -22,20 +33,81 @@ PIECE_OF_UPPER_LETTER = {
 }
 
 
+# Maps characters of FEN piece placement to numbers of empty fields
+_EMPTY_FIELD_COUNT_OF_CHAR = {str(count): count for count in range(10)}
+
+# Maps piece letters (of both parties) to pairs of (party, piece)
+PARTY_PIECE_OF_LETTER = {
+    **{letter: (RED, piece) for letter, piece in PIECE_OF_UPPER_LETTER.items()},
+    **{letter.lower(): (BLACK, piece) for letter, piece in PIECE_OF_UPPER_LETTER.items()},
+}
+
+# Maps pairs of (party, piece) to the official piece letters
+_LETTER_OF_PARTY_PIECE = {
+    **{(RED, PIECE_OF_UPPER_LETTER[letter]): letter for letter in "RHEAKCP"},
+    **{(BLACK, PIECE_OF_UPPER_LETTER[letter]): letter.lower() for letter in "RHEAKCP"},
+}
+
+
 def iterate_fen_tokens(field_state_raw):
     # Make sure we're only operating on the first part the FEN,
     # the piece setup matrix (empty board: "9/9/9/9/9/9/9/9/9/9 w - - 0 1")
+    field_state_offset = len(field_state_raw) - len(field_state_raw.lstrip())
     field_state_raw = field_state_raw.split()[0]
 
-    for i, line in enumerate(field_state_raw.split("/")):
-        x = 0
-        for char in line:
-            try:
-                x += int(char)
-            except ValueError:
-                party = BLACK if char.islower() else RED
-                piece = PIECE_OF_UPPER_LETTER[char.upper()]
-                y = 9 - i
-                p = PutPiece(party, piece, x, y)
-                yield p
-                x += 1
+    # NOTE: This is a hand-written single-pass scanner (rather than
+    #       splitting into rows and trying int() on every character)
+    #       for bulk input with millions of positions.
+    x = 0
+    y = 9
+    for column, char in enumerate(field_state_raw, start=field_state_offset + 1):
+        if char == "/":
+            x = 0
+            y -= 1
+            continue
+
+        party_piece = PARTY_PIECE_OF_LETTER.get(char)
+        if party_piece is not None:
+            yield PutPiece(party_piece[0], party_piece[1], x, y)
+            x += 1
+            continue
+
+        empty_field_count = _EMPTY_FIELD_COUNT_OF_CHAR.get(char)
+        if empty_field_count is None:
+            if not char.isdecimal():
+                raise ValueError(f"Malformed FEN token {char!r} at column {column}")
+            empty_field_count = int(char)  # e.g. for full-width digits
+        x += empty_field_count
+
+
+def format_fen_field_state(atoms) -> str:
+    """
+    Returns the piece placement part of FEN (e.g. "4k4/9/9/9/9/9/9/9/9/4K4")
+    for the pieces among the given atoms;  annotations are ignored.
+    Pieces off the board and fields with more than one piece cannot be
+    expressed in FEN (ValueError).
+    """
+    put_pieces = [atom for atom in atoms if isinstance(atom, PutPiece)]
+
+    letters = [[None] * 9 for _ in range(10)]
+    for put_piece in unpack_position(pack_position(put_pieces)):  # i.e. validated
+        letters[9 - put_piece.y][put_piece.x] = _LETTER_OF_PARTY_PIECE[
+            (put_piece.party, put_piece.piece)
+        ]
+
+    rows = []
+    for row_letters in letters:
+        chunks = []
+        empty_field_count = 0
+        for letter in row_letters:
+            if letter is None:
+                empty_field_count += 1
+                continue
+            if empty_field_count:
+                chunks.append(str(empty_field_count))
+                empty_field_count = 0
+            chunks.append(letter)
+        if empty_field_count:
+            chunks.append(str(empty_field_count))
+        rows.append("".join(chunks))
+    return "/".join(rows)
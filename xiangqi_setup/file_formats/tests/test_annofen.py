@@ -0,0 +1,51 @@
+# Copyright (C) 2026 Sebastian Pipping <sebastian@pipping.org>
+# Licensed under GNU Affero General Public License version 3.0 or later
+
+from unittest import TestCase
+
+from parameterized import parameterized
+
+from ...annotations import InvalidAnnotationCode, PutAnnotation
+from ...parties import BLACK, RED
+from ...pieces import KING, PAWN, PutPiece
+from ..annofen import iterate_annofen_tokens
+
+
+class IterateAnnofenTokensTest(TestCase):
+    def test_pieces_and_annotations(self):
+        content = "# Comment\n\nv1 [k<bm>]3<a+0+1>4/9/9/9/9/9/9/9/[P<pg><bb>]8/4K4\n"
+
+        atoms = list(iterate_annofen_tokens(content))
+
+        self.assertEqual(
+            atoms,
+            [
+                PutPiece(BLACK, KING, 0, 9),
+                PutAnnotation("blank_move", 0, 9),
+                PutAnnotation("arrow_plus_0_plus_1", 4, 9),
+                PutPiece(RED, PAWN, 0, 1),
+                PutAnnotation("piece_good", 0, 1),
+                PutAnnotation("blank_bad", 0, 1),
+                PutPiece(RED, KING, 4, 0),
+            ],
+        )
+
+    @parameterized.expand(
+        [
+            ("v1 4k4/9/[]9", "Malformed annoFEN token '[' at line 1, column 10"),
+            ("v1 4k4/9/[K9", "Malformed annoFEN token '[' at line 1, column 10"),
+            ("v1 4k4/<>", "Malformed annoFEN token '<' at line 1, column 8"),
+            ("\n  v1  4k4/4-4", "Malformed annoFEN token '-' at line 2, column 12"),
+            ("4k4/9", "Malformed annoFEN at line 1: '4k4/9'"),
+            ("v1 4k4\nv1 4K4", "Garbage after annoFEN document at line 2: 'v1 4K4'"),
+        ]
+    )
+    def test_malformed(self, content, expected_message):
+        with self.assertRaises(ValueError) as context:
+            list(iterate_annofen_tokens(content))
+
+        self.assertEqual(str(context.exception), expected_message)
+
+    def test_invalid_annotation_code(self):
+        with self.assertRaises(InvalidAnnotationCode):
+            list(iterate_annofen_tokens("v1 <zz>"))
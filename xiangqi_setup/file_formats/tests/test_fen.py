@@ -0,0 +1,67 @@
+# Copyright (C) 2026 Sebastian Pipping <sebastian@pipping.org>
+# Licensed under GNU Affero General Public License version 3.0 or later
+
+from unittest import TestCase
+
+from parameterized import parameterized
+
+from ...annotations import PutAnnotation
+from ...parties import BLACK, RED
+from ...pieces import CANNON, KING, PAWN, PutPiece
+from ..fen import format_fen_field_state, iterate_fen_tokens
+
+
+class IterateFenTokensTest(TestCase):
+    def test_pieces(self):
+        atoms = list(iterate_fen_tokens("4k4/9/1c7/9/9/9/P8/9/9/4K4 w - - 0 1"))
+
+        self.assertEqual(
+            atoms,
+            [
+                PutPiece(BLACK, KING, 4, 9),
+                PutPiece(BLACK, CANNON, 1, 7),
+                PutPiece(RED, PAWN, 0, 3),
+                PutPiece(RED, KING, 4, 0),
+            ],
+        )
+
+    def test_full_width_digits(self):
+        atoms = list(iterate_fen_tokens("４k4"))
+
+        self.assertEqual([(atom.x, atom.y) for atom in atoms], [(4, 9)])
+
+    @parameterized.expand(
+        [
+            ("4k4/9/9/9/9/9/9/9/9/4X4", "'X' at column 22"),
+            ("  4k4/4-4", "'-' at column 8"),
+        ]
+    )
+    def test_malformed(self, fen, expected_message_end):
+        with self.assertRaises(ValueError) as context:
+            list(iterate_fen_tokens(fen))
+
+        self.assertEqual(str(context.exception), f"Malformed FEN token {expected_message_end}")
+
+
+class FormatFenFieldStateTest(TestCase):
+    @parameterized.expand(
+        [
+            ("9/9/9/9/9/9/9/9/9/9",),
+            ("4k4/9/9/9/9/9/9/9/9/4K4",),
+            ("rheakaehr/9/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/9/RHEAKAEHR",),
+        ]
+    )
+    def test_round_trip(self, fen):
+        self.assertEqual(format_fen_field_state(iterate_fen_tokens(fen)), fen)
+
+    def test_annotations_ignored_and_letters_normalized(self):
+        atoms = [
+            *iterate_fen_tokens("4k4/9/9/9/9/9/9/9/9/3GN4"),
+            PutAnnotation("piece_move", 4, 0),
+        ]
+
+        self.assertEqual(format_fen_field_state(atoms), "4k4/9/9/9/9/9/9/9/9/3AH4")
+
+    def test_stacked_pieces_rejected(self):
+        with self.assertRaises(ValueError):
+            format_fen_field_state([PutPiece(RED, KING, 4, 0), PutPiece(BLACK, KING, 4, 0)])
@@ -0,0 +1,67 @@
+# Copyright (C) 2026 Sebastian Pipping <sebastian@pipping.org>
+# Licensed under GNU Affero General Public License version 3.0 or later
+
+from unittest import TestCase
+from unittest.mock import patch
+
+import yaml
+from parameterized import parameterized
+
+from .. import detect_file_format, get_file_format, iterate_tokens_of_content
+
+_XAY_CONTENT = """\
+# Mentioning WXF in a comment does not make this a WXF file
+version: '1'
+setup: [
+  [[], [], [], [], [k]],
+  [], [], [], [], [], [], [], [],
+  [[], [], [], [], [K]],
+]
+"""
+
+
+class DetectFileFormatTest(TestCase):
+    @parameterized.expand(
+        [
+            ("annofen", "# Comment\nv1 4k4/9/9/9/9/9/9/9/9/4K4\n"),
+            ("xay", _XAY_CONTENT),
+            ("wxf", "FORMAT  WXF\nSTART{\n}END\n"),
+            ("wxf", "START{\n 1. C2.5 h8+7\n}END\n"),
+            ("wxf", "\ufeffFORMAT  WXF\nFEN     4k4/9/9/9/9/9/9/9/9/4K4 r\n"),
+            ("xay", "{version: '1', setup: [[[], [], [], [], [k]]]}\n"),
+            ("xay", '# Comment\n---\n{\n  "version": "1",\n  "setup": []\n}\n'),
+            ("fen", "4k4/9/9/9/9/9/9/9/9/4K4 w - - 0 1"),
+        ]
+    )
+    def test(self, expected_name, content):
+        self.assertEqual(detect_file_format(content).name, expected_name)
+
+
+class IterateTokensOfContentTest(TestCase):
+    def test_xay_parsed_once(self):
+        with patch.object(yaml, "safe_load", wraps=yaml.safe_load) as safe_load:
+            atoms = list(iterate_tokens_of_content(_XAY_CONTENT, "0", False))
+
+        self.assertEqual(len(atoms), 2)
+        self.assertEqual(safe_load.call_count, 1)
+
+    @parameterized.expand(
+        [
+            ("wxf with byte order mark", "\ufeffFORMAT  WXF\nFEN     4k4/9/9/9/9/9/9/9/9/4K4 r\n"),
+            ("xay flow mapping", "{version: '1', setup: [[[], [], [], [], [k]], [[K]]]}"),
+        ]
+    )
+    def test_parsed_as_detected(self, _label, content):
+        atoms = list(iterate_tokens_of_content(content, "0", False))
+
+        self.assertEqual(len(atoms), 2)
+
+    def test_explicit_format_skips_detection(self):
+        content = "v1 4k4/9/9/9/9/9/9/9/9/4K4"
+
+        with self.assertRaises(ValueError):
+            list(iterate_tokens_of_content(content, "0", False, "fen"))
+
+    def test_unsupported_format_rejected(self):
+        with self.assertRaises(ValueError):
+            get_file_format("pgn")
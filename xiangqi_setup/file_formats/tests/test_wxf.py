@@ -5,10 +5,18 @@ from unittest import TestCase
 
 from parameterized import parameterized
 
+from ...annotations import ANNOTATION_NAME_BLANK_MOVE, ANNOTATION_NAME_PIECE_MOVE, PutAnnotation
 from ...parties import BLACK, RED
 from ...pieces import ADVISOR, CANNON, CHARIOT, ELEPHANT, HORSE, KING, PAWN, PutPiece
-from ..fen import PIECE_OF_UPPER_LETTER
-from ..wxf import _Board, _PlayerRelativeView
+from ..fen import PIECE_OF_UPPER_LETTER, format_fen_field_state
+from ..wxf import _Board, _PlayerRelativeView, iterate_wxf_positions
+
+_WXF_WITH_MOVES = """\
+FORMAT  WXF
+START{
+ 1. C2.5 h8+7   2. H2+3 r9.8   3. R1.2 h2+3
+}END
+"""
 
 
 class PlayerRelativeViewTest(TestCase):
@@ -218,3 +226,71 @@ class BoardTest(TestCase):
         self.assertEqual(expected_y, put_piece.y)
         self.assertEqual(piece, put_piece.piece)
         self.assertEqual(party, put_piece.party)
+
+    def test_move__capture_updates_piece_index(self):
+        board = _Board()
+        board.put(PutPiece(RED, CHARIOT, 0, 0))
+        board.put(PutPiece(BLACK, CHARIOT, 0, 9))
+        board.put(PutPiece(BLACK, CHARIOT, 8, 9))
+
+        board.move(RED, "R", "9", "+", "9", annotate=False)  # captures at (0, 9)
+
+        put_piece = board._locate_piece(BLACK, "r", "9")
+        self.assertEqual((put_piece.x, put_piece.y), (8, 9))
+        self.assertEqual(board._locations_of_party_piece[(BLACK, CHARIOT)], {(8, 9)})
+        self.assertEqual(board._locations_of_party_piece[(RED, CHARIOT)], {(0, 9)})
+
+    def test_put__replacing_updates_piece_index(self):
+        board = _Board()
+        board.put(PutPiece(RED, PAWN, 4, 3))
+        board.put(PutPiece(BLACK, HORSE, 4, 3))
+
+        self.assertEqual(board._locations_of_party_piece[(RED, PAWN)], set())
+        self.assertEqual(board._locations_of_party_piece[(BLACK, HORSE)], {(4, 3)})
+
+
+# Positions of _WXF_WITH_MOVES by ply, worked out by hand, with the pairs of
+# (x, y) of the blank_move and piece_move annotations of the last move
+_POSITION_OF_PLY = {
+    0: ("rheakaehr/9/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/9/RHEAKAEHR", None),
+    2: ("rheakae1r/9/1c4hc1/p1p1p1p1p/9/9/P1P1P1P1P/1C2C4/9/RHEAKAEHR", ((7, 9), (6, 7))),
+    3: ("rheakae1r/9/1c4hc1/p1p1p1p1p/9/9/P1P1P1P1P/1C2C1H2/9/RHEAKAE1R", ((7, 0), (6, 2))),
+    5: ("rheakaer1/9/1c4hc1/p1p1p1p1p/9/9/P1P1P1P1P/1C2C1H2/9/RHEAKAER1", ((8, 0), (7, 0))),
+    6: ("r1eakaer1/9/1ch3hc1/p1p1p1p1p/9/9/P1P1P1P1P/1C2C1H2/9/RHEAKAER1", ((1, 9), (2, 7))),
+}
+
+
+class IterateWxfPositionsTest(TestCase):
+    @parameterized.expand(
+        [
+            ("0,2,-1", [0, 2, 5]),
+            ("all", [6]),
+            ("3,3", [3]),
+        ]
+    )
+    def test_plies_match_expected_positions(self, moves_to_play, expected_plies):
+        positions = list(iterate_wxf_positions(_WXF_WITH_MOVES, moves_to_play, True))
+
+        self.assertEqual([ply for ply, _atoms in positions], expected_plies)
+        for ply, atoms in positions:
+            expected_fen, expected_move = _POSITION_OF_PLY[ply]
+            expected_annotations = []
+            if expected_move is not None:
+                (blank_x, blank_y), (piece_x, piece_y) = expected_move
+                expected_annotations = [
+                    PutAnnotation(ANNOTATION_NAME_BLANK_MOVE, blank_x, blank_y),
+                    PutAnnotation(ANNOTATION_NAME_PIECE_MOVE, piece_x, piece_y),
+                ]
+
+            self.assertEqual(format_fen_field_state(atoms), expected_fen)
+            self.assertCountEqual(
+                [atom for atom in atoms if isinstance(atom, PutAnnotation)], expected_annotations
+            )
+
+    def test_every_nth_ply(self):
+        positions = iterate_wxf_positions(_WXF_WITH_MOVES, "0", False, every_nth_ply=2)
+        self.assertEqual([ply for ply, _atoms in positions], [2, 4, 6])
+
+    def test_out_of_range(self):
+        with self.assertRaises(ValueError):
+            list(iterate_wxf_positions(_WXF_WITH_MOVES, "1,7", False))
@@ -0,0 +1,83 @@
+# Copyright (C) 2026 Sebastian Pipping <sebastian@pipping.org>
+# Licensed under GNU Affero General Public License version 3.0 or later
+
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from ..wxf import ALL_MOVES, iterate_wxf_tokens
+from ..wxf_archive import iterate_wxf_archive_games
+
+_GAME_WITH_MOVES = """\
+FORMAT  WXF
+FEN     rnbakabnr/9/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/9/RNBAKABNR r
+START{
+ 1. C2.5 h8+7   2. H2+3 r9.8
+}END
+"""
+
+_GAME_WITHOUT_MOVES = """\
+FORMAT  WXF
+FEN     4kaer1/4a2c1/2h1e1h2/3Rp1C1p/2C6/5rP2/1pP1P3P/8E/9/1cEAKA1R1 b
+"""
+
+
+class IterateWxfArchiveGamesTest(TestCase):
+    def _iterate_games(self, content):
+        with TemporaryDirectory() as temp_dir:
+            filename = os.path.join(temp_dir, "archive.wxf")
+            with open(filename, "w", encoding="utf-8") as f:
+                f.write(content)
+            return list(iterate_wxf_archive_games(filename))
+
+    def test_games_split_at_format_headers(self):
+        prefix = "Exported by some database\n"
+
+        games = self._iterate_games(prefix + _GAME_WITH_MOVES + _GAME_WITHOUT_MOVES)
+
+        self.assertEqual([game.index for game in games], [0, 1])
+        self.assertEqual(
+            [game.offset for game in games],
+            [len(prefix), len(prefix) + len(_GAME_WITH_MOVES)],
+        )
+        self.assertEqual([game.content for game in games], [_GAME_WITH_MOVES, _GAME_WITHOUT_MOVES])
+
+    def test_final_positions_match_single_games(self):
+        games = self._iterate_games(_GAME_WITHOUT_MOVES + _GAME_WITH_MOVES)
+
+        for game, single_game in zip(games, (_GAME_WITHOUT_MOVES, _GAME_WITH_MOVES)):
+            self.assertEqual(
+                list(game.iterate_tokens(ALL_MOVES, True)),
+                list(iterate_wxf_tokens(single_game, ALL_MOVES, True)),
+            )
+
+    def test_file_without_format_header_is_single_game(self):
+        content = _GAME_WITH_MOVES.replace("FORMAT  WXF\n", "")
+
+        games = self._iterate_games(content)
+
+        self.assertEqual([game.content for game in games], [content])
+
+    def test_malformed_game_decoded_only_once_accessed(self):
+        with TemporaryDirectory() as temp_dir:
+            filename = os.path.join(temp_dir, "archive.wxf")
+            with open(filename, "wb") as f:
+                f.write(_GAME_WITHOUT_MOVES.encode() + b"FORMAT  WXF\nNAME    \xff\n")
+            games = list(iterate_wxf_archive_games(filename))
+
+        self.assertEqual([game.offset for game in games], [0, len(_GAME_WITHOUT_MOVES)])
+        self.assertEqual(games[0].content, _GAME_WITHOUT_MOVES)
+        with self.assertRaises(UnicodeDecodeError):
+            games[1].content
+
+    def test_first_game_after_byte_order_mark_kept(self):
+        games = self._iterate_games("\ufeff" + _GAME_WITH_MOVES + _GAME_WITHOUT_MOVES)
+
+        self.assertEqual([game.offset for game in games], [0, 3 + len(_GAME_WITH_MOVES)])
+        self.assertEqual(
+            list(games[0].iterate_tokens(ALL_MOVES, True)),
+            list(iterate_wxf_tokens(_GAME_WITH_MOVES, ALL_MOVES, True)),
+        )
+
+    def test_empty_file(self):
+        self.assertEqual(self._iterate_games(""), [])
@@ -3,12 +3,15 @@
 
 import re
 import sys
+from collections import defaultdict
 
 from ..annotations import ANNOTATION_NAME_BLANK_MOVE, ANNOTATION_NAME_PIECE_MOVE, PutAnnotation
 from ..default_setup import iterate_default_setup
 from ..file_formats.fen import PIECE_OF_UPPER_LETTER, iterate_fen_tokens
 from ..parties import BLACK, RED
 from ..pieces import ADVISOR, CANNON, CHARIOT, ELEPHANT, HORSE, KING, PAWN, PutPiece
+from ..timings import timed
+from ..zobrist import zobrist_hash, zobrist_key_of_atom
 
 ALL_MOVES = "all"
 
@@ -17,6 +20,7 @@ START_PARTY_BLACK = "BLACK"
 
 _SETUP_EXTRACTOR = re.compile("SETUP\\{([^}]+)\\}", re.MULTILINE)
 _MOVES_EXTRACTOR = re.compile("START\\{([^}]+)\\}END", re.MULTILINE)
+_FORMAT_HEADER_EXTRACTOR = re.compile("^FORMAT[ \t]+WXF", re.MULTILINE)
 _SINGLE_MOVE_EXTRACTOR = re.compile(
     "(?P<piece_code>[A-Za-z])(?P<former_column>[1-9+=-])(?P<operator>[.+-])(?P<argument>[1-9])"
 )
@@ -107,9 +111,25 @@ class _Board:
     def __init__(self):
         self._board = [[None for _column in range(9)] for _row in range(10)]
         self._move_locations = set()
+        # Maps pairs of (party, piece type) to sets of (x, y) locations
+        self._locations_of_party_piece = defaultdict(set)
+        # Zobrist hash of the pieces on the board, updated with every put and removal
+        self._pieces_zobrist_hash = 0
+
+    def _remove_at(self, x: int, y: int):
+        former_piece = self._board[y][x]
+        if former_piece is not None:
+            self._locations_of_party_piece[(former_piece.party, former_piece.piece)].discard(
+                (x, y)
+            )
+            self._pieces_zobrist_hash ^= zobrist_key_of_atom(former_piece)
+            self._board[y][x] = None
 
     def put(self, piece: PutPiece):
+        self._remove_at(piece.x, piece.y)
         self._board[piece.y][piece.x] = piece
+        self._locations_of_party_piece[(piece.party, piece.piece)].add((piece.x, piece.y))
+        self._pieces_zobrist_hash ^= zobrist_key_of_atom(piece)
 
     @staticmethod
     def _calculate_destination_of_move(put_piece: PutPiece, operator: str, argument: str):
@@ -152,7 +172,10 @@ class _Board:
         return new_x, new_y
 
     def _locate_piece(self, party: int, piece_code: str, former_column: str):
-        piece_type = PIECE_OF_UPPER_LETTER[piece_code.upper()]
+        try:
+            piece_type = PIECE_OF_UPPER_LETTER[piece_code.upper()]
+        except KeyError:
+            raise ValueError(f"Malformed WXF move piece code: {piece_code!r}")
         view = _PlayerRelativeView(party)
 
         if former_column in ("+", "=", "-"):  # with two pieces on same column/file
@@ -169,17 +192,14 @@ class _Board:
             look_for = _SINGLE_PIECE
             piece_x = view.x_index_from(int(former_column))
 
-        candidates = []
-        for y, row in enumerate(self._board):
-            for x, field in enumerate(row):
-                if (
-                    field is None
-                    or (look_for == _SINGLE_PIECE and x != piece_x)
-                    or field.piece != piece_type
-                    or field.party != party
-                ):
-                    continue
-                candidates.append(field)
+        # NOTE: Sorting by row first keeps the order of a full scan of the board
+        candidates = [
+            self._board[y][x]
+            for x, y in sorted(
+                self._locations_of_party_piece[(party, piece_type)], key=lambda xy: (xy[1], xy[0])
+            )
+            if look_for != _SINGLE_PIECE or x == piece_x
+        ]
 
         if look_for == _UPPER_PIECE:
             assert len(candidates) in (2, 3)
@@ -210,23 +230,18 @@ class _Board:
 
         new_x, new_y = self._calculate_destination_of_move(put_piece, operator, argument)
 
-        self._board[put_piece.y][put_piece.x] = None
-        self._board[new_y][new_x] = put_piece
-
         if annotate:
             self._move_locations.add((put_piece.x, put_piece.y))
             self._move_locations.add((new_x, new_y))
 
-        put_piece.x = new_x
-        put_piece.y = new_y
+        self._remove_at(put_piece.x, put_piece.y)
+        # i.e. capturing any piece at the destination
+        self.put(PutPiece(put_piece.party, put_piece.piece, new_x, new_y))
 
-    def iterate_tokens(self):
-        for row in self._board:
-            for piece in row:
-                if piece is None:
-                    continue
-                yield piece
+    def forget_move_locations(self):
+        self._move_locations.clear()
 
+    def _iterate_move_annotations(self):
         for move_location in self._move_locations:
             x, y = move_location
             location_blank = self._board[y][x] is None
@@ -235,8 +250,31 @@ class _Board:
             )
             yield PutAnnotation(annotation_name, x, y)
 
+    def iterate_tokens(self):
+        # NOTE: Pieces are immutable so they can be yielded without copying
+        for row in self._board:
+            for piece in row:
+                if piece is not None:
+                    yield piece
+
+        yield from self._iterate_move_annotations()
 
-def iterate_wxf_tokens(content: str, moves_to_play: str, annotate_last_move: bool):
+    def zobrist_hash(self) -> int:
+        """
+        Returns the same as zobrist_hash(self.iterate_tokens())
+        without iterating the whole board
+        """
+        return self._pieces_zobrist_hash ^ zobrist_hash(self._iterate_move_annotations())
+
+
+def is_wxf_content(content: str) -> bool:
+    return any(
+        extractor.search(content) is not None
+        for extractor in (_FORMAT_HEADER_EXTRACTOR, _MOVES_EXTRACTOR, _SETUP_EXTRACTOR)
+    )
+
+
+def _read_wxf(content: str):
     board = _Board()
 
     fen_match = _FEN_EXTRACTOR.search(content)
@@ -270,37 +308,96 @@ def iterate_wxf_tokens(content: str, moves_to_play: str, annotate_last_move: boo
     if moves_match:
         moves_body = moves_match.group(1)
         available_moves = list(re.finditer(_SINGLE_MOVE_EXTRACTOR, moves_body))
+    else:
+        available_moves = None
 
-        if moves_to_play == ALL_MOVES:
-            included_moves = available_moves
-        else:
-            slice_stop = int(moves_to_play)
-            if slice_stop > len(available_moves) or slice_stop < -len(available_moves):
-                raise ValueError(
-                    f"Requested number of moves {slice_stop!r} outside of range of {-len(available_moves)} to {len(available_moves)}"
-                )
-            included_moves = available_moves[:slice_stop]
-
-        # NOTE: We flip the party after every move rather than relying on
-        #       the case of the piece letter (upper- or lowercase) because
-        #       software XieXie seems to use uppercase letters all the time,
-        #       even when it is Black's turn.
-        party = starting_party
-        for i, single_move in enumerate(included_moves):
-            party_human = "Red" if party == RED else "Black"
-            move_human = single_move.group(0)
-            if party == BLACK:
-                move_human = move_human.lower()  # again because of XieXie's all-uppercase
-            print(
-                f"Applying move {i + 1:>2}: Move {i // 2 + 1:>2} of {party_human:<5}: {move_human}"
-            )
-            annotate = annotate_last_move and (i == len(included_moves) - 1)
+    return board, starting_party, available_moves
+
+
+def _resolve_ply(moves_to_play: str, available_move_count: int) -> int:
+    if moves_to_play == ALL_MOVES:
+        return available_move_count
+
+    slice_stop = int(moves_to_play)
+    if slice_stop > available_move_count or slice_stop < -available_move_count:
+        raise ValueError(
+            f"Requested number of moves {slice_stop!r} outside of range of {-available_move_count} to {available_move_count}"
+        )
+    return len(range(available_move_count)[:slice_stop])
+
+
+def iterate_wxf_hashed_positions(
+    content: str, moves_to_play: str, annotate_last_move: bool, every_nth_ply: int | None = None
+):
+    """
+    Same as iterate_wxf_positions but yields triples of (ply, Zobrist hash, atoms)
+    with the hash maintained incrementally while replaying the game.
+    """
+    board, starting_party, available_moves = _read_wxf(content)
+
+    if available_moves is None:
+        # NOTE: Without any moves, there is nothing to play
+        #       so requested move counts are not checked either.
+        yield 0, board.zobrist_hash(), list(board.iterate_tokens())
+        return
+
+    if every_nth_ply is not None:
+        plies = list(range(every_nth_ply, len(available_moves) + 1, every_nth_ply))
+    else:
+        plies = sorted(
+            {_resolve_ply(text, len(available_moves)) for text in moves_to_play.split(",")}
+        )
+
+    if 0 in plies:
+        yield 0, board.zobrist_hash(), list(board.iterate_tokens())
+
+    if not plies:
+        return
+
+    # NOTE: We flip the party after every move rather than relying on
+    #       the case of the piece letter (upper- or lowercase) because
+    #       software XieXie seems to use uppercase letters all the time,
+    #       even when it is Black's turn.
+    party = starting_party
+    for i, single_move in enumerate(available_moves[: plies[-1]]):
+        party_human = "Red" if party == RED else "Black"
+        move_human = single_move.group(0)
+        if party == BLACK:
+            move_human = move_human.lower()  # again because of XieXie's all-uppercase
+        print(f"Applying move {i + 1:>2}: Move {i // 2 + 1:>2} of {party_human:<5}: {move_human}")
+
+        ply = i + 1
+        with timed("replay_wxf"):
+            board.forget_move_locations()
+            board.move(party=party, annotate=annotate_last_move, **single_move.groupdict())
+
+        if ply in plies:
+            yield ply, board.zobrist_hash(), list(board.iterate_tokens())
+
+        party = {
+            RED: BLACK,
+            BLACK: RED,
+        }[party]
+
+
+def iterate_wxf_positions(
+    content: str, moves_to_play: str, annotate_last_move: bool, every_nth_ply: int | None = None
+):
+    """
+    Replays the game once and yields pairs of (ply, atoms) for each
+    requested ply in ascending order.  Plies are either given as a
+    comma-separated list of move counts (with the same semantics as
+    for iterate_wxf_tokens, e.g. "10,20,-1") or by every_nth_ply.
+    """
+    for ply, _zobrist_hash, atoms in iterate_wxf_hashed_positions(
+        content, moves_to_play, annotate_last_move, every_nth_ply
+    ):
+        yield ply, atoms
 
-            board.move(party=party, annotate=annotate, **single_move.groupdict())
 
-            party = {
-                RED: BLACK,
-                BLACK: RED,
-            }[party]
+def iterate_wxf_tokens(content: str, moves_to_play: str, annotate_last_move: bool):
+    if "," in moves_to_play:
+        raise ValueError(f"Expected a single number of moves, got {moves_to_play!r}")
 
-    yield from board.iterate_tokens()
+    for _ply, atoms in iterate_wxf_positions(content, moves_to_play, annotate_last_move):
+        yield from atoms
@@ -0,0 +1,84 @@
+# Copyright (C) 2026 Sebastian Pipping <sebastian@pipping.org>
+# Licensed under GNU Affero General Public License version 3.0 or later
+
+"""
+Archives of many WXF games concatenated into a single file, as exported
+by game servers and databases.  The file is memory-mapped and split into
+games lazily, so that only the game at hand is ever held as a Python string.
+Games are decoded only once accessed, so that a game that fails to decode
+can be reported and skipped like any other broken game.
+"""
+
+import mmap
+import re
+
+from .wxf import iterate_wxf_hashed_positions, iterate_wxf_positions, iterate_wxf_tokens
+
+# Every game starts with a FORMAT header line, e.g. "FORMAT  WXF",
+# the first one possibly after a UTF-8 byte order mark
+_GAME_START_EXTRACTOR = re.compile(rb"^(?:\xef\xbb\xbf)?FORMAT[ \t]", re.MULTILINE)
+
+_ENCODING = "utf-8"
+
+
+class WxfGame:
+    def __init__(self, index: int, offset: int, data: bytes):
+        self.index = index  # zero-based number of the game in the archive
+        self.offset = offset  # of the first byte of the game in the archive file
+        self.data = data
+
+    @property
+    def content(self) -> str:
+        """
+        The game decoded to text;  raises UnicodeDecodeError for malformed games
+        """
+        return self.data.decode(_ENCODING)
+
+    def iterate_positions(
+        self, moves_to_play: str, annotate_last_move: bool, every_nth_ply: int | None = None
+    ):
+        return iterate_wxf_positions(
+            self.content, moves_to_play, annotate_last_move, every_nth_ply
+        )
+
+    def iterate_hashed_positions(
+        self, moves_to_play: str, annotate_last_move: bool, every_nth_ply: int | None = None
+    ):
+        return iterate_wxf_hashed_positions(
+            self.content, moves_to_play, annotate_last_move, every_nth_ply
+        )
+
+    def iterate_tokens(self, moves_to_play: str, annotate_last_move: bool):
+        return iterate_wxf_tokens(self.content, moves_to_play, annotate_last_move)
+
+    def __repr__(self):
+        return f"WxfGame(index={self.index!r}, offset={self.offset!r})"
+
+
+def _iterate_game_spans(buffer):
+    previous_start = None
+    for match in _GAME_START_EXTRACTOR.finditer(buffer):
+        if previous_start is not None:
+            yield previous_start, match.start()
+        previous_start = match.start()
+
+    if previous_start is None:
+        yield 0, len(buffer)  # i.e. a single game without a FORMAT header
+    else:
+        yield previous_start, len(buffer)
+
+
+def iterate_wxf_archive_games(filename: str):
+    """
+    Yields a WxfGame for every game of the given WXF archive file, in file order;
+    anything before the first FORMAT header line is ignored.
+    """
+    with open(filename, "rb") as f:
+        try:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # i.e. an empty file, which cannot be mapped
+            return
+
+    with buffer:
+        for index, (start, stop) in enumerate(_iterate_game_spans(buffer)):
+            yield WxfGame(index, start, buffer[start:stop])
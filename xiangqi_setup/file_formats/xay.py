@@ -1,24 +1,47 @@
 # Copyright (C) 2021 Sebastian Pipping <sebastian@pipping.org>
 # Licensed under GNU Affero General Public License version 3.0 or later
 
-import yaml
+import re
 
 from ..annotations import ANNOTATION_NAME_OF_ATOM_CODE, PutAnnotation
 from ..parties import BLACK, RED
 from ..pieces import PutPiece
 from .fen import PIECE_OF_UPPER_LETTER
 
+_SETUP_KEY_EXTRACTOR = re.compile("^[\"']?setup[\"']?[ \t]*:", re.MULTILINE)
+
+# For documents that are a flow mapping, e.g. "{version: '1', setup: [...]}"
+_FLOW_MAPPING_START_EXTRACTOR = re.compile(
+    "\\A(?:[ \t]*(?:#[^\n]*)?\r?\n)*(?:---[ \t\r\n]+)?[ \t]*\\{"
+)
+_FLOW_SETUP_KEY_EXTRACTOR = re.compile("[{,][ \t\r\n]*[\"']?setup[\"']?[ \t\r\n]*:")
+
 
 def is_xay_content(content: str) -> bool:
-    try:
-        document = yaml.safe_load(content)
-        return isinstance(document, dict) and "setup" in document
-    except yaml.error.MarkedYAMLError:
-        return False
+    # NOTE: This looks for key "setup" at the document root without parsing the YAML;
+    #       parsing is left to parse_xay_document so that it happens only once.
+    if _SETUP_KEY_EXTRACTOR.search(content) is not None:
+        return True
+    return (
+        _FLOW_MAPPING_START_EXTRACTOR.match(content) is not None
+        and _FLOW_SETUP_KEY_EXTRACTOR.search(content) is not None
+    )
 
 
-def iterate_xay_tokens(content: str):
+def parse_xay_document(content: str) -> dict:
+    import yaml  # i.e. only when needed, for faster startup
+
     document = yaml.safe_load(content)
+    if not isinstance(document, dict) or "setup" not in document:
+        raise ValueError("Malformed XAY document, expected a mapping with key 'setup'")
+    return document
+
+
+def iterate_xay_tokens(content: str):
+    yield from iterate_xay_document_tokens(parse_xay_document(content))
+
+
+def iterate_xay_document_tokens(document: dict):
     xay_format_version = document["version"]
     if xay_format_version != "1":
         raise ValueError(f"Unsupported XAY file format version {xay_format_version!r}")
@@ -5,6 +5,8 @@ import json
 import os
 from textwrap import dedent
 
+from .theme_bundle import load_theme_bundle
+
 _LICENSE_DETAILS = {
     "CC-BY-4.0": (
         "Creative Commons Attribution 4.0",
@@ -38,6 +40,10 @@ def _get_license_json_path(single_theme_dir):
 
 
 def _get_license_json(single_theme_dir):
+    bundle = load_theme_bundle(single_theme_dir)
+    if bundle is not None:
+        return bundle["license"]["work"]
+
     license_json_path = _get_license_json_path(single_theme_dir)
     f = open(license_json_path)
     content = f.read()
@@ -49,18 +55,49 @@ def _get_license_json(single_theme_dir):
     return doc["work"]
 
 
-def get_license_choices_of_theme(single_theme_dir):
+def read_license_of_theme(single_theme_dir) -> tuple[list[str], list[str]]:
+    """
+    Reads the license file of the given theme
+    and returns a pair of (license choices, author display names)
+    """
     top_work = _get_license_json(single_theme_dir)
+
+    author_chunks = []
+    for author_dict in top_work["authors"]:
+        for author_name, details_dict in list(author_dict.items()):
+            contact_infos = []
+
+            if "website" in details_dict:
+                contact_infos.append(details_dict["website"])
+
+            if "email" in details_dict:
+                contact_infos.append("%s@%s" % tuple(details_dict["email"]))
+
+            if contact_infos:
+                author_display = "{} ({})".format(author_name, ", ".join(contact_infos))
+            else:
+                author_display = author_name
+
+            author_chunks.append(author_display)
+
     try:
-        return [top_work["license_id"]]
+        license_ids_any_of = [top_work["license_id"]]
     except KeyError:
         try:
-            return top_work["license_ids_any_of"]
+            license_ids_any_of = top_work["license_ids_any_of"]
         except KeyError:
             raise ValueError(
                 'Malformed license file "%s"' % _get_license_json_path(single_theme_dir)
             )
 
+    return license_ids_any_of, author_chunks
+
+
+def get_license_choices_of_theme(single_theme_dir):
+    from .theme_registry import get_theme_info  # i.e. not at module level for a cycle
+
+    return get_theme_info(single_theme_dir).license_ids
+
 
 def _describe_license(license_id):
     try:
@@ -75,6 +112,8 @@ def _describe_license(license_id):
 
 
 def inform_license(board_theme_dir, piece_theme_dir, annotation_theme_dir):
+    from .theme_registry import get_theme_info  # i.e. not at module level for a cycle
+
     print("The license of the themes used apply to the generated image.  In detail:")
     print()
 
@@ -83,34 +122,9 @@ def inform_license(board_theme_dir, piece_theme_dir, annotation_theme_dir):
         ("Piece", piece_theme_dir),
         ("Annotations", annotation_theme_dir),
     ):
-        top_work = _get_license_json(theme_dir)
-
-        author_chunks = []
-        for author_dict in top_work["authors"]:
-            for author_name, details_dict in list(author_dict.items()):
-                contact_infos = []
-
-                if "website" in details_dict:
-                    contact_infos.append(details_dict["website"])
-
-                if "email" in details_dict:
-                    contact_infos.append("%s@%s" % tuple(details_dict["email"]))
-
-                if contact_infos:
-                    author_display = "{} ({})".format(author_name, ", ".join(contact_infos))
-                else:
-                    author_display = author_name
-
-                author_chunks.append(author_display)
-        authors = "\n".join(("    " + e) for e in author_chunks)
-
-        try:
-            license_ids_any_of = [top_work["license_id"]]
-        except KeyError:
-            try:
-                license_ids_any_of = top_work["license_ids_any_of"]
-            except KeyError:
-                raise ValueError('Malformed license file "%s"' % _get_license_json_path(theme_dir))
+        theme_info = get_theme_info(theme_dir)
+        authors = "\n".join(("    " + e) for e in theme_info.authors)
+        license_ids_any_of = theme_info.license_ids
 
         if len(license_ids_any_of) == 1:
             license_options = "    %s" % _describe_license(license_ids_any_of[0])
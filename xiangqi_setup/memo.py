@@ -0,0 +1,142 @@
+# Copyright (C) 2026 Sebastian Pipping <sebastian@pipping.org>
+# Licensed under GNU Affero General Public License version 3.0 or later
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from .compose import compose_svg_document
+from .positions import canonical_position
+
+DEFAULT_MEMO_MAX_BYTES = 64 * 1024 * 1024
+
+# Options that affect the rendered output, in canonical order
+_RENDER_OPTION_NAMES = (
+    "board_theme_dir",
+    "piece_theme_dir",
+    "annotation_theme_dir",
+    "width_pixel",
+    "resolution_dpi",
+    "piece_scale",
+    "annotation_scale",
+    "use_defs",
+    "optimize",
+    "optimize_precision",
+    "debug",
+)
+
+
+_THEME_DIR_OPTION_NAMES = ("board_theme_dir", "piece_theme_dir", "annotation_theme_dir")
+
+# Theme directories are scanned for edits at most this often
+_THEME_SCAN_INTERVAL_SECONDS = 1.0
+
+# Maps theme directories to pairs of (time of scan, latest modification time)
+_theme_mtime_cache: dict[str, tuple[float, int]] = {}
+
+
+def _theme_mtime_ns(theme_dir: str) -> int:
+    now = time.monotonic()
+    try:
+        scanned, mtime_ns = _theme_mtime_cache[theme_dir]
+    except KeyError:
+        pass
+    else:
+        if now - scanned < _THEME_SCAN_INTERVAL_SECONDS:
+            return mtime_ns
+
+    try:
+        with os.scandir(theme_dir) as entries:
+            mtime_ns = max((entry.stat().st_mtime_ns for entry in entries), default=0)
+    except OSError:
+        mtime_ns = 0  # i.e. leave error reporting to rendering
+    _theme_mtime_cache[theme_dir] = (now, mtime_ns)
+    return mtime_ns
+
+
+def render_key(atoms_to_put, options) -> str:
+    """
+    Returns a hash of everything that the rendered output depends on;
+    atoms are sorted so that the order they were read in does not matter.
+    Edits to theme files change the key too, once the theme is re-scanned.
+    """
+    atoms = canonical_position(atoms_to_put)
+    values = tuple(getattr(options, name) for name in _RENDER_OPTION_NAMES)
+    theme_mtimes_ns = tuple(
+        _theme_mtime_ns(getattr(options, name)) for name in _THEME_DIR_OPTION_NAMES
+    )
+    return hashlib.sha256(repr((atoms, values, theme_mtimes_ns)).encode()).hexdigest()
+
+
+class RenderMemo:
+    """
+    Thread-safe mapping of render keys to rendered output with
+    least-recently-used eviction once the given byte budget is exceeded.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MEMO_MAX_BYTES):
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._output_of_key = OrderedDict()
+        self._byte_count = 0
+        self._hit_count = 0
+        self._miss_count = 0
+        self._eviction_count = 0
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            try:
+                output = self._output_of_key[key]
+            except KeyError:
+                self._miss_count += 1
+                return None
+            self._output_of_key.move_to_end(key)
+            self._hit_count += 1
+            return output
+
+    def put(self, key: str, output: bytes):
+        if len(output) > self._max_bytes:
+            return  # i.e. would evict everything else but still not fit
+
+        with self._lock:
+            previous_output = self._output_of_key.pop(key, None)
+            if previous_output is not None:
+                self._byte_count -= len(previous_output)
+
+            self._output_of_key[key] = output
+            self._byte_count += len(output)
+
+            while self._byte_count > self._max_bytes:
+                _, evicted_output = self._output_of_key.popitem(last=False)
+                self._byte_count -= len(evicted_output)
+                self._eviction_count += 1
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self._hit_count,
+                "misses": self._miss_count,
+                "evictions": self._eviction_count,
+                "entries": len(self._output_of_key),
+                "bytes": self._byte_count,
+                "max_bytes": self._max_bytes,
+            }
+
+
+def compose_svg_bytes(atoms_to_put, options, memo: RenderMemo | None = None) -> bytes:
+    """
+    Renders to SVG like compose_svg_document does,
+    re-using earlier output for identical renders if a memo is given
+    """
+    if memo is None:
+        return compose_svg_document(atoms_to_put, options)
+
+    atoms_to_put = list(atoms_to_put)
+    key = render_key(atoms_to_put, options)
+    svg_bytes = memo.get(key)
+    if svg_bytes is None:
+        svg_bytes = compose_svg_document(atoms_to_put, options)
+        memo.put(key, svg_bytes)
+    return svg_bytes
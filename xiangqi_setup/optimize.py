@@ -0,0 +1,637 @@
+# Copyright (C) 2026 Sebastian Pipping <sebastian@pipping.org>
+# Licensed under GNU Affero General Public License version 3.0 or later
+
+"""
+Minification of SVG documents:  removal of what does not affect rendering
+(comments, metadata, editor-specific markup, indentation, unused ids and
+redundant groups) and rounding of numbers to a given number of significant digits.
+"""
+
+import math
+import re
+
+from lxml import etree
+
+_SVG_NAMESPACE = "http://www.w3.org/2000/svg"
+
+# Namespaces of editor-only markup, e.g. window geometry and layer names
+_EDITOR_NAMESPACES = {
+    "http://www.inkscape.org/namespaces/inkscape",
+    "http://sodipodi.sourceforge.net/DTD/sodipodi-0.dtd",
+}
+
+# Elements where whitespace is content rather than indentation
+_TEXT_TAGS = {
+    f"{{{_SVG_NAMESPACE}}}{local_name}" for local_name in ("style", "text", "textPath", "tspan")
+}
+
+# Prefix of editor-only style properties, e.g. "-inkscape-font-specification"
+_EDITOR_STYLE_PROPERTY_PREFIX = "-inkscape-"
+
+_DEFS_TAG = f"{{{_SVG_NAMESPACE}}}defs"
+_GROUP_TAG = f"{{{_SVG_NAMESPACE}}}g"
+_STYLE_TAG = f"{{{_SVG_NAMESPACE}}}style"
+_SWITCH_TAG = f"{{{_SVG_NAMESPACE}}}switch"
+
+# Elements that a transform of a parent group can be moved onto
+_TRANSFORMABLE_TAGS = {
+    f"{{{_SVG_NAMESPACE}}}{local_name}"
+    for local_name in (
+        "circle",
+        "ellipse",
+        "g",
+        "image",
+        "line",
+        "path",
+        "polygon",
+        "polyline",
+        "rect",
+        "text",
+        "use",
+    )
+}
+
+# Attributes holding coordinates, lengths or transforms (but no colors or names)
+_NUMERIC_ATTRIBUTE_NAMES = {
+    "cx",
+    "cy",
+    "d",
+    "fx",
+    "fy",
+    "gradientTransform",
+    "height",
+    "patternTransform",
+    "points",
+    "r",
+    "rx",
+    "ry",
+    "stroke-width",
+    "transform",
+    "viewBox",
+    "width",
+    "x",
+    "x1",
+    "x2",
+    "y",
+    "y1",
+    "y2",
+}
+
+_NUMBER_PATTERN = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+
+# References by id, e.g. href="#a", fill="url(#a)" or "#a { ... }" in a style sheet
+_REFERENCE_PATTERN = re.compile(r"#([A-Za-z_][\w.:-]*)")
+
+
+def _namespace_of(qualified_name: str) -> str | None:
+    if qualified_name.startswith("{"):
+        return qualified_name[1:].split("}", 1)[0]
+    return None
+
+
+def _iterate_elements(root):
+    # NOTE: Comments and processing instructions have non-string tags
+    return (element for element in root.iter() if isinstance(element.tag, str))
+
+
+def strip_editor_markup(root):
+    for element in list(_iterate_elements(root)):
+        if (
+            element.tag == f"{{{_SVG_NAMESPACE}}}metadata"
+            or _namespace_of(element.tag) in _EDITOR_NAMESPACES
+        ):
+            element.getparent().remove(element)
+            continue
+        for attribute_name in list(element.attrib):
+            if _namespace_of(attribute_name) in _EDITOR_NAMESPACES:
+                del element.attrib[attribute_name]
+
+    etree.cleanup_namespaces(root)
+
+
+def _strip_editor_style_properties(root):
+    for element in _iterate_elements(root):
+        style = element.get("style")
+        if style is None or _EDITOR_STYLE_PROPERTY_PREFIX not in style:
+            continue
+        declarations = [
+            declaration
+            for declaration in style.split(";")
+            if not declaration.strip().startswith(_EDITOR_STYLE_PROPERTY_PREFIX)
+        ]
+        element.set("style", ";".join(declarations))
+
+
+def _strip_comments(root):
+    for node in list(root.iter(etree.Comment, etree.ProcessingInstruction)):
+        parent = node.getparent()
+        if parent is None:
+            continue  # i.e. outside of the root element
+        if node.tail:  # i.e. keep text following the node
+            previous = node.getprevious()
+            if previous is None:
+                parent.text = (parent.text or "") + node.tail
+            else:
+                previous.tail = (previous.tail or "") + node.tail
+        parent.remove(node)
+
+
+def strip_indentation(root):
+    for element in root.iter():
+        if element.tag not in _TEXT_TAGS and element.text is not None and not element.text.strip():
+            element.text = None
+        parent = element.getparent()
+        if (parent is None or parent.tag not in _TEXT_TAGS) and element.tail is not None:
+            if not element.tail.strip():
+                element.tail = None
+
+
+def _drop_unused_ids(root):
+    referenced_ids = set()
+    for element in _iterate_elements(root):
+        for value in element.attrib.values():
+            referenced_ids.update(_REFERENCE_PATTERN.findall(value))
+        if element.tag == _STYLE_TAG and element.text:
+            referenced_ids.update(_REFERENCE_PATTERN.findall(element.text))
+
+    for element in _iterate_elements(root):
+        if element.get("id") not in referenced_ids:
+            element.attrib.pop("id", None)
+
+
+def _replace_by_children(element):
+    parent = element.getparent()
+    index = parent.index(element)
+    parent[index : index + 1] = list(element)
+
+
+def _collapse_groups(root):
+    for defs in list(root.iter(_DEFS_TAG)):
+        if len(defs) == 0 and "id" not in defs.attrib:
+            defs.getparent().remove(defs)
+
+    # NOTE: Reverse document order handles nested groups from the inside out
+    for group in reversed(list(root.iter(_GROUP_TAG))):
+        parent = group.getparent()
+        if parent is None or parent.tag == _SWITCH_TAG or group.text or group.tail:
+            continue  # i.e. grouping affects which child is rendered or text content
+
+        if len(group) == 0:
+            if "id" not in group.attrib:
+                parent.remove(group)
+        elif not group.attrib:
+            _replace_by_children(group)
+        elif (
+            set(group.attrib) == {"transform"}
+            and len(group) == 1
+            and group[0].tag in _TRANSFORMABLE_TAGS
+            and "transform" not in group[0].get("style", "")  # i.e. would take precedence
+        ):
+            # Moving the transform down keeps the user space of the child intact
+            child = group[0]
+            child.set(
+                "transform", f"{group.get('transform')} {child.get('transform', '')}".strip()
+            )
+            _replace_by_children(group)
+
+
+def _format_number(value: float, significant_digits: int) -> str:
+    if value == 0.0:
+        return "0"
+    decimals = significant_digits - 1 - math.floor(math.log10(abs(value)))
+    text = f"{round(value, decimals):.{max(decimals, 0)}f}"
+    if "." in text:
+        text = text.rstrip("0").rstrip(".")
+    if text.startswith("0."):
+        text = text[1:]
+    elif text.startswith("-0."):
+        text = "-" + text[2:]
+    return "0" if text in ("", "-0") else text
+
+
+def _round_numbers_in(text: str, significant_digits: int) -> str:
+    def replace(match):
+        original_text = match.group(0)
+        value = float(original_text)
+        rounded_text = _format_number(value, significant_digits)
+        # NOTE: Tokens that rounding does not change are kept as they are,
+        #       e.g. arc flags written without separators like "0110"
+        if float(rounded_text) == value:
+            return original_text
+
+        # NOTE: Numbers may follow each other without a separator, e.g. "2.99999.5"
+        #       for 2.99999 and .5, which must not merge once rounded, e.g. into "3.5"
+        is_fraction = "." in rounded_text or "e" in rounded_text.lower()
+        next_char = text[match.end() : match.end() + 1]
+        if not is_fraction and (next_char == "." or next_char.isdigit()):
+            rounded_text += " "
+        previous_char = text[match.start() - 1 : match.start()]
+        if rounded_text[0].isdigit() and (previous_char == "." or previous_char.isdigit()):
+            rounded_text = " " + rounded_text
+        return rounded_text
+
+    return " ".join(_NUMBER_PATTERN.sub(replace, text).split())
+
+
+def _round_numbers(root, significant_digits: int):
+    for element in _iterate_elements(root):
+        for attribute_name, value in element.attrib.items():
+            if attribute_name in _NUMERIC_ATTRIBUTE_NAMES:
+                element.set(attribute_name, _round_numbers_in(value, significant_digits))
+
+
+def optimize_svg(root, precision: int):
+    """
+    Minifies the given SVG document (an lxml root element) in place,
+    rounding coordinates, lengths and transforms to the given number
+    of significant digits
+    """
+    _strip_comments(root)
+    strip_editor_markup(root)
+    _strip_editor_style_properties(root)
+    strip_indentation(root)
+    _drop_unused_ids(root)
+    _collapse_groups(root)
+    _round_numbers(root, precision)
+
+
+def serialize_svg(root) -> bytes:
+    """
+    Serializes an optimized SVG document without adding indentation back
+    """
+    return etree.tostring(root, xml_declaration=True, standalone=True)
+
+
+# Initial values of inherited properties that themes commonly spell out
+_INHERITED_INITIAL_VALUES = {
+    "clip-rule": "nonzero",
+    "color": "#000000",
+    "fill": "#000000",
+    "fill-opacity": "1",
+    "fill-rule": "nonzero",
+    "marker-end": "none",
+    "marker-mid": "none",
+    "marker-start": "none",
+    "stroke": "none",
+    "stroke-dasharray": "none",
+    "stroke-dashoffset": "0",
+    "stroke-linecap": "butt",
+    "stroke-linejoin": "miter",
+    "stroke-miterlimit": "4",
+    "stroke-opacity": "1",
+    "stroke-width": "1",
+    "visibility": "visible",
+}
+
+# Initial values of properties that are not inherited
+_NON_INHERITED_INITIAL_VALUES = {
+    "clip-path": "none",
+    "display": "inline",
+    "enable-background": "accumulate",
+    "filter": "none",
+    "mask": "none",
+    "opacity": "1",
+}
+
+# Properties that only affect text (or lengths in units em and ex)
+_TEXT_PROPERTIES = {
+    "baseline-shift",
+    "direction",
+    "dominant-baseline",
+    "font",
+    "font-family",
+    "font-size",
+    "font-stretch",
+    "font-style",
+    "font-variant",
+    "font-weight",
+    "letter-spacing",
+    "line-height",
+    "text-align",
+    "text-anchor",
+    "text-decoration",
+    "writing-mode",
+    "word-spacing",
+}
+
+_COLOR_PROPERTIES = {"color", "fill", "flood-color", "lighting-color", "stop-color", "stroke"}
+
+_COLOR_KEYWORD_VALUES = {"black": "#000000", "white": "#ffffff"}
+
+# Elements that text properties apply to (or that may reference text elsewhere)
+_TEXT_RELEVANT_LOCAL_NAMES = {
+    "flowDiv",
+    "flowPara",
+    "flowRoot",
+    "flowSpan",
+    "text",
+    "textPath",
+    "tref",
+    "tspan",
+    "use",
+}
+
+# Elements establishing a viewport, where property "overflow" has an effect
+_VIEWPORT_LOCAL_NAMES = {"foreignObject", "image", "marker", "pattern", "svg", "symbol"}
+
+_FONT_RELATIVE_LENGTH_PATTERN = re.compile(r"\d(?:em|ex)\b")
+
+_FLOW_ROOT_TAG = f"{{{_SVG_NAMESPACE}}}flowRoot"
+
+_PATH_TAG = f"{{{_SVG_NAMESPACE}}}path"
+_USE_TAG = f"{{{_SVG_NAMESPACE}}}use"
+
+# Number of arguments per path command
+_PATH_ARGUMENT_COUNT_OF_COMMAND = {
+    "a": 7,
+    "c": 6,
+    "h": 1,
+    "l": 2,
+    "m": 2,
+    "q": 4,
+    "s": 4,
+    "t": 2,
+    "v": 1,
+    "z": 0,
+}
+
+_PATH_SEPARATOR_PATTERN = re.compile(r"[\s,]*")
+_PATH_NUMBER_PATTERN = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+_PATH_FLAG_PATTERN = re.compile(r"[01]")
+
+
+def _local_name_of(tag) -> str | None:
+    if not isinstance(tag, str):
+        return None
+    return tag.rsplit("}", 1)[-1]
+
+
+def _parse_style(style: str) -> dict[str, str]:
+    declarations = {}
+    for declaration in style.split(";"):
+        name, colon, value = declaration.partition(":")
+        if colon:
+            declarations[name.strip()] = value.strip()
+    return declarations
+
+
+def _format_style(declarations: dict[str, str]) -> str:
+    return ";".join(f"{name}:{value}" for name, value in declarations.items())
+
+
+def _normalize_value(name: str, value: str) -> str:
+    value = value.strip().lower()
+    if name in _COLOR_PROPERTIES:
+        value = _COLOR_KEYWORD_VALUES.get(value, value)
+        if len(value) == 4 and value.startswith("#"):
+            value = "#" + "".join(2 * digit for digit in value[1:])
+        return value
+    try:
+        return repr(float(value))
+    except ValueError:
+        return value
+
+
+def _shorten_color(value: str) -> str:
+    lower_value = value.lower()
+    if (
+        len(lower_value) == 7
+        and lower_value.startswith("#")
+        and lower_value[1] == lower_value[2]
+        and lower_value[3] == lower_value[4]
+        and lower_value[5] == lower_value[6]
+    ):
+        return "#" + lower_value[1::2]
+    return value
+
+
+def _strip_empty_flow_text(root):
+    # NOTE: Inkscape leaves empty flowed text behind that no renderer displays
+    for flow_root in list(root.iter(_FLOW_ROOT_TAG)):
+        if not "".join(flow_root.itertext()).strip():
+            flow_root.getparent().remove(flow_root)
+
+
+def _find_text_relevant_elements(root) -> set:
+    text_relevant_elements = set()
+    for element in _iterate_elements(root):
+        if _local_name_of(element.tag) in _TEXT_RELEVANT_LOCAL_NAMES or any(
+            _FONT_RELATIVE_LENGTH_PATTERN.search(value) for value in element.attrib.values()
+        ):
+            while element is not None and element not in text_relevant_elements:
+                text_relevant_elements.add(element)
+                element = element.getparent()
+    return text_relevant_elements
+
+
+def _is_redundant_declaration(
+    element, name: str, value: str, inherited: dict[str, str], text_relevant: bool
+) -> bool:
+    if name in element.attrib:
+        return False  # i.e. removal would expose the presentation attribute
+    if name.startswith(_EDITOR_STYLE_PROPERTY_PREFIX):
+        return True
+    if name in _TEXT_PROPERTIES:
+        return not text_relevant
+    if name == "overflow":
+        return _local_name_of(element.tag) not in _VIEWPORT_LOCAL_NAMES
+    normalized_value = _normalize_value(name, value)
+    if name == "marker":
+        return normalized_value == "none" and all(
+            inherited.get(marker_name, "none") == "none"
+            for marker_name in ("marker-start", "marker-mid", "marker-end")
+        )
+    if name in _INHERITED_INITIAL_VALUES:
+        return normalized_value == inherited[name]
+    if name in _NON_INHERITED_INITIAL_VALUES:
+        return normalized_value == _normalize_value(name, _NON_INHERITED_INITIAL_VALUES[name])
+    return False
+
+
+def _clean_styles(root):
+    text_relevant_elements = _find_text_relevant_elements(root)
+
+    def visit(element, inherited):
+        declarations = _parse_style(element.get("style", ""))
+        for name, value in list(declarations.items()):
+            if _is_redundant_declaration(
+                element, name, value, inherited, element in text_relevant_elements
+            ):
+                del declarations[name]
+            elif name in _COLOR_PROPERTIES:
+                declarations[name] = _shorten_color(value)
+        if declarations:
+            element.set("style", _format_style(declarations))
+        else:
+            element.attrib.pop("style", None)
+
+        for name in _COLOR_PROPERTIES & set(element.attrib):
+            element.set(name, _shorten_color(element.get(name)))
+
+        inherited_by_children = dict(inherited)
+        for name in _INHERITED_INITIAL_VALUES:
+            value = declarations.get(name, element.get(name))
+            if value is not None:
+                inherited_by_children[name] = _normalize_value(name, value)
+        if "marker" in declarations:
+            for marker_name in ("marker-start", "marker-mid", "marker-end"):
+                inherited_by_children[marker_name] = _normalize_value(
+                    marker_name, declarations["marker"]
+                )
+
+        for child in element:
+            if isinstance(child.tag, str):
+                visit(child, inherited_by_children)
+
+    visit(
+        root,
+        {name: _normalize_value(name, value) for name, value in _INHERITED_INITIAL_VALUES.items()},
+    )
+
+
+def _hoist_shared_styles(root):
+    # NOTE: Reverse document order handles nested groups from the inside out
+    for group in reversed(list(root.iter(_GROUP_TAG))):
+        children = list(group)
+        if len(children) < 2 or not all(isinstance(child.tag, str) for child in children):
+            continue
+
+        declarations_of_child = [_parse_style(child.get("style", "")) for child in children]
+        shared_declarations = {
+            name: value
+            for name, value in declarations_of_child[0].items()
+            if name in _INHERITED_INITIAL_VALUES and name not in group.attrib
+        }
+        for child, declarations in zip(children, declarations_of_child):
+            for name in list(shared_declarations):
+                if declarations.get(name) != shared_declarations[name] or name in child.attrib:
+                    del shared_declarations[name]
+        if not shared_declarations:
+            continue
+
+        group_declarations = _parse_style(group.get("style", ""))
+        group_declarations.update(shared_declarations)
+        group.set("style", _format_style(group_declarations))
+        for child, declarations in zip(children, declarations_of_child):
+            for name in shared_declarations:
+                del declarations[name]
+            if declarations:
+                child.set("style", _format_style(declarations))
+            else:
+                del child.attrib["style"]
+
+
+def _parse_path_data(path_data: str) -> list[tuple[str, list[float]]]:
+    """
+    Returns the segments of the given path data as pairs of (command, arguments)
+    with implicit repetitions of commands made explicit, or raises ValueError
+    """
+    segments = []
+    position = _PATH_SEPARATOR_PATTERN.match(path_data).end()
+    command = None
+    while position < len(path_data):
+        if path_data[position].isalpha():
+            command = path_data[position]
+            position += 1
+        elif command is None or command in "zZ":
+            raise ValueError(f"Path data {path_data!r} not supported")
+        elif command == "m":
+            command = "l"  # i.e. implicit lineto after moveto
+        elif command == "M":
+            command = "L"
+
+        argument_count = _PATH_ARGUMENT_COUNT_OF_COMMAND.get(command.lower())
+        if argument_count is None:
+            raise ValueError(f"Path command {command!r} not supported")
+
+        arguments = []
+        for i in range(argument_count):
+            position = _PATH_SEPARATOR_PATTERN.match(path_data, position).end()
+            pattern = (
+                _PATH_FLAG_PATTERN if command in "aA" and i in (3, 4) else _PATH_NUMBER_PATTERN
+            )
+            match = pattern.match(path_data, position)
+            if match is None:
+                raise ValueError(f"Path data {path_data!r} not supported")
+            arguments.append(float(match.group(0)))
+            position = match.end()
+        position = _PATH_SEPARATOR_PATTERN.match(path_data, position).end()
+
+        segments.append((command, arguments))
+    return segments
+
+
+def _simplify_path_data(path_data: str, significant_digits: int) -> str:
+    try:
+        segments = _parse_path_data(path_data)
+    except ValueError:
+        return path_data
+
+    chunks = []
+    previous_command = None
+    previous_number_text = None
+    for command, arguments in segments:
+        # Relative lines along an axis have shorter commands
+        if command == "l" and arguments[0] == 0.0 and arguments[1] != 0.0:
+            command, arguments = "v", arguments[1:]
+        elif command == "l" and arguments[1] == 0.0 and arguments[0] != 0.0:
+            command, arguments = "h", arguments[:1]
+
+        implicit = command == previous_command and command not in "mM"
+        implicit |= (previous_command, command) in (("m", "l"), ("M", "L"))
+        if not implicit or command in "zZ":
+            chunks.append(command)
+            previous_number_text = None
+        previous_command = command
+
+        for argument in arguments:
+            number_text = _format_number(argument, significant_digits)
+            if previous_number_text is not None and not (
+                number_text.startswith("-")
+                or (
+                    number_text.startswith(".")
+                    and "." in previous_number_text
+                    and "e" not in previous_number_text
+                )
+            ):
+                chunks.append(" ")
+            chunks.append(number_text)
+            previous_number_text = number_text
+    return "".join(chunks)
+
+
+def _simplify_paths(root, significant_digits: int):
+    for path in root.iter(_PATH_TAG):
+        path_data = path.get("d")
+        if path_data is not None:
+            path.set("d", _simplify_path_data(path_data, significant_digits))
+
+
+def optimize_theme_svg(root, precision: int):
+    """
+    Minifies the given SVG file of a theme (an lxml root element) in place
+    like optimize_svg does and further simplifies paths and style properties.
+    Size and view box of the document are left untouched since they define
+    how large a piece or annotation is put onto the board.
+    """
+    original_root_attributes = {
+        name: root.get(name) for name in ("width", "height", "viewBox") if name in root.attrib
+    }
+
+    optimize_svg(root, precision)
+    _strip_empty_flow_text(root)
+    _simplify_paths(root, precision)
+
+    # NOTE: The assumptions about inheritance below would not hold for style sheets
+    #       (targeting elements by class or id) or for content re-used by <use>
+    #       (that inherits from the <use> element rather than from its parents).
+    if not any(
+        element.tag in (_STYLE_TAG, _USE_TAG) or "class" in element.attrib
+        for element in _iterate_elements(root)
+    ):
+        _clean_styles(root)
+        _hoist_shared_styles(root)
+        _clean_styles(root)
+        _collapse_groups(root)
+
+    root.attrib.update(original_root_attributes)
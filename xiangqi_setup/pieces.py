@@ -1,6 +1,8 @@
 # Copyright (C) 2021 Sebastian Pipping <sebastian@pipping.org>
 # Licensed under GNU Affero General Public License version 3.0 or later
 
+from .parties import BLACK, RED
+
 (
     CHARIOT,
     HORSE,
@@ -11,13 +13,51 @@
     PAWN,
 ) = list(range(7))
 
+_PIECE_COUNT = 7
+
+_BOARD_WIDTH = 9
+_BOARD_HEIGHT = 10
+
+# Number of bytes of a packed position, one per board field
+POSITION_BYTE_COUNT = _BOARD_WIDTH * _BOARD_HEIGHT
+
 
 class PutPiece:
-    def __init__(self, party, piece, x, y):
-        self.party = party
-        self.piece = piece
-        self.x = x
-        self.y = y
+    """
+    Immutable and hashable piece atom.  Pieces on the board are interned,
+    i.e. all equal pieces on the same field are the very same instance.
+    """
+
+    __slots__ = ("party", "piece", "x", "y")
+
+    def __new__(cls, party, piece, x, y):
+        return _INTERNED_PUT_PIECE_OF_KEY.get((party, piece, x, y)) or cls._create(
+            party, piece, x, y
+        )
+
+    @classmethod
+    def _create(cls, party, piece, x, y):
+        self = object.__new__(cls)
+        object.__setattr__(self, "party", party)
+        object.__setattr__(self, "piece", piece)
+        object.__setattr__(self, "x", x)
+        object.__setattr__(self, "y", y)
+        return self
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __reduce__(self):
+        return (PutPiece, (self.party, self.piece, self.x, self.y))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
 
     def __str__(self):
         return "PutPiece(party=%s, piece=%s, x=%d, y=%d)" % (
@@ -27,11 +67,88 @@ class PutPiece:
             self.y,
         )
 
+    __repr__ = __str__
+
     def __eq__(self, other):
-        return (
+        return other is self or (
             isinstance(other, PutPiece)
             and other.party == self.party
             and other.piece == self.piece
             and other.x == self.x
             and other.y == self.y
         )
+
+    def __hash__(self):
+        return hash((self.party, self.piece, self.x, self.y))
+
+
+def _field_index_of(x: int, y: int) -> int:
+    # NOTE: Fields are in FEN order, i.e. from the top left row by row
+    return (_BOARD_HEIGHT - 1 - y) * _BOARD_WIDTH + x
+
+
+# Maps tuples (party, piece, x, y) to interned PutPiece instances
+_INTERNED_PUT_PIECE_OF_KEY = {}
+
+# Maps packed field values to PutPiece instances, per field index
+_PUT_PIECE_OF_CODE_OF_FIELD_INDEX = [{} for _ in range(POSITION_BYTE_COUNT)]
+
+# Maps interned PutPiece instances to pairs (field index, packed field value)
+_FIELD_INDEX_AND_CODE_OF_PUT_PIECE = {}
+
+
+def _intern_put_pieces():
+    for party in (RED, BLACK):
+        for piece in range(_PIECE_COUNT):
+            for y in range(_BOARD_HEIGHT):
+                for x in range(_BOARD_WIDTH):
+                    put_piece = PutPiece._create(party, piece, x, y)
+                    field_index = _field_index_of(x, y)
+                    code = 1 + party * _PIECE_COUNT + piece  # i.e. 0 is an empty field
+                    _INTERNED_PUT_PIECE_OF_KEY[(party, piece, x, y)] = put_piece
+                    _PUT_PIECE_OF_CODE_OF_FIELD_INDEX[field_index][code] = put_piece
+                    _FIELD_INDEX_AND_CODE_OF_PUT_PIECE[put_piece] = (field_index, code)
+
+
+_intern_put_pieces()
+
+# All (interned) pieces on the board, for every party, piece type and field
+BOARD_PUT_PIECES = tuple(_INTERNED_PUT_PIECE_OF_KEY.values())
+
+
+def pack_position(atoms) -> bytes:
+    """
+    Returns the given pieces as POSITION_BYTE_COUNT bytes, one per board field
+    in FEN order, where 0 denotes an empty field.  Annotations, pieces off the
+    board and fields with more than one piece cannot be packed (ValueError).
+    """
+    packed = bytearray(POSITION_BYTE_COUNT)
+    for atom in atoms:
+        try:
+            field_index, code = _FIELD_INDEX_AND_CODE_OF_PUT_PIECE[atom]
+        except KeyError:
+            raise ValueError(f"Cannot pack atom {atom!r}")
+        if packed[field_index]:
+            raise ValueError(f"Cannot pack more than one piece per field: {atom!r}")
+        packed[field_index] = code
+    return bytes(packed)
+
+
+def unpack_position(packed: bytes) -> list[PutPiece]:
+    """
+    Returns the pieces of a position packed by pack_position in FEN order,
+    i.e. in the same order that iterate_fen_tokens yields them.
+    """
+    if len(packed) != POSITION_BYTE_COUNT:
+        raise ValueError(
+            f"Packed position has {len(packed)} bytes rather than {POSITION_BYTE_COUNT}"
+        )
+    put_pieces = []
+    for field_index, code in enumerate(packed):
+        if not code:
+            continue
+        try:
+            put_pieces.append(_PUT_PIECE_OF_CODE_OF_FIELD_INDEX[field_index][code])
+        except KeyError:
+            raise ValueError(f"Malformed packed field value {code} at index {field_index}")
+    return put_pieces
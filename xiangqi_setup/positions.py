@@ -0,0 +1,27 @@
+# Copyright (C) 2026 Sebastian Pipping <sebastian@pipping.org>
+# Licensed under GNU Affero General Public License version 3.0 or later
+
+"""
+Canonical forms of atoms (i.e. pieces and annotations put on the board)
+and of positions, shared by everything that keys rendered output by
+position so that these keys cannot drift apart.
+"""
+
+from .annotations import PutAnnotation
+
+
+def canonical_atom(atom) -> tuple:
+    """
+    Returns a plain tuple that is equal for atoms that render alike
+    """
+    if isinstance(atom, PutAnnotation):
+        return ("annotation", atom.annotation_name, float(atom.x), float(atom.y))
+    return ("piece", atom.party, atom.piece, atom.x, atom.y)
+
+
+def canonical_position(atoms_to_put) -> tuple:
+    """
+    Returns the canonical atoms of a position sorted, i.e. independent of the
+    order that atoms were read in but not of how often an atom is put
+    """
+    return tuple(sorted(map(canonical_atom, atoms_to_put)))
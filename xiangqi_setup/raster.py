@@ -0,0 +1,263 @@
+# Copyright (C) 2026 Sebastian Pipping <sebastian@pipping.org>
+# Licensed under GNU Affero General Public License version 3.0 or later
+
+"""
+Raster (PNG/WebP) output without an external rasterizer run per diagram:
+the board and every distinct piece/annotation graphic is rasterized once
+per target size and then alpha-composited with NumPy.
+"""
+
+import functools
+import math
+import os
+
+from svgutils.compose import Unit
+from svgutils.transform import SVGFigure
+
+from .compose import SvgTemplate, compute_layout, load_svg_template
+from .timings import count, timed
+
+_RASTER_FORMAT_OF_EXTENSION = {
+    ".png": ".png",
+    ".webp": ".webp",
+}
+
+# Sub-pixel offsets are rounded to multiples of 1/_SUBPIXEL_STEPS pixels
+# so that a few rasters per graphic and size serve all 90 intersections
+_SUBPIXEL_STEPS = 4
+
+# Drawing extents are measured at this resolution with this much room around the view box
+_PROBE_PIXELS_PER_VIEW_BOX = 16
+_PROBE_MARGIN_VIEW_BOXES = 12
+
+_MAX_CACHED_RASTERS = 1024
+
+
+def is_raster_filename(filename: str) -> bool:
+    return os.path.splitext(filename)[1].lower() in _RASTER_FORMAT_OF_EXTENSION
+
+
+@functools.cache
+def import_raster_dependencies() -> tuple:
+    """
+    Returns modules numpy and pyvips or raises ValueError if unavailable
+    """
+    # NOTE: These are imported only when needed, for faster startup
+    try:
+        import numpy
+        import pyvips
+    except (ImportError, OSError):  # pyvips raises OSError for a missing libvips
+        raise ValueError(
+            "PNG and WebP output needs pyvips and numpy,"
+            ' e.g. install them by running "pip install xiangqi-setup[raster]".'
+        )
+    return numpy, pyvips
+
+
+def check_raster_support():
+    import_raster_dependencies()
+
+
+def render_svg_template(
+    template: SvgTemplate,
+    scale: float,
+    offset_x: float,
+    offset_y: float,
+    width: float,
+    height: float,
+):
+    """
+    Rasterizes the graphic of the given SVG template at the given scale and offset
+    to a float32 array of premultiplied RGBA values in range [0, 1]
+    """
+    numpy, pyvips = import_raster_dependencies()
+
+    root = template.instantiate()
+    root.moveto(offset_x, offset_y, scale_x=scale, scale_y=scale)
+    figure = SVGFigure(Unit(f"{width}px"), Unit(f"{height}px"))
+    figure.append([root])
+
+    image = pyvips.Image.svgload_buffer(figure.to_str())
+    if image.bands == 3:
+        image = image.bandjoin(255)
+    pixels = numpy.ndarray(
+        buffer=image.write_to_memory(),
+        dtype=numpy.uint8,
+        shape=(image.height, image.width, image.bands),
+    ).astype(numpy.float32)
+    pixels /= 255.0
+    pixels[:, :, :3] *= pixels[:, :, 3:]
+    return pixels
+
+
+def measure_drawing_extent(
+    template: SvgTemplate, resolution_dpi: float
+) -> tuple[float, float, float, float]:
+    """
+    Returns left, top, right and bottom of what the graphic of the given
+    SVG template actually draws, in its own coordinates.  That can differ
+    greatly from its view box, e.g. arrows reach out to other intersections.
+    """
+    numpy, _ = import_raster_dependencies()
+
+    view_left, view_top, view_width, view_height = template.pixel_viewbox(resolution_dpi)
+    scale = _PROBE_PIXELS_PER_VIEW_BOX / max(view_width, view_height)
+    margin = _PROBE_MARGIN_VIEW_BOXES * _PROBE_PIXELS_PER_VIEW_BOX
+    offset_x = margin - view_left * scale
+    offset_y = margin - view_top * scale
+    alpha = render_svg_template(
+        template,
+        scale,
+        offset_x,
+        offset_y,
+        2 * margin + math.ceil(view_width * scale),
+        2 * margin + math.ceil(view_height * scale),
+    )[:, :, 3]
+
+    rows = numpy.flatnonzero(alpha.any(axis=1))
+    columns = numpy.flatnonzero(alpha.any(axis=0))
+    if not len(rows):
+        return view_left, view_top, view_left, view_top
+
+    # NOTE: One probe pixel of padding on each side covers anti-aliasing
+    return (
+        (columns[0] - 1 - offset_x) / scale,
+        (rows[0] - 1 - offset_y) / scale,
+        (columns[-1] + 2 - offset_x) / scale,
+        (rows[-1] + 2 - offset_y) / scale,
+    )
+
+
+@functools.lru_cache(maxsize=_MAX_CACHED_RASTERS)
+def _measure_drawing_extent(
+    filename: str, mtime_ns: int, resolution_dpi: float
+) -> tuple[float, float, float, float]:
+    """
+    Cached edition of measure_drawing_extent for SVG files;  the modification
+    time is only part of the arguments to invalidate the cache when the file changes.
+    """
+    del mtime_ns
+
+    return measure_drawing_extent(load_svg_template(filename), resolution_dpi)
+
+
+@functools.lru_cache(maxsize=_MAX_CACHED_RASTERS)
+def _rasterize(
+    filename: str,
+    mtime_ns: int,
+    scale: float,
+    offset_x: float,
+    offset_y: float,
+    width: float,
+    height: float,
+):
+    """
+    Cached edition of render_svg_template for SVG files;  the modification time
+    is only part of the arguments to invalidate the cache when the file changes.
+    """
+    del mtime_ns
+
+    pixels = render_svg_template(
+        load_svg_template(filename), scale, offset_x, offset_y, width, height
+    )
+    pixels.flags.writeable = False
+    return pixels
+
+
+def _rasterize_placed(filename: str, scale: float, x: float, y: float, resolution_dpi: float):
+    """
+    Returns the raster of the given SVG file placed at (x, y) of the output
+    together with the output position of the top left corner of the raster
+    """
+    mtime_ns = os.stat(filename).st_mtime_ns
+    extent_left, extent_top, extent_right, extent_bottom = _measure_drawing_extent(
+        filename, mtime_ns, resolution_dpi
+    )
+
+    # NOTE: Everything but the integer part of (x, y) goes into the cache key
+    #       so that rasters can be re-used at other intersections.
+    integer_x, integer_y = math.floor(x), math.floor(y)
+    fraction_x = round((x - integer_x) * _SUBPIXEL_STEPS) / _SUBPIXEL_STEPS
+    fraction_y = round((y - integer_y) * _SUBPIXEL_STEPS) / _SUBPIXEL_STEPS
+    left = math.floor(fraction_x + extent_left * scale)
+    top = math.floor(fraction_y + extent_top * scale)
+
+    pixels = _rasterize(
+        filename,
+        mtime_ns,
+        scale,
+        fraction_x - left,
+        fraction_y - top,
+        math.ceil(fraction_x + extent_right * scale) - left,
+        math.ceil(fraction_y + extent_bottom * scale) - top,
+    )
+    return pixels, integer_x + left, integer_y + top
+
+
+def _blend_over(canvas, tile, left: int, top: int):
+    canvas_height, canvas_width = canvas.shape[:2]
+    tile_height, tile_width = tile.shape[:2]
+
+    # Clip to the canvas, e.g. for debug diamonds at the edge of the board
+    canvas_left, canvas_top = max(0, left), max(0, top)
+    canvas_right = min(canvas_width, left + tile_width)
+    canvas_bottom = min(canvas_height, top + tile_height)
+    if canvas_left >= canvas_right or canvas_top >= canvas_bottom:
+        return
+
+    source = tile[
+        canvas_top - top : canvas_bottom - top,
+        canvas_left - left : canvas_right - left,
+    ]
+    target = canvas[canvas_top:canvas_bottom, canvas_left:canvas_right]
+    target *= 1.0 - source[:, :, 3:]
+    target += source
+
+
+def compose_raster(atoms_to_put, options, image_format: str = ".png") -> bytes:
+    """
+    Renders to an image of the given format (".png" or ".webp")
+    and returns the encoded image as bytes.
+    """
+    numpy, pyvips = import_raster_dependencies()
+
+    with timed("layout"):
+        layout = compute_layout(atoms_to_put, options)
+
+    with timed("rasterize"):
+        canvas = _rasterize(
+            layout.board_filename,
+            os.stat(layout.board_filename).st_mtime_ns,
+            layout.board_scale,
+            0.0,
+            0.0,
+            layout.width_pixel,
+            layout.height_pixel,
+        ).copy()
+        height, width = canvas.shape[:2]
+
+        for placement in layout.placements:
+            tile, left, top = _rasterize_placed(
+                placement.filename,
+                placement.scale,
+                placement.x_pixel,
+                placement.y_pixel,
+                options.resolution_dpi,
+            )
+            _blend_over(canvas, tile, left, top)
+
+        alpha = canvas[:, :, 3:]
+        numpy.divide(canvas[:, :, :3], alpha, out=canvas[:, :, :3], where=alpha > 0.0)
+        pixels = numpy.rint(numpy.clip(canvas, 0.0, 1.0) * 255.0).astype(numpy.uint8)
+
+    with timed("encode"):
+        image = pyvips.Image.new_from_memory(pixels.tobytes(), width, height, 4, "uchar")
+        return image.write_to_buffer(image_format)
+
+
+def compose_raster_file(atoms_to_put, options):
+    image_format = _RASTER_FORMAT_OF_EXTENSION[os.path.splitext(options.output_file)[1].lower()]
+    image_bytes = compose_raster(atoms_to_put, options, image_format)
+    with timed("write_output"), open(options.output_file, "wb") as f:
+        f.write(image_bytes)
+    count("output_bytes", len(image_bytes))
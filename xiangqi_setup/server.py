@@ -0,0 +1,165 @@
+# Copyright (C) 2026 Sebastian Pipping <sebastian@pipping.org>
+# Licensed under GNU Affero General Public License version 3.0 or later
+
+import json
+import socket
+import sys
+import threading
+import time
+from collections import deque
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+from .compose import preload_themes
+from .file_formats import iterate_tokens_of_content
+from .memo import RenderMemo, compose_svg_bytes
+from .version import VERSION_STR
+
+_RENDER_PATH = "/render"
+_STATS_PATH = "/stats"
+
+_MAX_LATENCY_SAMPLES = 10000
+
+
+class RenderStatistics:
+    """
+    Thread-safe bookkeeping of render request latencies;
+    percentiles are computed over the most recent requests only.
+    """
+
+    def __init__(self, max_samples: int = _MAX_LATENCY_SAMPLES):
+        self._lock = threading.Lock()
+        self._latencies_seconds = deque(maxlen=max_samples)
+        self._request_count = 0
+        self._failure_count = 0
+
+    def record(self, latency_seconds: float, failed: bool):
+        with self._lock:
+            self._latencies_seconds.append(latency_seconds)
+            self._request_count += 1
+            if failed:
+                self._failure_count += 1
+
+    def summary(self) -> dict:
+        with self._lock:
+            latencies_seconds = sorted(self._latencies_seconds)
+            summary = {
+                "requests": self._request_count,
+                "failures": self._failure_count,
+            }
+
+        if latencies_seconds:
+
+            def percentile_milliseconds(percent):
+                # Nearest-rank method
+                index = max(0, -(-len(latencies_seconds) * percent // 100) - 1)
+                return latencies_seconds[index] * 1000.0
+
+            summary["latency_ms"] = {
+                "samples": len(latencies_seconds),
+                "mean": sum(latencies_seconds) / len(latencies_seconds) * 1000.0,
+                "p50": percentile_milliseconds(50),
+                "p90": percentile_milliseconds(90),
+                "p99": percentile_milliseconds(99),
+                "max": latencies_seconds[-1] * 1000.0,
+            }
+
+        return summary
+
+
+class _RenderRequestHandler(BaseHTTPRequestHandler):
+    server_version = f"xiangqi-setup/{VERSION_STR}"
+
+    def _send(self, status: HTTPStatus, content_type: str, body: bytes):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error_text(self, status: HTTPStatus, message: str):
+        self._send(status, "text/plain; charset=utf-8", f"{message}\n".encode())
+
+    def do_GET(self):
+        if urlsplit(self.path).path != _STATS_PATH:
+            self._send_error_text(HTTPStatus.NOT_FOUND, f"Not found: {self.path}")
+            return
+
+        summary = self.server.statistics.summary()
+        if self.server.memo is not None:
+            summary["memo"] = self.server.memo.summary()
+        body = json.dumps(summary, indent=2) + "\n"
+        self._send(HTTPStatus.OK, "application/json", body.encode())
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if url.path != _RENDER_PATH:
+            self._send_error_text(HTTPStatus.NOT_FOUND, f"Not found: {self.path}")
+            return
+
+        started = time.perf_counter()
+        try:
+            content_length = int(self.headers.get("Content-Length", 0))
+            content = self.rfile.read(content_length).decode("utf-8")
+            options = self.server.create_options(dict(parse_qsl(url.query)))
+            atoms_to_put = list(
+                iterate_tokens_of_content(
+                    content,
+                    options.moves_to_play,
+                    options.annotate_last_move,
+                    options.input_format,
+                )
+            )
+            svg_bytes = compose_svg_bytes(atoms_to_put, options, self.server.memo)
+        except Exception as e:
+            self.server.statistics.record(time.perf_counter() - started, failed=True)
+            self._send_error_text(HTTPStatus.BAD_REQUEST, f"ERROR: {e}")
+            return
+
+        self.server.statistics.record(time.perf_counter() - started, failed=False)
+        self._send(HTTPStatus.OK, "image/svg+xml", svg_bytes)
+
+
+class RenderServer(ThreadingHTTPServer):
+    """
+    HTTP server rendering WXF/FEN/annoFEN/XAY request bodies to SVG,
+    one thread per request, with themes kept parsed in memory.
+
+    The render options of a request are taken from the query string, e.g.
+    ``POST /render?pieces=euro_xiangqi_js&width-px=400``;
+    latency statistics are available at ``GET /stats``.
+    Output of identical requests is re-used if a memo is given.
+    """
+
+    daemon_threads = True
+
+    # NOTE: The default of 5 has bursts of concurrent clients refused
+    #       or reset while all threads are busy rendering
+    request_queue_size = socket.SOMAXCONN
+
+    def __init__(self, server_address, create_options, memo: RenderMemo | None = None):
+        super().__init__(server_address, _RenderRequestHandler)
+        self.create_options = create_options
+        self.statistics = RenderStatistics()
+        self.memo = memo
+
+
+def serve(host: str, port: int, create_options, memo: RenderMemo | None = None):
+    # Warm up the caches with the default themes before taking requests
+    default_options = create_options({})
+    preload_themes(
+        default_options.board_theme_dir,
+        default_options.piece_theme_dir,
+        default_options.annotation_theme_dir,
+    )
+
+    with RenderServer((host, port), create_options, memo) as server:
+        print(
+            f"Serving on http://{host}:{server.server_port}{_RENDER_PATH}"
+            f" (statistics at {_STATS_PATH}), press Ctrl+C to stop."
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("Stopped.", file=sys.stderr)
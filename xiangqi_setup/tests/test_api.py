@@ -0,0 +1,42 @@
+# Copyright (C) 2026 Sebastian Pipping <sebastian@pipping.org>
+# Licensed under GNU Affero General Public License version 3.0 or later
+
+import io
+from unittest import TestCase
+
+from ..api import list_themes, render_svg
+from ..file_formats.annofen import iterate_annofen_tokens
+
+_INITIAL_ANNOFEN = "v1 rnbakabnr/9/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/9/RNBAKABNR"
+
+
+class RenderSvgTest(TestCase):
+    def test_content_and_atoms_render_alike(self):
+        from_content = render_svg(_INITIAL_ANNOFEN, width_px=300.0)
+        from_atoms = render_svg(list(iterate_annofen_tokens(_INITIAL_ANNOFEN)), width_px=300.0)
+
+        self.assertEqual(from_content, from_atoms)
+        self.assertIn(b'width="300.0px"', from_content)
+
+    def test_output_file_object(self):
+        output = io.BytesIO()
+
+        svg_bytes = render_svg(_INITIAL_ANNOFEN, output=output)
+
+        self.assertEqual(output.getvalue(), svg_bytes)
+
+    def test_width_px_and_width_cm_exclusive(self):
+        with self.assertRaises(ValueError):
+            render_svg(_INITIAL_ANNOFEN, width_px=300.0, width_cm=7.0)
+
+
+class ListThemesTest(TestCase):
+    def test_kind(self):
+        themes = list_themes("pieces")
+
+        self.assertIn("retro_simple", [theme.name for theme in themes])
+        self.assertEqual({theme.kind for theme in themes}, {"pieces"})
+
+    def test_unknown_kind(self):
+        with self.assertRaises(ValueError):
+            list_themes("chairs")
@@ -0,0 +1,246 @@
+# Copyright (C) 2026 Sebastian Pipping <sebastian@pipping.org>
+# Licensed under GNU Affero General Public License version 3.0 or later
+
+import argparse
+import io
+import os
+from contextlib import redirect_stderr, redirect_stdout
+from tempfile import TemporaryDirectory
+from textwrap import dedent
+from unittest import TestCase
+
+from parameterized import parameterized
+
+from ..api import DEDUPE_LINK, check_scaling
+from ..batch import read_batch_manifest, render_archive, render_stream
+from ..catalog import Catalog
+from ..file_formats import iterate_position_lines
+from ..file_formats.wxf import ALL_MOVES
+from ..themes import ANNOTATION_THEMES, BOARD_THEMES, PIECE_THEMES, get_theme_dir
+
+_POSITION_LINES = """\
+# Comments and blank lines are not positions
+4k4/9/9/9/9/9/9/9/9/4K4 w - - 0 1
+
+v1 4k4/9/9/9/9/9/9/9/9/4[K<bm>]4
+4k4/9/9/9/9/9/9/9/9/4X4
+rnbakabnr/9/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/9/RNBAKABNR w
+"""
+
+
+def _create_options(input_file: str, output_file: str):
+    options = argparse.Namespace(
+        input_file=input_file,
+        output_file=output_file,
+        input_format=None,
+        dedupe=None,
+        store=None,
+        board_theme_dir=get_theme_dir(BOARD_THEMES, "clean_alpha"),
+        piece_theme_dir=get_theme_dir(PIECE_THEMES, "retro_simple"),
+        annotation_theme_dir=get_theme_dir(ANNOTATION_THEMES, "colors_alpha"),
+        width_pixel=200.0,
+        width_centimeter=None,
+        resolution_dpi=90.0,
+        piece_scale=0.9,
+        annotation_scale=0.9,
+        use_defs=False,
+        optimize=False,
+        optimize_precision=None,
+        debug=False,
+    )
+    check_scaling(options)
+    return options
+
+
+class ReadBatchManifestTest(TestCase):
+    def _read(self, content):
+        with TemporaryDirectory() as temp_dir:
+            filename = os.path.join(temp_dir, "manifest.yml")
+            with open(filename, "w") as f:
+                f.write(dedent(content))
+            return temp_dir, read_batch_manifest(filename)
+
+    def test_paths_relative_to_manifest(self):
+        temp_dir, items = self._read("""\
+            version: '1'
+            jobs:
+              - input: game.wxf
+                output: /tmp/game.svg
+                moves: 3
+        """)
+
+        self.assertEqual(len(items), 1)
+        self.assertEqual(items[0].input_file, os.path.join(temp_dir, "game.wxf"))
+        self.assertEqual(items[0].output_file, "/tmp/game.svg")
+        self.assertEqual(items[0].overrides, {"moves": 3})
+
+    def test_job_without_output_rejected(self):
+        with self.assertRaises(ValueError):
+            self._read("""\
+                version: '1'
+                jobs:
+                  - input: game.wxf
+            """)
+
+    @parameterized.expand(
+        [
+            ("input: 12", "output: game.svg"),
+            ("input: game.wxf", "output: [a]"),
+        ]
+    )
+    def test_job_with_non_string_paths_rejected(self, input_line, output_line):
+        with self.assertRaises(ValueError) as catcher:
+            self._read(f"""\
+                version: '1'
+                jobs:
+                  - {input_line}
+                    {output_line}
+            """)
+
+        self.assertIn("Malformed job #1", str(catcher.exception))
+
+    def test_unsupported_version_rejected(self):
+        with self.assertRaises(ValueError):
+            self._read("""\
+                version: '2'
+                jobs: []
+            """)
+
+
+class IteratePositionLinesTest(TestCase):
+    def test_blank_lines_and_comments_skipped(self):
+        self.assertEqual(
+            [
+                (index, line_number)
+                for index, line_number, _ in iterate_position_lines(io.StringIO(_POSITION_LINES))
+            ],
+            [(0, 2), (1, 4), (2, 5), (3, 6)],
+        )
+
+
+class RenderStreamTest(TestCase):
+    def test_failing_lines_reported_and_skipped(self):
+        with TemporaryDirectory() as temp_dir:
+            input_file = os.path.join(temp_dir, "positions.txt")
+            with open(input_file, "w") as f:
+                f.write(_POSITION_LINES)
+            options = _create_options(input_file, os.path.join(temp_dir, "{index:03d}.svg"))
+            stderr = io.StringIO()
+
+            with redirect_stderr(stderr):
+                failure_count = render_stream(options)
+
+            self.assertEqual(failure_count, 1)
+            self.assertIn(
+                f"{input_file}:5: Malformed FEN token 'X' at column 22", stderr.getvalue()
+            )
+            self.assertEqual(
+                sorted(os.listdir(temp_dir)), ["000.svg", "001.svg", "003.svg", "positions.txt"]
+            )
+
+    def _render_stream_deduplicated(self, temp_dir, content):
+        input_file = os.path.join(temp_dir, "positions.txt")
+        with open(input_file, "w") as f:
+            f.write(content)
+        options = _create_options(input_file, os.path.join(temp_dir, "{index}.svg"))
+        options.dedupe = DEDUPE_LINK
+        stdout = io.StringIO()
+
+        with redirect_stdout(stdout):
+            failure_count = render_stream(options)
+
+        self.assertEqual(failure_count, 0)
+        return stdout.getvalue()
+
+    def test_duplicates_linked(self):
+        with TemporaryDirectory() as temp_dir:
+            stdout = self._render_stream_deduplicated(
+                temp_dir,
+                "4k4/9/9/9/9/9/9/9/9/4K4 w\n"
+                "v1 4k4/9/9/9/9/9/9/9/9/4K4\n"
+                "v1 4k4/9/9/9/9/9/9/9/9/4[K<bm>]4\n"
+                "4k4/9/9/9/9/9/9/9/9/4K4\n",
+            )
+
+            self.assertIn("Rendered 2 distinct of 4 position(s)", stdout)
+            inodes = [os.stat(os.path.join(temp_dir, f"{i}.svg")).st_ino for i in range(4)]
+            self.assertEqual(inodes[0], inodes[1])
+            self.assertEqual(inodes[0], inodes[3])
+            self.assertNotEqual(inodes[0], inodes[2])
+
+    def test_atoms_put_twice_not_mistaken_for_duplicates(self):
+        # NOTE: Both positions have the same Zobrist hash (of zero) and atom count
+        with TemporaryDirectory() as temp_dir:
+            stdout = self._render_stream_deduplicated(
+                temp_dir, "v1 [<bg><bg>]8/9/9/9/9/9/9/9/9/9\nv1 [PP]8/9/9/9/9/9/9/9/9/9\n"
+            )
+
+            self.assertIn("Rendered 2 distinct of 2 position(s)", stdout)
+            with open(os.path.join(temp_dir, "0.svg"), "rb") as f0:
+                with open(os.path.join(temp_dir, "1.svg"), "rb") as f1:
+                    self.assertNotEqual(f0.read(), f1.read())
+
+    def test_links_of_earlier_runs_not_written_through(self):
+        with TemporaryDirectory() as temp_dir:
+            self._render_stream_deduplicated(
+                temp_dir, "4k4/9/9/9/9/9/9/9/9/4K4\n4k4/9/9/9/9/9/9/9/9/4K4\n"
+            )
+            self._render_stream_deduplicated(
+                temp_dir, "4k4/9/9/9/9/9/9/9/9/4K4\n3k5/9/9/9/9/9/9/9/9/4K4\n"
+            )
+
+            with open(os.path.join(temp_dir, "0.svg"), "rb") as f0:
+                with open(os.path.join(temp_dir, "1.svg"), "rb") as f1:
+                    self.assertNotEqual(f0.read(), f1.read())
+
+    def test_stored_in_catalog(self):
+        with TemporaryDirectory() as temp_dir:
+            input_file = os.path.join(temp_dir, "positions.txt")
+            with open(input_file, "w") as f:
+                f.write("4k4/9/9/9/9/9/9/9/9/4K4\n\nv1 4k4/9/9/9/9/9/9/9/9/4K4\n")
+            catalog_file = os.path.join(temp_dir, "catalog.sqlite")
+            options = _create_options(input_file, "{index}.svg")
+            options.store = catalog_file
+
+            with redirect_stdout(io.StringIO()) as stdout:
+                failure_count = render_stream(options)
+
+            self.assertEqual(failure_count, 0)
+            self.assertIn(
+                "Stored 2 position(s) with 1 newly rendered diagram(s)", stdout.getvalue()
+            )
+            self.assertEqual(sorted(os.listdir(temp_dir)), ["catalog.sqlite", "positions.txt"])
+            with Catalog(catalog_file) as catalog:
+                entries = list(catalog.iterate_entries())
+                self.assertEqual([entry["name"] for entry in entries], ["0.svg", "1.svg"])
+                self.assertEqual([entry["line"] for entry in entries], [1, 3])
+                self.assertEqual(entries[0]["key"], entries[1]["key"])
+                self.assertEqual(entries[0]["fen"], "4k4/9/9/9/9/9/9/9/9/4K4")
+                media_type, content = catalog.lookup(entries[0]["key"])
+                self.assertEqual(media_type, "image/svg+xml")
+                self.assertTrue(content.startswith(b"<?xml"))
+
+
+class RenderArchiveTest(TestCase):
+    def test_game_failing_to_decode_reported_and_skipped(self):
+        game = b"FORMAT  WXF\nFEN     4k4/9/9/9/9/9/9/9/9/4K4 r\n"
+        bad_game = b"FORMAT  WXF\nNAME    \xff\xfe\nFEN     4k4/9/9/9/9/9/9/9/9/4K4 r\n"
+        with TemporaryDirectory() as temp_dir:
+            input_file = os.path.join(temp_dir, "games.wxf")
+            with open(input_file, "wb") as f:
+                f.write(game + bad_game + game)
+            options = _create_options(input_file, os.path.join(temp_dir, "g{index}.svg"))
+            options.moves_to_play = ALL_MOVES
+            options.annotate_last_move = True
+            options.every_nth_ply = None
+            stderr = io.StringIO()
+
+            with redirect_stderr(stderr):
+                failure_count = render_archive(options)
+
+            self.assertEqual(failure_count, 1)
+            self.assertIn(
+                f"{input_file}: game #1 (at byte offset {len(game)}): 'utf-8' codec",
+                stderr.getvalue(),
+            )
+            self.assertEqual(sorted(os.listdir(temp_dir)), ["g0.svg", "g2.svg", "games.wxf"])
@@ -0,0 +1,122 @@
+# Copyright (C) 2026 Sebastian Pipping <sebastian@pipping.org>
+# Licensed under GNU Affero General Public License version 3.0 or later
+
+import argparse
+import os
+import sqlite3
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from ..catalog import Catalog, catalog_key
+from ..file_formats.annofen import iterate_annofen_tokens
+from ..file_formats.fen import iterate_fen_tokens
+
+_ATOMS = list(iterate_fen_tokens("4k4/9/9/9/9/9/9/9/9/4K4"))
+
+
+def _create_options(theme_parent_dir: str = "/themes", output_file: str = "out.svg"):
+    return argparse.Namespace(
+        board_theme_dir=os.path.join(theme_parent_dir, "board", "clean_alpha"),
+        piece_theme_dir=os.path.join(theme_parent_dir, "pieces", "retro_simple"),
+        annotation_theme_dir=os.path.join(theme_parent_dir, "annotations", "colors_alpha"),
+        output_file=output_file,
+        width_pixel=200.0,
+        resolution_dpi=90.0,
+        piece_scale=0.9,
+        annotation_scale=0.9,
+        use_defs=False,
+        optimize=False,
+        optimize_precision=10,
+        debug=False,
+    )
+
+
+class CatalogKeyTest(TestCase):
+    def test_independent_of_theme_location_and_output_name(self):
+        self.assertEqual(
+            catalog_key(_ATOMS, _create_options("/themes", "a/1.svg")),
+            catalog_key(_ATOMS, _create_options("/elsewhere", "b/2.svg")),
+        )
+
+    def test_depends_on_output_format_and_options(self):
+        options = _create_options()
+        other_options = _create_options()
+        other_options.piece_scale = 1.0
+
+        keys = {
+            catalog_key(_ATOMS, options),
+            catalog_key(_ATOMS, _create_options(output_file="out.png")),
+            catalog_key(_ATOMS, other_options),
+            catalog_key(_ATOMS[:1], options),
+        }
+
+        self.assertEqual(len(keys), 4)
+
+    def test_atoms_put_twice_told_apart(self):
+        # NOTE: Both positions have the same Zobrist hash (of zero) and atom count
+        options = _create_options()
+
+        self.assertNotEqual(
+            catalog_key(iterate_annofen_tokens("v1 [<bg><bg>]8/9/9/9/9/9/9/9/9/9"), options),
+            catalog_key(iterate_annofen_tokens("v1 [PP]8/9/9/9/9/9/9/9/9/9"), options),
+        )
+
+    def test_independent_of_atom_order(self):
+        options = _create_options()
+
+        self.assertEqual(catalog_key(_ATOMS, options), catalog_key(_ATOMS[::-1], options))
+
+
+class CatalogTest(TestCase):
+    def test_entries_written_in_bulk(self):
+        with TemporaryDirectory() as temp_dir:
+            filename = os.path.join(temp_dir, "catalog.sqlite")
+
+            with Catalog(filename, batch_size=2) as catalog:
+                catalog.add("0.svg", "k0", "image/svg+xml", b"<svg/>", source="a.txt", line=1)
+                self.assertEqual(catalog.lookup("k0"), ("image/svg+xml", b"<svg/>"))
+                catalog.add("1.svg", "k0", "image/svg+xml", None, source="a.txt", line=2)
+                catalog.add("2.svg", "k1", "image/png", b"PNG", game=3, ply=4, fen="9/9")
+                self.assertEqual(catalog.added_entry_count, 2)  # i.e. the first batch
+
+            with Catalog(filename) as catalog:
+                self.assertTrue(catalog.contains("k1"))
+                self.assertFalse(catalog.contains("k2"))
+                self.assertEqual(catalog.lookup("k1"), ("image/png", b"PNG"))
+                self.assertEqual(
+                    [entry["name"] for entry in catalog.iterate_entries(key="k0")],
+                    ["0.svg", "1.svg"],
+                )
+                self.assertEqual(
+                    list(catalog.iterate_entries(game=3)),
+                    [
+                        {
+                            "name": "2.svg",
+                            "key": "k1",
+                            "source": None,
+                            "game": 3,
+                            "line": None,
+                            "ply": 4,
+                            "fen": "9/9",
+                        }
+                    ],
+                )
+
+    def test_entries_of_same_name_replaced(self):
+        with TemporaryDirectory() as temp_dir:
+            with Catalog(os.path.join(temp_dir, "catalog.sqlite")) as catalog:
+                catalog.add("0.svg", "k0", "image/svg+xml", b"<svg/>")
+                catalog.flush()
+                catalog.add("0.svg", "k1", "image/svg+xml", b"<svg></svg>")
+
+                self.assertEqual([entry["key"] for entry in catalog.iterate_entries()], ["k1"])
+
+    def test_unsupported_schema_version_rejected(self):
+        with TemporaryDirectory() as temp_dir:
+            filename = os.path.join(temp_dir, "catalog.sqlite")
+            connection = sqlite3.connect(filename)
+            connection.execute("PRAGMA user_version = 99")
+            connection.close()
+
+            with self.assertRaises(ValueError):
+                Catalog(filename)
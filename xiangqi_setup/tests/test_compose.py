@@ -0,0 +1,71 @@
+# Copyright (C) 2026 Sebastian Pipping <sebastian@pipping.org>
+# Licensed under GNU Affero General Public License version 3.0 or later
+
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from ..compose import _BoardGeometry, load_svg_template
+
+_SVG_CONTENT = """\
+<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 40 20">
+  <circle cx="10" cy="10" r="10"/>
+</svg>
+"""
+
+
+class LoadSvgTemplateTest(TestCase):
+    def test_parsed_once_per_modification(self):
+        with TemporaryDirectory() as temp_dir:
+            filename = os.path.join(temp_dir, "piece.svg")
+            with open(filename, "w") as f:
+                f.write(_SVG_CONTENT)
+
+            template = load_svg_template(filename)
+            self.assertIs(load_svg_template(filename), template)
+
+            os.utime(filename, ns=(0, 0))
+            self.assertIsNot(load_svg_template(filename), template)
+
+    def test_instances_are_independent(self):
+        with TemporaryDirectory() as temp_dir:
+            filename = os.path.join(temp_dir, "piece.svg")
+            with open(filename, "w") as f:
+                f.write(_SVG_CONTENT)
+
+            template = load_svg_template(filename)
+            first = template.instantiate()
+            second = template.instantiate()
+            first.moveto(1, 2, scale_x=3, scale_y=3)
+
+            self.assertIsNone(second.root.get("transform"))
+            self.assertEqual(len(first.root), 1)
+            self.assertEqual(len(second.root), 1)
+            self.assertEqual(template.pixel_viewbox(90.0), (0.0, 0.0, 40.0, 20.0))
+
+
+class BoardGeometryTest(TestCase):
+    def setUp(self):
+        temp_dir = TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.filename = os.path.join(temp_dir.name, "piece.svg")
+        with open(self.filename, "w") as f:
+            f.write(_SVG_CONTENT)
+
+        # A board of 100x100 pixels with an 80x90 pixel grid at (10, 5), no river
+        self.geometry = _BoardGeometry((10.0, 5.0, 80.0, 90.0, 0.0), (0, 0, 100, 100), 200.0, 90.0)
+
+    def test_table_lookup(self):
+        placement = self.geometry.place(self.filename, 1.0, 8, 9)
+
+        self.assertIs(self.geometry.place(self.filename, 1.0, 8, 9), placement)
+        self.assertEqual(
+            (placement.x_pixel, placement.y_pixel, placement.scale), (170.0, 5.0, 0.5)
+        )
+
+    def test_off_grid(self):
+        placement = self.geometry.place(self.filename, 1.0, 4.5, 0)
+
+        self.assertEqual(
+            (placement.x_pixel, placement.y_pixel, placement.scale), (100.0, 185.0, 0.5)
+        )
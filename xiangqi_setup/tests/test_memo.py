@@ -0,0 +1,104 @@
+# Copyright (C) 2026 Sebastian Pipping <sebastian@pipping.org>
+# Licensed under GNU Affero General Public License version 3.0 or later
+
+import argparse
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch
+
+from .. import memo
+from ..annotations import PutAnnotation
+from ..memo import RenderMemo, render_key
+from ..parties import BLACK, RED
+from ..pieces import KING, PutPiece
+
+
+def _create_options(**overrides):
+    options = argparse.Namespace(
+        board_theme_dir="board",
+        piece_theme_dir="pieces",
+        annotation_theme_dir="annotations",
+        width_pixel=248.0,
+        resolution_dpi=90.0,
+        piece_scale=0.9,
+        annotation_scale=0.9,
+        use_defs=False,
+        optimize=False,
+        optimize_precision=10,
+        debug=False,
+    )
+    vars(options).update(overrides)
+    return options
+
+
+class RenderKeyTest(TestCase):
+    def setUp(self):
+        self.atoms = [
+            PutPiece(RED, KING, 4, 0),
+            PutPiece(BLACK, KING, 4, 9),
+            PutAnnotation("good_move", 4, 0),
+        ]
+
+    def test_independent_of_atom_order(self):
+        self.assertEqual(
+            render_key(self.atoms, _create_options()),
+            render_key(reversed(self.atoms), _create_options()),
+        )
+
+    def test_dependent_on_atoms_and_options(self):
+        key = render_key(self.atoms, _create_options())
+
+        self.assertNotEqual(render_key(self.atoms[:2], _create_options()), key)
+        self.assertNotEqual(render_key(self.atoms, _create_options(debug=True)), key)
+        self.assertNotEqual(render_key(self.atoms, _create_options(width_pixel=249.0)), key)
+
+    def test_dependent_on_theme_edits(self):
+        with TemporaryDirectory() as temp_dir:
+            piece_svg_filename = os.path.join(temp_dir, "red_king.svg")
+            with open(piece_svg_filename, "w") as f:
+                f.write("<svg/>")
+            os.utime(piece_svg_filename, ns=(1, 1))
+            options = _create_options(piece_theme_dir=temp_dir)
+
+            with patch.object(memo, "_THEME_SCAN_INTERVAL_SECONDS", 0.0):
+                key = render_key(self.atoms, options)
+                self.assertEqual(render_key(self.atoms, options), key)
+
+                os.utime(piece_svg_filename, ns=(2, 2))
+                self.assertNotEqual(render_key(self.atoms, options), key)
+
+
+class RenderMemoTest(TestCase):
+    def test_hits_and_misses(self):
+        memo = RenderMemo()
+
+        self.assertIsNone(memo.get("a"))
+        memo.put("a", b"123")
+        self.assertEqual(memo.get("a"), b"123")
+
+        summary = memo.summary()
+        self.assertEqual((summary["hits"], summary["misses"]), (1, 1))
+        self.assertEqual((summary["entries"], summary["bytes"]), (1, 3))
+
+    def test_least_recently_used_evicted_first(self):
+        memo = RenderMemo(max_bytes=6)
+        memo.put("a", b"12")
+        memo.put("b", b"34")
+        memo.put("c", b"56")
+        memo.get("a")
+
+        memo.put("d", b"78")
+
+        self.assertIsNone(memo.get("b"))
+        self.assertEqual([memo.get(key) for key in "acd"], [b"12", b"56", b"78"])
+        self.assertEqual(memo.summary()["evictions"], 1)
+
+    def test_oversized_output_not_stored(self):
+        memo = RenderMemo(max_bytes=2)
+        memo.put("a", b"12")
+
+        memo.put("b", b"345")
+
+        self.assertEqual(memo.get("a"), b"12")
+        self.assertIsNone(memo.get("b"))
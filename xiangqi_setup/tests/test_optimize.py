@@ -0,0 +1,200 @@
+# Copyright (C) 2026 Sebastian Pipping <sebastian@pipping.org>
+# Licensed under GNU Affero General Public License version 3.0 or later
+
+from unittest import TestCase
+
+from lxml import etree
+from parameterized import parameterized
+
+from ..api import render_svg
+from ..optimize import (
+    _format_number,
+    _round_numbers_in,
+    _simplify_path_data,
+    optimize_svg,
+    optimize_theme_svg,
+    serialize_svg,
+)
+
+_TWO_KINGS_ANNOFEN = "v1 4k4/9/9/9/9/9/9/9/9/4K4"
+
+
+def _optimize(content: str, precision: int = 5) -> str:
+    root = etree.fromstring(content)
+    optimize_svg(root, precision)
+    return etree.tostring(root, encoding="unicode")
+
+
+class FormatNumberTest(TestCase):
+    @parameterized.expand(
+        [
+            (0.0, "0"),
+            (-0.00001, "-.00001"),
+            (0.123456789, ".12346"),
+            (-12.000001, "-12"),
+            (123456.7, "123460"),
+        ]
+    )
+    def test(self, value, expected_text):
+        self.assertEqual(_format_number(value, 5), expected_text)
+
+
+class RoundNumbersInTest(TestCase):
+    def test_path_data(self):
+        self.assertEqual(
+            _round_numbers_in("M 1.23456789,-2.5e-7  L10-20 ", 3), "M 1.23,-2.5e-7 L10-20"
+        )
+
+    @parameterized.expand(
+        [
+            ("M2.99999.5 1", "M3 .5 1"),
+            ("M10.00001.5", "M10 .5"),
+            ("M2.5.99999", "M2.5 1"),
+            ("M1.5.25", "M1.5.25"),
+            ("M2.5e-7.5", "M2.5e-7.5"),
+        ]
+    )
+    def test_numbers_without_separators_kept_apart(self, text, expected_text):
+        self.assertEqual(_round_numbers_in(text, 4), expected_text)
+
+    def test_unchanged_tokens_kept(self):
+        self.assertEqual(_round_numbers_in("a5 5 0 0110 10", 3), "a5 5 0 0110 10")
+
+
+class OptimizeSvgTest(TestCase):
+    def test_editor_markup_and_comments_removed(self):
+        self.assertEqual(
+            _optimize(
+                '<svg xmlns="http://www.w3.org/2000/svg"'
+                ' xmlns:inkscape="http://www.inkscape.org/namespaces/inkscape">\n'
+                "  <!-- comment -->\n"
+                "  <metadata>...</metadata>\n"
+                '  <rect inkscape:label="x" style="fill:red;-inkscape-x:y" width="1"/>\n'
+                "</svg>"
+            ),
+            '<svg xmlns="http://www.w3.org/2000/svg"><rect style="fill:red" width="1"/></svg>',
+        )
+
+    def test_unused_ids_dropped(self):
+        self.assertEqual(
+            _optimize(
+                '<svg xmlns="http://www.w3.org/2000/svg">'
+                '<linearGradient id="used"/><rect id="unused" fill="url(#used)"/>'
+                "</svg>"
+            ),
+            '<svg xmlns="http://www.w3.org/2000/svg">'
+            '<linearGradient id="used"/><rect fill="url(#used)"/>'
+            "</svg>",
+        )
+
+    def test_groups_collapsed(self):
+        self.assertEqual(
+            _optimize(
+                '<svg xmlns="http://www.w3.org/2000/svg">'
+                '<g transform="scale(2)"><g><path transform="rotate(90)" d="M0 0"/></g></g>'
+                '<g opacity=".5"><path d="M0 0"/></g><g/><defs/>'
+                "</svg>"
+            ),
+            '<svg xmlns="http://www.w3.org/2000/svg">'
+            '<path transform="scale(2) rotate(90)" d="M0 0"/>'
+            '<g opacity=".5"><path d="M0 0"/></g>'
+            "</svg>",
+        )
+
+    def test_text_content_kept(self):
+        content = (
+            '<svg xmlns="http://www.w3.org/2000/svg"><text> A  <tspan>B</tspan> </text></svg>'
+        )
+        self.assertEqual(_optimize(content), content)
+
+    def test_serialized_without_indentation(self):
+        root = etree.fromstring('<svg xmlns="http://www.w3.org/2000/svg">\n  <g/>\n</svg>')
+        optimize_svg(root, 5)
+        self.assertTrue(serialize_svg(root).endswith(b'<svg xmlns="http://www.w3.org/2000/svg"/>'))
+
+
+class SimplifyPathDataTest(TestCase):
+    @parameterized.expand(
+        [
+            ("m 1,2 3,4 5,6 z", "m1 2 3 4 5 6z"),
+            ("M 1,2 L 3,4 L 5,6 Z", "M1 2 3 4 5 6Z"),
+            ("m 0.5,0.5 l 0,-2 3,0 0,0", "m.5.5v-2h3l0 0"),
+            ("M1 2C3 4 5 6 7 8 9 10 11 12 13 14", "M1 2C3 4 5 6 7 8 9 10 11 12 13 14"),
+            ("M 1.23456,0 a 5,5 0 0110 10", "M1.23 0a5 5 0 0 1 10 10"),
+        ]
+    )
+    def test(self, path_data, expected_path_data):
+        self.assertEqual(_simplify_path_data(path_data, 3), expected_path_data)
+
+    def test_unsupported_kept(self):
+        self.assertEqual(_simplify_path_data("M 1,2 X 3", 3), "M 1,2 X 3")
+
+
+class OptimizeThemeSvgTest(TestCase):
+    def _optimize_theme(self, content: str) -> str:
+        root = etree.fromstring(content)
+        optimize_theme_svg(root, 5)
+        return etree.tostring(root, encoding="unicode")
+
+    def test_inherited_and_initial_values_dropped(self):
+        self.assertEqual(
+            self._optimize_theme(
+                '<svg xmlns="http://www.w3.org/2000/svg">'
+                '<rect style="fill:#000000;opacity:1;font-size:12px;stroke:#FFFFFF"/>'
+                '<g style="fill:red"><rect style="fill:black"/><rect style="fill:red"/></g>'
+                "</svg>"
+            ),
+            '<svg xmlns="http://www.w3.org/2000/svg">'
+            '<rect style="stroke:#fff"/>'
+            '<g style="fill:red"><rect style="fill:black"/><rect/></g>'
+            "</svg>",
+        )
+
+    def test_shared_styles_hoisted(self):
+        self.assertEqual(
+            self._optimize_theme(
+                '<svg xmlns="http://www.w3.org/2000/svg"><g opacity=".5">'
+                '<rect style="fill:red;stroke:blue"/><circle style="fill:red"/>'
+                "</g></svg>"
+            ),
+            '<svg xmlns="http://www.w3.org/2000/svg"><g opacity=".5" style="fill:red">'
+            '<rect style="stroke:blue"/><circle/>'
+            "</g></svg>",
+        )
+
+    def test_presentation_attributes_respected(self):
+        content = (
+            '<svg xmlns="http://www.w3.org/2000/svg">'
+            '<rect fill="red" style="fill:#000"/><text style="font-size:12px">A</text>'
+            "</svg>"
+        )
+        self.assertEqual(self._optimize_theme(content), content)
+
+    def test_empty_flowed_text_removed(self):
+        self.assertEqual(
+            self._optimize_theme(
+                '<svg xmlns="http://www.w3.org/2000/svg">'
+                "<flowRoot><flowRegion><rect/></flowRegion><flowPara/></flowRoot>"
+                "</svg>"
+            ),
+            '<svg xmlns="http://www.w3.org/2000/svg"/>',
+        )
+
+    def test_size_kept(self):
+        self.assertEqual(
+            self._optimize_theme(
+                '<svg xmlns="http://www.w3.org/2000/svg"'
+                ' width="10.123456789mm" viewBox="0 0 1.123456789 1"/>'
+            ),
+            '<svg xmlns="http://www.w3.org/2000/svg"'
+            ' width="10.123456789mm" viewBox="0 0 1.123456789 1"/>',
+        )
+
+
+class RenderOptimizedTest(TestCase):
+    def test_smaller(self):
+        plain_svg_bytes = render_svg(_TWO_KINGS_ANNOFEN)
+        optimized_svg_bytes = render_svg(_TWO_KINGS_ANNOFEN, optimize=True)
+
+        self.assertLess(len(optimized_svg_bytes), len(plain_svg_bytes) * 0.8)
+        self.assertNotIn(b"inkscape", optimized_svg_bytes)
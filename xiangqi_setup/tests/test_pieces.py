@@ -0,0 +1,106 @@
+# Copyright (C) 2026 Sebastian Pipping <sebastian@pipping.org>
+# Licensed under GNU Affero General Public License version 3.0 or later
+
+import pickle
+from unittest import TestCase
+
+from parameterized import parameterized
+
+from ..annotations import PutAnnotation
+from ..file_formats.fen import iterate_fen_tokens
+from ..parties import BLACK, RED
+from ..pieces import (
+    CHARIOT,
+    KING,
+    PAWN,
+    POSITION_BYTE_COUNT,
+    PutPiece,
+    pack_position,
+    unpack_position,
+)
+
+
+class PutPieceTest(TestCase):
+    def test_interned(self):
+        self.assertIs(PutPiece(RED, KING, 4, 0), PutPiece(RED, KING, 4, 0))
+        self.assertIs(
+            pickle.loads(pickle.dumps(PutPiece(RED, KING, 4, 0))), PutPiece(RED, KING, 4, 0)
+        )
+
+    def test_off_board_not_interned(self):
+        put_piece = PutPiece(RED, KING, 4, 10)
+
+        self.assertIsNot(put_piece, PutPiece(RED, KING, 4, 10))
+        self.assertEqual(put_piece, PutPiece(RED, KING, 4, 10))
+        self.assertEqual(hash(put_piece), hash(PutPiece(RED, KING, 4, 10)))
+
+    @parameterized.expand(
+        [
+            (PutPiece(RED, KING, 4, 0),),
+            (PutAnnotation("piece_move", 4, 0),),
+        ]
+    )
+    def test_immutable(self, atom):
+        with self.assertRaises(AttributeError):
+            atom.x = 5
+        with self.assertRaises(AttributeError):
+            del atom.x
+        with self.assertRaises(AttributeError):
+            atom.z = 5
+
+
+class PutAnnotationTest(TestCase):
+    def test_interned_on_whole_fields(self):
+        self.assertIs(PutAnnotation("piece_move", 4, 0), PutAnnotation("piece_move", 4, 0))
+        self.assertIsNot(PutAnnotation("piece_move", 4.5, 0), PutAnnotation("piece_move", 4.5, 0))
+
+    def test_equality(self):
+        annotation = PutAnnotation("piece_move", 4, 0)
+
+        self.assertEqual(annotation, PutAnnotation("piece_move", 4, 0))
+        self.assertEqual(len({annotation, PutAnnotation("piece_move", 4, 0)}), 1)
+        self.assertNotEqual(annotation, PutAnnotation("blank_move", 4, 0))
+        self.assertEqual(pickle.loads(pickle.dumps(annotation)), annotation)
+
+
+class PackPositionTest(TestCase):
+    def test_round_trip_keeps_fen_order(self):
+        atoms = list(
+            iterate_fen_tokens("rheakaehr/9/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/9/RHEAKAEHR")
+        )
+
+        packed = pack_position(atoms)
+
+        self.assertEqual(len(packed), POSITION_BYTE_COUNT)
+        self.assertEqual(unpack_position(packed), atoms)
+
+    def test_empty_board(self):
+        self.assertEqual(pack_position([]), bytes(POSITION_BYTE_COUNT))
+        self.assertEqual(unpack_position(bytes(POSITION_BYTE_COUNT)), [])
+
+    def test_corners(self):
+        packed = pack_position([PutPiece(BLACK, PAWN, 8, 0), PutPiece(RED, CHARIOT, 0, 9)])
+
+        self.assertEqual(packed[0], 1 + CHARIOT)
+        self.assertEqual(packed[-1], 1 + 7 + PAWN)
+
+    @parameterized.expand(
+        [
+            ("annotation", [PutAnnotation("piece_move", 4, 0)]),
+            ("off board", [PutPiece(RED, KING, 9, 0)]),
+            ("stacked", [PutPiece(RED, KING, 4, 0), PutPiece(BLACK, KING, 4, 0)]),
+        ]
+    )
+    def test_unpackable(self, _label, atoms):
+        with self.assertRaises(ValueError):
+            pack_position(atoms)
+
+    @parameterized.expand(
+        [
+            ("too short", bytes(POSITION_BYTE_COUNT - 1)),
+            ("bad value", bytes([15]) + bytes(POSITION_BYTE_COUNT - 1)),
+        ]
+    )
+    def test_malformed(self, _label, packed):
+        with self.assertRaises(ValueError):
+            unpack_position(packed)
@@ -0,0 +1,31 @@
+# Copyright (C) 2026 Sebastian Pipping <sebastian@pipping.org>
+# Licensed under GNU Affero General Public License version 3.0 or later
+
+from unittest import TestCase
+
+from ..annotations import PutAnnotation
+from ..parties import BLACK, RED
+from ..pieces import KING, PAWN, PutPiece
+from ..positions import canonical_atom, canonical_position
+
+
+class CanonicalPositionTest(TestCase):
+    def test_independent_of_atom_order(self):
+        atoms = [PutPiece(RED, KING, 4, 0), PutAnnotation("piece_move", 4, 1)]
+
+        self.assertEqual(canonical_position(atoms), canonical_position(reversed(atoms)))
+
+    def test_dependent_on_atom_multiplicity(self):
+        pawn = PutPiece(RED, PAWN, 0, 3)
+
+        self.assertNotEqual(canonical_position([pawn, pawn]), canonical_position([]))
+        self.assertNotEqual(canonical_position([pawn, pawn]), canonical_position([pawn]))
+
+    def test_whole_annotation_coordinates_normalized(self):
+        self.assertEqual(
+            canonical_atom(PutAnnotation("piece_move", 4, 1)),
+            canonical_atom(PutAnnotation("piece_move", 4.0, 1.0)),
+        )
+        self.assertNotEqual(
+            canonical_atom(PutPiece(RED, KING, 4, 0)), canonical_atom(PutPiece(BLACK, KING, 4, 0))
+        )
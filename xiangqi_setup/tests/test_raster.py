@@ -0,0 +1,93 @@
+# Copyright (C) 2026 Sebastian Pipping <sebastian@pipping.org>
+# Licensed under GNU Affero General Public License version 3.0 or later
+
+import argparse
+from unittest import TestCase, skipIf
+
+from parameterized import parameterized
+
+from ..api import check_scaling
+from ..file_formats.annofen import iterate_annofen_tokens
+from ..raster import (
+    _blend_over,
+    _rasterize,
+    check_raster_support,
+    compose_raster,
+    is_raster_filename,
+)
+from ..themes import ANNOTATION_THEMES, BOARD_THEMES, PIECE_THEMES, get_theme_dir
+
+_TWO_KINGS_ANNOFEN = "v1 4k4/9/9/9/9/9/9/9/9/4K4"
+
+try:
+    check_raster_support()
+except ValueError:
+    numpy = pyvips = None
+else:
+    import numpy
+    import pyvips
+
+
+def _create_options(width_pixel: float):
+    options = argparse.Namespace(
+        board_theme_dir=get_theme_dir(BOARD_THEMES, "clean_alpha"),
+        piece_theme_dir=get_theme_dir(PIECE_THEMES, "retro_simple"),
+        annotation_theme_dir=get_theme_dir(ANNOTATION_THEMES, "colors_alpha"),
+        width_pixel=width_pixel,
+        width_centimeter=None,
+        resolution_dpi=90.0,
+        piece_scale=0.9,
+        annotation_scale=0.9,
+        use_defs=False,
+        debug=False,
+    )
+    check_scaling(options)
+    return options
+
+
+class IsRasterFilenameTest(TestCase):
+    def test(self):
+        self.assertTrue(is_raster_filename("output.png"))
+        self.assertTrue(is_raster_filename("output.WebP"))
+        self.assertFalse(is_raster_filename("output.svg"))
+        self.assertFalse(is_raster_filename("png"))
+
+
+@skipIf(numpy is None or pyvips is None, "needs numpy and pyvips")
+class BlendOverTest(TestCase):
+    def test_clipped_at_canvas_edges(self):
+        canvas = numpy.zeros((4, 4, 4), dtype=numpy.float32)
+        tile = numpy.ones((3, 3, 4), dtype=numpy.float32)
+
+        _blend_over(canvas, tile, -1, 2)
+
+        self.assertEqual(canvas[:, :, 3].tolist(), [[0, 0, 0, 0]] * 2 + [[1, 1, 0, 0]] * 2)
+
+    def test_translucent_over_opaque(self):
+        canvas = numpy.array([[[0.0, 0.0, 1.0, 1.0]]], dtype=numpy.float32)
+        tile = numpy.array([[[0.5, 0.0, 0.0, 0.5]]], dtype=numpy.float32)  # i.e. premultiplied
+
+        _blend_over(canvas, tile, 0, 0)
+
+        self.assertEqual(canvas.tolist(), [[[0.5, 0.0, 0.5, 1.0]]])
+
+
+@skipIf(numpy is None or pyvips is None, "needs numpy and pyvips")
+class ComposeRasterTest(TestCase):
+    @parameterized.expand([(".png",), (".webp",)])
+    def test_size_and_format(self, image_format):
+        image_bytes = compose_raster(
+            iterate_annofen_tokens(_TWO_KINGS_ANNOFEN), _create_options(200.0), image_format
+        )
+
+        image = pyvips.Image.new_from_buffer(image_bytes, "")
+        self.assertEqual((image.width, image.bands), (200, 4))
+
+    def test_pieces_rasterized_once_per_size(self):
+        options = _create_options(201.0)
+        compose_raster(iterate_annofen_tokens(_TWO_KINGS_ANNOFEN), options)
+        misses_before = _rasterize.cache_info().misses
+
+        compose_raster(iterate_annofen_tokens(_TWO_KINGS_ANNOFEN), options)
+
+        self.assertEqual(_rasterize.cache_info().misses, misses_before)
@@ -0,0 +1,102 @@
+# Copyright (C) 2026 Sebastian Pipping <sebastian@pipping.org>
+# Licensed under GNU Affero General Public License version 3.0 or later
+
+import argparse
+import functools
+import json
+import socket
+import threading
+from unittest import TestCase
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+from ..__main__ import _add_rendering_arguments, _create_options
+from ..memo import RenderMemo
+from ..server import RenderServer, RenderStatistics
+
+_INITIAL_FEN = "rnbakabnr/9/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/9/RNBAKABNR w - - 0 1"
+
+
+class RenderStatisticsTest(TestCase):
+    def test_percentiles(self):
+        statistics = RenderStatistics()
+        for milliseconds in range(1, 100 + 1):
+            statistics.record(milliseconds / 1000.0, failed=milliseconds == 100)
+
+        summary = statistics.summary()
+
+        self.assertEqual(summary["requests"], 100)
+        self.assertEqual(summary["failures"], 1)
+        self.assertAlmostEqual(summary["latency_ms"]["p50"], 50.0)
+        self.assertAlmostEqual(summary["latency_ms"]["p99"], 99.0)
+        self.assertAlmostEqual(summary["latency_ms"]["max"], 100.0)
+
+
+class RenderServerTest(TestCase):
+    def setUp(self):
+        parser = argparse.ArgumentParser()
+        _add_rendering_arguments(parser)
+        self.create_options = functools.partial(_create_options, parser.parse_args([]))
+
+        self.server = RenderServer(("127.0.0.1", 0), self.create_options, RenderMemo())
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.thread.join()
+        self.server.server_close()
+
+    def test_render_and_stats(self):
+        with urlopen(f"{self.base_url}/render?width-px=400", data=_INITIAL_FEN.encode()) as f:
+            self.assertEqual(f.headers["Content-Type"], "image/svg+xml")
+            svg_bytes = f.read()
+        self.assertIn(b'width="400.0px"', svg_bytes)
+
+        with urlopen(f"{self.base_url}/render?width-px=400", data=_INITIAL_FEN.encode()) as f:
+            self.assertEqual(f.read(), svg_bytes)
+
+        with self.assertRaises(HTTPError) as catcher:
+            urlopen(f"{self.base_url}/render?scale-pieces=7", data=_INITIAL_FEN.encode())
+        self.assertEqual(catcher.exception.code, 400)
+
+        with urlopen(f"{self.base_url}/stats") as f:
+            summary = json.load(f)
+        self.assertEqual(summary["requests"], 3)
+        self.assertEqual(summary["failures"], 1)
+        self.assertEqual((summary["memo"]["hits"], summary["memo"]["misses"]), (1, 1))
+
+    def test_burst_of_clients_queued_rather_than_refused(self):
+        client_count = 64
+        request = (
+            f"POST /render HTTP/1.0\r\nContent-Length: {len(_INITIAL_FEN)}\r\n\r\n{_INITIAL_FEN}"
+        ).encode()
+
+        # NOTE: All clients connect before the server accepts any connection
+        with RenderServer(("127.0.0.1", 0), self.create_options) as server:
+            clients = []
+            try:
+                for _ in range(client_count):
+                    clients.append(
+                        socket.create_connection(("127.0.0.1", server.server_port), timeout=0.5)
+                    )
+                    clients[-1].sendall(request)
+
+                thread = threading.Thread(target=server.serve_forever)
+                thread.start()
+                try:
+                    status_lines = []
+                    for client in clients:
+                        client.settimeout(60)
+                        with client.makefile("rb") as f:
+                            status_lines.append(f.readline())
+                finally:
+                    server.shutdown()
+                    thread.join()
+            finally:
+                for client in clients:
+                    client.close()
+
+        self.assertEqual(len(status_lines), client_count)
+        self.assertTrue(all(b" 200 " in status_line for status_line in status_lines))
@@ -0,0 +1,79 @@
+# Copyright (C) 2026 Sebastian Pipping <sebastian@pipping.org>
+# Licensed under GNU Affero General Public License version 3.0 or later
+
+import os
+import shutil
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from ..compose import _load_board_config, compile_theme_bundle, load_svg_template
+from ..license import get_license_choices_of_theme
+from ..theme_bundle import THEME_BUNDLE_BASENAME, load_theme_bundle, normalize_svg
+from ..themes import BOARD_THEMES, get_theme_dir
+
+_SVG_CONTENT = b"""\
+<?xml version="1.0" encoding="UTF-8"?>
+<!-- Created with Inkscape -->
+<svg xmlns="http://www.w3.org/2000/svg"
+     xmlns:inkscape="http://www.inkscape.org/namespaces/inkscape"
+     xmlns:sodipodi="http://sodipodi.sourceforge.net/DTD/sodipodi-0.dtd"
+     viewBox="0 0 40 20">
+  <metadata>License details</metadata>
+  <sodipodi:namedview inkscape:zoom="2"/>
+  <g inkscape:label="Layer 1">
+    <circle cx="10" cy="10" r="10"/>
+    <text xml:space="preserve"><tspan>A </tspan> B</text>
+  </g>
+</svg>
+"""
+
+
+class NormalizeSvgTest(TestCase):
+    def test_editor_markup_removed(self):
+        self.assertEqual(
+            normalize_svg(_SVG_CONTENT),
+            '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 40 20">'
+            '<g><circle cx="10" cy="10" r="10"/>'
+            '<text xml:space="preserve"><tspan>A </tspan> B</text></g></svg>',
+        )
+
+
+class CompileThemeBundleTest(TestCase):
+    def test_bundle_used_until_theme_changes(self):
+        with TemporaryDirectory() as temp_dir:
+            theme_dir = os.path.join(temp_dir, "clean_alpha")
+            shutil.copytree(get_theme_dir(BOARD_THEMES, "clean_alpha"), theme_dir)
+            board_svg_filename = os.path.join(theme_dir, "board.svg")
+            expected_board_config = _load_board_config(theme_dir)
+            expected_pixel_viewbox = load_svg_template(board_svg_filename).pixel_viewbox(90.0)
+
+            self.assertEqual(
+                compile_theme_bundle(theme_dir), os.path.join(theme_dir, THEME_BUNDLE_BASENAME)
+            )
+
+            self.assertIsNotNone(load_theme_bundle(theme_dir))
+            self.assertEqual(_load_board_config(theme_dir), expected_board_config)
+            self.assertEqual(
+                load_svg_template(board_svg_filename).pixel_viewbox(90.0),
+                expected_pixel_viewbox,
+            )
+            self.assertEqual(get_license_choices_of_theme(theme_dir), ["CC0-1.0"])
+
+            # NOTE: The bundle is cached by now;  the edit must be noticed regardless
+            os.utime(board_svg_filename, ns=(0, 0))
+            self.assertIsNone(load_theme_bundle(theme_dir))
+            self.assertIsNone(load_theme_bundle(theme_dir))
+
+            compile_theme_bundle(theme_dir)
+            self.assertIsNotNone(load_theme_bundle(theme_dir))
+            self.assertEqual(
+                load_svg_template(board_svg_filename).pixel_viewbox(90.0),
+                expected_pixel_viewbox,
+            )
+
+            with open(board_svg_filename, "wb") as f:
+                f.write(_SVG_CONTENT)
+            os.utime(board_svg_filename, ns=(1, 1))
+            self.assertEqual(
+                load_svg_template(board_svg_filename).pixel_viewbox(90.0), (0.0, 0.0, 40.0, 20.0)
+            )
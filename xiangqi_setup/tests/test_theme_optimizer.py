@@ -0,0 +1,64 @@
+# Copyright (C) 2026 Sebastian Pipping <sebastian@pipping.org>
+# Licensed under GNU Affero General Public License version 3.0 or later
+
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase, skipIf
+
+from ..raster import check_raster_support
+from ..theme_optimizer import optimize_theme
+
+try:
+    check_raster_support()
+except ValueError:
+    raster_supported = False
+else:
+    raster_supported = True
+
+_SVG_CONTENT = """\
+<?xml version="1.0" encoding="UTF-8"?>
+<svg xmlns="http://www.w3.org/2000/svg"
+     xmlns:inkscape="http://www.inkscape.org/namespaces/inkscape"
+     width="40" height="40" viewBox="0 0 40 40">
+  <metadata>Created with Inkscape</metadata>
+  <g inkscape:groupmode="layer" inkscape:label="Layer 1" id="layer1">
+    <path style="fill:#ff0000;fill-opacity:1;stroke:none;font-size:12px"
+          d="m 5.123456789,5.123456789 l 30,0 0,30 -30,0 z"/>
+  </g>
+</svg>
+"""
+
+
+@skipIf(not raster_supported, "needs numpy and pyvips")
+class OptimizeThemeTest(TestCase):
+    def setUp(self):
+        temp_dir = TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.theme_dir = temp_dir.name
+        self.filename = os.path.join(self.theme_dir, "red_king.svg")
+        with open(self.filename, "w") as f:
+            f.write(_SVG_CONTENT)
+
+    def test_rewritten_if_equivalent(self):
+        (report,) = optimize_theme(self.theme_dir, precision=10, tolerance_pixels=0)
+
+        self.assertTrue(report.accepted)
+        self.assertEqual(report.differing_pixel_count, 0)
+        self.assertEqual((report.element_count_before, report.element_count_after), (4, 2))
+        with open(self.filename, "rb") as f:
+            self.assertEqual(len(f.read()), report.byte_count_after)
+
+    def test_kept_if_not_equivalent(self):
+        (report,) = optimize_theme(self.theme_dir, precision=1, tolerance_pixels=0)
+
+        self.assertFalse(report.accepted)
+        self.assertGreater(report.differing_pixel_count, 0)
+        with open(self.filename) as f:
+            self.assertEqual(f.read(), _SVG_CONTENT)
+
+    def test_dry_run(self):
+        (report,) = optimize_theme(self.theme_dir, precision=10, tolerance_pixels=0, dry_run=True)
+
+        self.assertTrue(report.accepted)
+        with open(self.filename) as f:
+            self.assertEqual(f.read(), _SVG_CONTENT)
@@ -0,0 +1,99 @@
+# Copyright (C) 2026 Sebastian Pipping <sebastian@pipping.org>
+# Licensed under GNU Affero General Public License version 3.0 or later
+
+import json
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch
+
+from .. import theme_registry
+from ..theme_registry import THEME_KINDS, ThemeRegistry, get_theme_info, load_theme_registry
+
+_BOARD_INI_CONTENT = """\
+[Board]
+left = 10
+top = 20
+width = 300
+height = 330
+"""
+
+
+def _create_theme(themes_home_dir: str, kind: str, name: str) -> str:
+    theme_dir = os.path.join(themes_home_dir, kind, name)
+    os.makedirs(theme_dir)
+    with open(os.path.join(theme_dir, "LICENSE.json"), "w") as f:
+        json.dump(
+            {
+                "work": {
+                    "license_id": "CC0-1.0",
+                    "authors": [{"Jane Doe": {"email": ["jane", "example.org"]}}],
+                }
+            },
+            f,
+        )
+    return theme_dir
+
+
+class LoadThemeRegistryTest(TestCase):
+    def setUp(self):
+        self.temp_dir = TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.themes_home_dir = os.path.join(self.temp_dir.name, "themes")
+        for kind in THEME_KINDS:
+            _create_theme(self.themes_home_dir, kind, "alpha")
+        with open(os.path.join(self.themes_home_dir, "board", "alpha", "board.ini"), "w") as f:
+            f.write(_BOARD_INI_CONTENT)
+
+        for patcher in (
+            patch.dict(os.environ, {"XDG_CACHE_HOME": os.path.join(self.temp_dir.name, "cache")}),
+            patch.dict(theme_registry._registry_of_themes_home_dir, clear=True),
+            patch.object(theme_registry, "get_themes_home_dir", lambda: self.themes_home_dir),
+            patch.object(ThemeRegistry, "scan", wraps=ThemeRegistry.scan),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_details(self):
+        board_theme = load_theme_registry().themes[0]
+
+        self.assertEqual((board_theme.kind, board_theme.name), ("board", "alpha"))
+        self.assertEqual(board_theme.license_ids, ["CC0-1.0"])
+        self.assertEqual(board_theme.authors, ["Jane Doe (jane@example.org)"])
+        self.assertEqual(board_theme.files, ["LICENSE.json", "board.ini"])
+        self.assertEqual(board_theme.board_geometry, [10.0, 20.0, 300.0, 330.0, 0.0])
+
+    def test_scanned_once_until_themes_change(self):
+        registry = load_theme_registry()
+        self.assertEqual(registry.get_theme_names("pieces"), ["alpha"])
+
+        theme_registry._registry_of_themes_home_dir.clear()  # i.e. force use of the disk cache
+        self.assertEqual(load_theme_registry().get_theme_names("pieces"), ["alpha"])
+        self.assertEqual(ThemeRegistry.scan.call_count, 1)
+
+        _create_theme(self.themes_home_dir, "pieces", "Beta")
+        os.utime(os.path.join(self.themes_home_dir, "pieces"), ns=(0, 0))
+
+        with patch.object(theme_registry, "_REVALIDATE_INTERVAL_SECONDS", 0.0):
+            self.assertEqual(load_theme_registry().get_theme_names("pieces"), ["alpha", "Beta"])
+        self.assertEqual(ThemeRegistry.scan.call_count, 2)
+
+    def test_validated_once_per_interval(self):
+        registry = load_theme_registry()
+
+        with patch.object(ThemeRegistry, "is_up_to_date", wraps=registry.is_up_to_date) as check:
+            for _ in range(3):
+                self.assertIs(load_theme_registry(), registry)
+            self.assertEqual(check.call_count, 0)
+
+            with patch.object(theme_registry, "_REVALIDATE_INTERVAL_SECONDS", 0.0):
+                self.assertIs(load_theme_registry(), registry)
+            self.assertEqual(check.call_count, 1)
+
+    def test_theme_outside_of_registry(self):
+        theme_dir = _create_theme(self.temp_dir.name, "pieces", "custom")
+
+        theme = get_theme_info(theme_dir)
+
+        self.assertEqual((theme.kind, theme.name), ("pieces", "custom"))
+        self.assertEqual(theme.license_ids, ["CC0-1.0"])
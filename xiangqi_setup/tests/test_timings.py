@@ -0,0 +1,60 @@
+# Copyright (C) 2026 Sebastian Pipping <sebastian@pipping.org>
+# Licensed under GNU Affero General Public License version 3.0 or later
+
+import time
+from unittest import TestCase
+
+from lxml import etree
+
+from ..api import render_svg
+from ..timings import (
+    count,
+    is_recording_timings,
+    start_recording_timings,
+    stop_recording_timings,
+    timed,
+)
+
+
+class TimingsTest(TestCase):
+    def tearDown(self):
+        stop_recording_timings()
+
+    def test_nested_phases_charged_exclusively(self):
+        timings = start_recording_timings()
+        with timed("outer"):
+            time.sleep(0.01)
+            with timed("inner"):
+                time.sleep(0.02)
+        stop_recording_timings()
+
+        self.assertGreaterEqual(timings.wall_seconds_of_phase["inner"], 0.02)
+        self.assertLess(timings.wall_seconds_of_phase["outer"], 0.02)
+        self.assertAlmostEqual(
+            sum(timings.wall_seconds_of_phase.values()), timings.total_wall_seconds
+        )
+        self.assertEqual(timings.call_count_of_phase, {"outer": 1, "inner": 1})
+
+    def test_nothing_recorded_when_not_recording(self):
+        timings = start_recording_timings()
+        stop_recording_timings()
+
+        with timed("phase"):
+            count("things", 3)
+
+        self.assertFalse(is_recording_timings())
+        self.assertNotIn("phase", timings.wall_seconds_of_phase)
+        self.assertEqual(timings.counts, {})
+
+    def test_render(self):
+        timings = start_recording_timings()
+        svg_bytes = render_svg("v1 4k4/9/9/9/9/9/9/9/9/4K4")
+        stop_recording_timings()
+
+        document = timings.to_json()
+        self.assertTrue({"layout", "compose", "serialize"} <= set(document["phases"]))
+        self.assertEqual(
+            document["counts"]["output_elements"],
+            len(list(etree.fromstring(svg_bytes).iter(etree.Element))),
+        )
+        self.assertIn("serialize", timings.format())
@@ -0,0 +1,51 @@
+# Copyright (C) 2026 Sebastian Pipping <sebastian@pipping.org>
+# Licensed under GNU Affero General Public License version 3.0 or later
+
+from unittest import TestCase
+
+from ..annotations import PutAnnotation
+from ..file_formats.annofen import iterate_annofen_tokens
+from ..file_formats.fen import iterate_fen_tokens
+from ..file_formats.wxf import iterate_wxf_hashed_positions
+from ..parties import RED
+from ..pieces import KING, PutPiece
+from ..zobrist import zobrist_hash
+
+_WXF_WITH_CAPTURES = """\
+FORMAT  WXF
+START{
+ 1. C2.5 h8+7   2. C5+4 c8.5   3. H2+3 c5+4
+}END
+"""
+
+
+class ZobristHashTest(TestCase):
+    def test_independent_of_order(self):
+        atoms = list(iterate_annofen_tokens("v1 4k4/9/9/9/9/9/9/9/9/4[K<pm><bg>]4"))
+
+        self.assertEqual(zobrist_hash(atoms), zobrist_hash(reversed(atoms)))
+
+    def test_same_position_in_different_formats(self):
+        self.assertEqual(
+            zobrist_hash(iterate_fen_tokens("4k4/9/9/9/9/9/9/9/9/4K4 w - - 0 1")),
+            zobrist_hash(iterate_annofen_tokens("v1 4k4/9/9/9/9/9/9/9/9/4K4")),
+        )
+
+    def test_distinguishes_atoms(self):
+        hashes = {
+            zobrist_hash([]),
+            zobrist_hash([PutPiece(RED, KING, 4, 0)]),
+            zobrist_hash([PutPiece(RED, KING, 3, 0)]),
+            zobrist_hash([PutAnnotation("piece_move", 4, 0)]),
+            zobrist_hash([PutAnnotation("piece_move", 4.5, 0)]),
+            zobrist_hash([PutAnnotation("blank_move", 4, 0)]),
+        }
+
+        self.assertEqual(len(hashes), 6)
+
+    def test_incremental_hash_of_wxf_replay(self):
+        positions = list(iterate_wxf_hashed_positions(_WXF_WITH_CAPTURES, "0", True, 1))
+
+        self.assertEqual(len(positions), 6)
+        for _ply, position_hash, atoms in positions:
+            self.assertEqual(position_hash, zobrist_hash(atoms))
@@ -0,0 +1,114 @@
+# Copyright (C) 2026 Sebastian Pipping <sebastian@pipping.org>
+# Licensed under GNU Affero General Public License version 3.0 or later
+
+"""
+Precompiled theme bundles: all files of a theme that rendering needs,
+in a single file next to them, so that loading a theme takes one read.
+Bundles are written by ``xiangqi-setup compile-theme``.
+"""
+
+import json
+import os
+
+from .timings import count_bytes_read, timed
+
+THEME_BUNDLE_BASENAME = "theme-bundle.json"
+
+_THEME_BUNDLE_FORMAT = "xiangqi-setup theme bundle"
+_THEME_BUNDLE_FORMAT_VERSION = 1
+
+# Maps theme directories to pairs of (modification time, bundle)
+_bundle_cache: dict[str, tuple[int, dict]] = {}
+
+
+def normalize_svg(content: bytes) -> str:
+    """
+    Returns the given SVG document without what does not affect rendering:
+    comments, metadata, editor-specific markup and indentation
+    """
+    # NOTE: These are imported only when needed, for faster startup
+    from lxml import etree
+
+    from .optimize import strip_editor_markup, strip_indentation
+
+    root = etree.fromstring(content, etree.XMLParser(remove_comments=True, remove_pis=True))
+    strip_editor_markup(root)
+    strip_indentation(root)
+    return etree.tostring(root, encoding="unicode")
+
+
+def write_theme_bundle(theme_dir: str, bundle: dict) -> str:
+    bundle = {
+        "format": _THEME_BUNDLE_FORMAT,
+        "version": _THEME_BUNDLE_FORMAT_VERSION,
+        **bundle,
+    }
+    filename = os.path.join(theme_dir, THEME_BUNDLE_BASENAME)
+    with open(filename, "w") as f:
+        json.dump(bundle, f, sort_keys=True)
+    return filename
+
+
+def _read_theme_bundle(filename: str) -> dict | None:
+    with timed("load_theme_bundle"), open(filename) as f:
+        bundle = json.load(f)
+    count_bytes_read(filename)
+
+    if (
+        bundle.get("format") != _THEME_BUNDLE_FORMAT
+        or bundle.get("version") != _THEME_BUNDLE_FORMAT_VERSION
+    ):
+        return None  # i.e. fall back to the directory layout until re-compiled
+
+    if not _sources_unchanged(os.path.dirname(filename), bundle):
+        return None
+
+    return bundle
+
+
+def _sources_unchanged(theme_dir: str, bundle: dict, source_basename: str | None = None) -> bool:
+    # NOTE: Edits to a theme after compilation must not go unnoticed,
+    #       including by long-running processes, e.g. xiangqi-setup serve
+    if source_basename is None:
+        mtime_ns_of_basename = bundle["sources"]
+    elif source_basename in bundle["sources"]:
+        mtime_ns_of_basename = {source_basename: bundle["sources"][source_basename]}
+    else:
+        return True  # i.e. nothing bundled to go stale
+
+    for basename, mtime_ns in mtime_ns_of_basename.items():
+        try:
+            if os.stat(os.path.join(theme_dir, basename)).st_mtime_ns != mtime_ns:
+                return False
+        except FileNotFoundError:
+            return False
+    return True
+
+
+def load_theme_bundle(theme_dir: str, source_basename: str | None = None) -> dict | None:
+    """
+    Returns the bundle of the given theme directory or None if the theme
+    has not been compiled (with this version) or changed since;  once the
+    bundle is cached, only the given source file is checked for changes
+    (or all of them if None), so that using a bundle costs a single stat
+    per file as much as reading the file itself would.
+    """
+    filename = os.path.join(theme_dir, THEME_BUNDLE_BASENAME)
+    try:
+        mtime_ns = os.stat(filename).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+    try:
+        cached_mtime_ns, bundle = _bundle_cache[theme_dir]
+    except KeyError:
+        pass
+    else:
+        if cached_mtime_ns == mtime_ns:
+            if bundle is None or _sources_unchanged(theme_dir, bundle, source_basename):
+                return bundle
+            return None  # i.e. until re-compiled
+
+    bundle = _read_theme_bundle(filename)
+    _bundle_cache[theme_dir] = (mtime_ns, bundle)
+    return bundle
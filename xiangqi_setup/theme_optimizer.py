@@ -0,0 +1,147 @@
+# Copyright (C) 2026 Sebastian Pipping <sebastian@pipping.org>
+# Licensed under GNU Affero General Public License version 3.0 or later
+
+"""
+Offline minification of the SVG files of a theme, with each file only
+rewritten if it still rasterizes to the same pixels (within a tolerance).
+"""
+
+import math
+import os
+import shutil
+
+from lxml import etree
+from svgutils.transform import fromstring
+
+from .compose import SvgTemplate
+from .optimize import optimize_theme_svg
+from .raster import import_raster_dependencies, measure_drawing_extent, render_svg_template
+
+DEFAULT_TOLERANCE_PIXELS = 8  # i.e. as in test-for-rendering-regressions.sh
+
+# Resolution of the comparison, limited for graphics drawing far outside
+# of their view box (e.g. arrows)
+_VERIFY_PIXELS_PER_VIEW_BOX = 256
+_VERIFY_MAX_PIXELS = 2048
+
+_VERIFY_RESOLUTION_DPI = 90.0
+
+
+class FileReport:
+    def __init__(
+        self,
+        filename: str,
+        byte_count_before: int,
+        byte_count_after: int,
+        element_count_before: int,
+        element_count_after: int,
+        differing_pixel_count: int,
+        accepted: bool,
+    ):
+        self.filename = filename
+        self.byte_count_before = byte_count_before
+        self.byte_count_after = byte_count_after
+        self.element_count_before = element_count_before
+        self.element_count_after = element_count_after
+        self.differing_pixel_count = differing_pixel_count
+        self.accepted = accepted  # i.e. rewritten unless in dry-run mode
+
+
+def _count_elements(root) -> int:
+    return sum(1 for element in root.iter() if isinstance(element.tag, str))
+
+
+def count_differing_pixels(content_before: bytes, content_after: bytes) -> int:
+    """
+    Rasterizes both SVG documents the way that pieces and annotations
+    are rasterized when composing and returns the number of pixels that differ
+    """
+    numpy, _ = import_raster_dependencies()
+
+    template_before = SvgTemplate(fromstring(content_before.decode("utf-8")))
+    template_after = SvgTemplate(fromstring(content_after.decode("utf-8")))
+
+    view_box = template_before.pixel_viewbox(_VERIFY_RESOLUTION_DPI)
+    if template_after.pixel_viewbox(_VERIFY_RESOLUTION_DPI) != view_box:
+        raise ValueError("View box differs")
+
+    extents = [
+        measure_drawing_extent(template, _VERIFY_RESOLUTION_DPI)
+        for template in (template_before, template_after)
+    ]
+    left = min(extent[0] for extent in extents)
+    top = min(extent[1] for extent in extents)
+    right = max(extent[2] for extent in extents)
+    bottom = max(extent[3] for extent in extents)
+    if right <= left or bottom <= top:
+        return 0  # i.e. neither draws anything
+
+    scale = min(
+        _VERIFY_PIXELS_PER_VIEW_BOX / max(view_box[2:]),
+        _VERIFY_MAX_PIXELS / max(right - left, bottom - top),
+    )
+    pixels_before, pixels_after = (
+        render_svg_template(
+            template,
+            scale,
+            -left * scale,
+            -top * scale,
+            math.ceil((right - left) * scale),
+            math.ceil((bottom - top) * scale),
+        )
+        for template in (template_before, template_after)
+    )
+    return int(numpy.any(pixels_before != pixels_after, axis=2).sum())
+
+
+def _write_atomically(filename: str, content: bytes):
+    temp_filename = f"{filename}.{os.getpid()}.tmp"
+    with open(temp_filename, "wb") as f:
+        f.write(content)
+    shutil.copymode(filename, temp_filename)
+    os.replace(temp_filename, filename)
+
+
+def optimize_theme_file(
+    filename: str, precision: int, tolerance_pixels: int, dry_run: bool = False
+) -> FileReport:
+    with open(filename, "rb") as f:
+        content_before = f.read()
+
+    root = etree.fromstring(content_before)
+    element_count_before = _count_elements(root)
+    optimize_theme_svg(root, precision)
+    content_after = etree.tostring(root, xml_declaration=True, encoding="UTF-8")
+
+    differing_pixel_count = count_differing_pixels(content_before, content_after)
+    accepted = differing_pixel_count <= tolerance_pixels and len(content_after) < len(
+        content_before
+    )
+    if accepted and not dry_run:
+        _write_atomically(filename, content_after)
+
+    return FileReport(
+        filename,
+        len(content_before),
+        len(content_after),
+        element_count_before,
+        _count_elements(root),
+        differing_pixel_count,
+        accepted,
+    )
+
+
+def optimize_theme(
+    theme_dir: str, precision: int, tolerance_pixels: int, dry_run: bool = False
+) -> list[FileReport]:
+    """
+    Minifies all SVG files of the given theme directory in place, except for
+    files where more pixels than the given tolerance would change
+    """
+    return [
+        optimize_theme_file(
+            os.path.join(theme_dir, basename), precision, tolerance_pixels, dry_run
+        )
+        for basename in sorted(os.listdir(theme_dir))
+        if basename.endswith(".svg")
+    ]
@@ -0,0 +1,231 @@
+# Copyright (C) 2026 Sebastian Pipping <sebastian@pipping.org>
+# Licensed under GNU Affero General Public License version 3.0 or later
+
+"""
+Registry of all available themes with their license details, files and
+board geometry.  It is cached on disk so that e.g. ``--help`` and the license
+notice after rendering do not need to walk and parse all themes on every run.
+"""
+
+import configparser
+import json
+import os
+import time
+
+from .license import read_license_of_theme
+from .themes import ANNOTATION_THEMES, BOARD_THEMES, PIECE_THEMES, get_themes_home_dir
+from .timings import timed
+
+THEME_KINDS = (BOARD_THEMES, PIECE_THEMES, ANNOTATION_THEMES)
+
+BOARD_INI_BASENAME = "board.ini"
+_BOARD_CONFIG_SECTION = "Board"
+
+_LICENSE_JSON_BASENAME = "LICENSE.json"
+
+_REGISTRY_FORMAT_VERSION = 2
+
+# Files that make a theme directory a Python package rather than belonging to the theme
+_PACKAGING_BASENAMES = {"__init__.py", "__pycache__"}
+
+# Loaded registries are checked for changes to themes at most this often,
+# i.e. about once per run rather than on every use (e.g. three times per render)
+_REVALIDATE_INTERVAL_SECONDS = 1.0
+
+# Maps themes home directories to pairs of (time of validation, loaded registry)
+_registry_of_themes_home_dir: dict = {}
+
+
+def read_board_config(filename: str) -> tuple[float, float, float, float, float]:
+    config = configparser.RawConfigParser(defaults={"river": 0.0})
+    config.read(filename)
+    return (
+        config.getfloat(_BOARD_CONFIG_SECTION, "left"),
+        config.getfloat(_BOARD_CONFIG_SECTION, "top"),
+        config.getfloat(_BOARD_CONFIG_SECTION, "width"),
+        config.getfloat(_BOARD_CONFIG_SECTION, "height"),
+        config.getfloat(_BOARD_CONFIG_SECTION, "river"),
+    )
+
+
+class ThemeInfo:
+    def __init__(
+        self,
+        kind: str,
+        name: str,
+        directory: str,
+        license_ids: list[str],
+        authors: list[str],
+        files: list[str],
+        board_geometry: list[float] | None,
+    ):
+        self.kind = kind
+        self.name = name
+        self.directory = directory
+        self.license_ids = license_ids
+        self.authors = authors  # display names, with contact details if any
+        self.files = files  # basenames
+        self.board_geometry = board_geometry  # left, top, width, height, river
+
+    def __repr__(self):
+        return f"ThemeInfo(kind={self.kind!r}, name={self.name!r})"
+
+
+def _read_theme_info(kind: str, name: str, theme_dir: str) -> ThemeInfo:
+    license_ids, authors = read_license_of_theme(theme_dir)
+
+    files = sorted(
+        entry.name
+        for entry in os.scandir(theme_dir)
+        if entry.is_file() and entry.name not in _PACKAGING_BASENAMES
+    )
+
+    if BOARD_INI_BASENAME in files:
+        board_geometry = list(read_board_config(os.path.join(theme_dir, BOARD_INI_BASENAME)))
+    else:
+        board_geometry = None
+
+    return ThemeInfo(kind, name, theme_dir, license_ids, authors, files, board_geometry)
+
+
+class ThemeRegistry:
+    def __init__(self, themes_home_dir: str, themes: list[ThemeInfo], mtime_ns_of_path: dict):
+        self.themes_home_dir = themes_home_dir
+        self.themes = themes  # by kind, then name (case-insensitive)
+        # Modification times of what the content of this registry depends on,
+        # with paths relative to the themes home directory
+        self._mtime_ns_of_path = mtime_ns_of_path
+        self._theme_of_directory = {theme.directory: theme for theme in themes}
+
+    def get_theme(self, theme_dir: str) -> ThemeInfo | None:
+        return self._theme_of_directory.get(theme_dir)
+
+    def get_theme_names(self, kind: str) -> list[str]:
+        return [theme.name for theme in self.themes if theme.kind == kind]
+
+    def is_up_to_date(self) -> bool:
+        try:
+            for path, mtime_ns in self._mtime_ns_of_path.items():
+                if os.stat(os.path.join(self.themes_home_dir, path)).st_mtime_ns != mtime_ns:
+                    return False
+        except FileNotFoundError:
+            return False
+        return True
+
+    def to_json(self) -> dict:
+        return {
+            "version": _REGISTRY_FORMAT_VERSION,
+            "themes_home_dir": self.themes_home_dir,
+            "mtime_ns_of_path": self._mtime_ns_of_path,
+            "themes": [vars(theme) for theme in self.themes],
+        }
+
+    @classmethod
+    def from_json(cls, document: dict) -> "ThemeRegistry":
+        if document.get("version") != _REGISTRY_FORMAT_VERSION:
+            raise ValueError("Unsupported theme registry version")
+        return cls(
+            document["themes_home_dir"],
+            [ThemeInfo(**theme) for theme in document["themes"]],
+            document["mtime_ns_of_path"],
+        )
+
+    @classmethod
+    def scan(cls, themes_home_dir: str) -> "ThemeRegistry":
+        themes = []
+        mtime_ns_of_path = {}
+
+        def track(path):
+            mtime_ns_of_path[path] = os.stat(os.path.join(themes_home_dir, path)).st_mtime_ns
+
+        for kind in THEME_KINDS:
+            # NOTE: Adding or removing a theme changes the modification time
+            #       of the directory of its kind, same for files of a theme.
+            track(kind)
+            names = [
+                entry.name
+                for entry in os.scandir(os.path.join(themes_home_dir, kind))
+                if entry.is_dir() and entry.name not in _PACKAGING_BASENAMES
+            ]
+            for name in sorted(names, key=lambda x: x.lower()):
+                theme = _read_theme_info(kind, name, os.path.join(themes_home_dir, kind, name))
+                themes.append(theme)
+                track(os.path.join(kind, name))
+                for basename in (_LICENSE_JSON_BASENAME, BOARD_INI_BASENAME):
+                    if basename in theme.files:
+                        track(os.path.join(kind, name, basename))
+
+        return cls(themes_home_dir, themes, mtime_ns_of_path)
+
+
+def _get_cache_filename() -> str:
+    cache_home_dir = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(cache_home_dir, "xiangqi-setup", "theme-registry.json")
+
+
+def _read_cache(filename: str, themes_home_dir: str) -> ThemeRegistry | None:
+    try:
+        with open(filename) as f:
+            registry = ThemeRegistry.from_json(json.load(f))
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+    if registry.themes_home_dir != themes_home_dir or not registry.is_up_to_date():
+        return None
+
+    return registry
+
+
+def _write_cache(filename: str, registry: ThemeRegistry):
+    temp_filename = f"{filename}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        with open(temp_filename, "w") as f:
+            json.dump(registry.to_json(), f)
+        os.replace(temp_filename, filename)  # i.e. atomically for concurrent runs
+    except OSError:
+        pass  # i.e. caching is an optimization only, e.g. for read-only home directories
+
+
+def load_theme_registry() -> ThemeRegistry:
+    """
+    Returns the registry of all themes, from memory or the on-disk cache
+    if still up to date or from a fresh scan otherwise
+    """
+    themes_home_dir = get_themes_home_dir()
+
+    now = time.monotonic()
+    try:
+        validated, registry = _registry_of_themes_home_dir[themes_home_dir]
+    except KeyError:
+        pass
+    else:
+        if now - validated < _REVALIDATE_INTERVAL_SECONDS:
+            return registry
+        if registry.is_up_to_date():
+            _registry_of_themes_home_dir[themes_home_dir] = (now, registry)
+            return registry
+
+    with timed("load_theme_registry"):
+        cache_filename = _get_cache_filename()
+        registry = _read_cache(cache_filename, themes_home_dir)
+        if registry is None:
+            registry = ThemeRegistry.scan(themes_home_dir)
+            _write_cache(cache_filename, registry)
+
+    _registry_of_themes_home_dir[themes_home_dir] = (now, registry)
+    return registry
+
+
+def get_theme_info(theme_dir: str) -> ThemeInfo:
+    """
+    Returns details on the theme in the given directory,
+    from the registry for all themes that come with xiangqi-setup
+    """
+    theme = load_theme_registry().get_theme(theme_dir)
+    if theme is None:  # e.g. a theme outside of the themes home directory
+        kind_dir, name = os.path.split(theme_dir)
+        theme = _read_theme_info(os.path.basename(kind_dir), name, theme_dir)
+    return theme
@@ -0,0 +1,24 @@
+# Copyright (C) 2026 Sebastian Pipping <sebastian@pipping.org>
+# Licensed under GNU Affero General Public License version 3.0 or later
+
+import os
+
+BOARD_THEMES = "board"
+PIECE_THEMES = "pieces"
+ANNOTATION_THEMES = "annotations"
+
+
+def get_themes_home_dir():
+    package_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if os.path.exists(os.path.join(package_dir, "..", ".git")):
+        return os.path.join(package_dir, "themes")
+    else:
+        from importlib import resources  # i.e. only when needed, for faster startup
+
+        return str(resources.files("xiangqi_setup") / "themes")
+
+
+def get_theme_dir(kind: str, name: str) -> str:
+    if "/" in name:
+        raise ValueError("Theme name cannot contain slashes")
+    return os.path.join(get_themes_home_dir(), kind, name)
@@ -0,0 +1,151 @@
+# Copyright (C) 2026 Sebastian Pipping <sebastian@pipping.org>
+# Licensed under GNU Affero General Public License version 3.0 or later
+
+"""
+Wall and CPU time spent per phase of rendering (and counts of what was
+processed) for ``--timings``.  Phases nest;  time is charged to the innermost
+phase only so that the times of all phases add up to the total.
+Nothing is recorded (and next to no time is spent) unless recording was started.
+"""
+
+import os
+import time
+from contextlib import nullcontext
+
+# Time spent while recording but outside of any phase
+_OTHER_PHASE = "other"
+
+_NOT_TIMED = nullcontext()
+
+_recording_timings = None
+
+
+class Timings:
+    def __init__(self):
+        self.wall_seconds_of_phase: dict[str, float] = {}
+        self.cpu_seconds_of_phase: dict[str, float] = {}
+        self.call_count_of_phase: dict[str, int] = {}
+        self.counts: dict[str, int] = {}
+        self.total_wall_seconds = 0.0
+        self.total_cpu_seconds = 0.0
+        self._phase_stack = [_OTHER_PHASE]
+        self._started_wall = self._started_cpu = None
+        self._mark_wall = self._mark_cpu = None
+
+    def _charge_current_phase(self):
+        wall, cpu = time.perf_counter(), time.process_time()
+        phase = self._phase_stack[-1]
+        self.wall_seconds_of_phase[phase] = (
+            self.wall_seconds_of_phase.get(phase, 0.0) + wall - self._mark_wall
+        )
+        self.cpu_seconds_of_phase[phase] = (
+            self.cpu_seconds_of_phase.get(phase, 0.0) + cpu - self._mark_cpu
+        )
+        self._mark_wall, self._mark_cpu = wall, cpu
+
+    def start(self):
+        self._started_wall = self._mark_wall = time.perf_counter()
+        self._started_cpu = self._mark_cpu = time.process_time()
+
+    def stop(self):
+        self._charge_current_phase()
+        self.total_wall_seconds += self._mark_wall - self._started_wall
+        self.total_cpu_seconds += self._mark_cpu - self._started_cpu
+
+    def enter(self, phase: str):
+        self._charge_current_phase()
+        self._phase_stack.append(phase)
+        self.call_count_of_phase[phase] = self.call_count_of_phase.get(phase, 0) + 1
+
+    def leave(self):
+        self._charge_current_phase()
+        self._phase_stack.pop()
+
+    def count(self, name: str, amount: int):
+        self.counts[name] = self.counts.get(name, 0) + amount
+
+    def to_json(self) -> dict:
+        return {
+            "phases": {
+                phase: {
+                    "wall_seconds": wall_seconds,
+                    "cpu_seconds": self.cpu_seconds_of_phase[phase],
+                    "calls": self.call_count_of_phase.get(phase, 0),
+                }
+                for phase, wall_seconds in self.wall_seconds_of_phase.items()
+            },
+            "total": {
+                "wall_seconds": self.total_wall_seconds,
+                "cpu_seconds": self.total_cpu_seconds,
+            },
+            "counts": dict(self.counts),
+        }
+
+    def format(self) -> str:
+        lines = [f"{'phase':<20} {'wall ms':>10} {'cpu ms':>10} {'calls':>7}"]
+        for phase, wall_seconds in self.wall_seconds_of_phase.items():
+            calls = self.call_count_of_phase.get(phase)
+            lines.append(
+                f"{phase:<20} {wall_seconds * 1000:10.2f}"
+                f" {self.cpu_seconds_of_phase[phase] * 1000:10.2f}"
+                f" {'' if calls is None else calls:>7}"
+            )
+        lines.append(
+            f"{'total':<20} {self.total_wall_seconds * 1000:10.2f}"
+            f" {self.total_cpu_seconds * 1000:10.2f}"
+        )
+        if self.counts:
+            lines.append("")
+            lines.append(f"{'count':<20} {'value':>10}")
+            for name, amount in self.counts.items():
+                lines.append(f"{name:<20} {amount:>10,}")
+        return "\n".join(lines)
+
+
+class _TimedPhase:
+    def __init__(self, timings: Timings, phase: str):
+        self._timings = timings
+        self._phase = phase
+
+    def __enter__(self):
+        self._timings.enter(self._phase)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._timings.leave()
+
+
+def start_recording_timings() -> Timings:
+    global _recording_timings
+    _recording_timings = Timings()
+    _recording_timings.start()
+    return _recording_timings
+
+
+def stop_recording_timings():
+    global _recording_timings
+    if _recording_timings is not None:
+        _recording_timings.stop()
+        _recording_timings = None
+
+
+def is_recording_timings() -> bool:
+    return _recording_timings is not None
+
+
+def timed(phase: str):
+    """
+    Returns a context manager that charges the time spent within to the given phase
+    """
+    if _recording_timings is None:
+        return _NOT_TIMED
+    return _TimedPhase(_recording_timings, phase)
+
+
+def count(name: str, amount: int = 1):
+    if _recording_timings is not None:
+        _recording_timings.count(name, amount)
+
+
+def count_bytes_read(filename: str):
+    if _recording_timings is not None:
+        _recording_timings.count("bytes_read", os.path.getsize(filename))
@@ -0,0 +1,10 @@
+# Copyright (C) 2026 Sebastian Pipping <sebastian@pipping.org>
+# Licensed under GNU Affero General Public License version 3.0 or later
+
+
+def _cm_to_inch(cm):
+    return cm * 0.393700787
+
+
+def cm_to_pixel(cm, resolution_dpi):
+    return _cm_to_inch(cm) * resolution_dpi
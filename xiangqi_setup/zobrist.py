@@ -0,0 +1,48 @@
+# Copyright (C) 2026 Sebastian Pipping <sebastian@pipping.org>
+# Licensed under GNU Affero General Public License version 3.0 or later
+
+"""
+Zobrist hashing of positions, i.e. 64-bit hashes that are the XOR of a key
+per atom so that they can be updated incrementally when atoms are put or
+removed.  Keys are derived from the atoms themselves rather than drawn at
+random so that hashes are the same across processes and runs.
+"""
+
+import hashlib
+from functools import lru_cache, reduce
+from operator import xor
+
+from .pieces import BOARD_PUT_PIECES
+from .positions import canonical_atom
+
+_KEY_BYTE_COUNT = 8
+
+
+def _derive_key(canonical_atom: tuple) -> int:
+    digest = hashlib.blake2b(repr(canonical_atom).encode(), digest_size=_KEY_BYTE_COUNT).digest()
+    return int.from_bytes(digest, "little")
+
+
+# Maps (interned) pieces on the board to their keys
+_ZOBRIST_KEY_OF_PUT_PIECE = {
+    put_piece: _derive_key(canonical_atom(put_piece)) for put_piece in BOARD_PUT_PIECES
+}
+
+
+@lru_cache(maxsize=8192)
+def _zobrist_key_of_other_atom(atom) -> int:
+    return _derive_key(canonical_atom(atom))
+
+
+def zobrist_key_of_atom(atom) -> int:
+    key = _ZOBRIST_KEY_OF_PUT_PIECE.get(atom)
+    if key is None:  # i.e. an annotation or a piece off the board
+        key = _zobrist_key_of_other_atom(atom)
+    return key
+
+
+def zobrist_hash(atoms) -> int:
+    """
+    Returns the Zobrist hash of the given atoms, independent of their order
+    """
+    return reduce(xor, map(zobrist_key_of_atom, atoms), 0)